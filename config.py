@@ -10,9 +10,82 @@ GEMINI_AI_STUDIO_API_KEY = os.getenv("GEMINI_AI_STUDIO_API_KEY")
 # OpenAI
 OPENAI_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
 OPENAI_LLM_MODEL = os.getenv("OPENAI_LLM_MODEL", "gpt-5-mini")
+# Override API endpoints, e.g. the local mock server (scripts/benchmarks/mock_llm_server.py)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None  # e.g. http://127.0.0.1:8089/v1
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL") or None  # e.g. http://127.0.0.1:8089
+
+# Embeddings ("openai", "sentence_transformers" or "hashing").
+# Switching provider changes the vector space: re-run the backfill, which re-embeds every vector stamped with
+# another embedding_signature(); until then the retriever skips those properties.
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+LOCAL_EMBEDDING_DEVICE = os.getenv("LOCAL_EMBEDDING_DEVICE", "cpu")
+LOCAL_EMBEDDING_BACKEND = os.getenv("LOCAL_EMBEDDING_BACKEND", "torch")  # "torch" or "onnx"
+LOCAL_EMBEDDING_ONNX_FILE = os.getenv("LOCAL_EMBEDDING_ONNX_FILE", "")  # e.g. onnx/model_qint8_avx512_vnni.onnx
+HASHING_EMBEDDING_DIM = int(os.getenv("HASHING_EMBEDDING_DIM", "256"))
+
+# Depth-Anything V2 for the spatial-signal judge ("small" / "base" / "large"), loaded on first use.
+# Device "auto" uses CUDA (float16) when available, else CPU in DEPTH_CPU_DTYPE ("float32" or "bfloat16").
+DEPTH_MODEL_SIZE = os.getenv("DEPTH_MODEL_SIZE", "large")
+DEPTH_DEVICE = os.getenv("DEPTH_DEVICE", "auto")
+DEPTH_CPU_DTYPE = os.getenv("DEPTH_CPU_DTYPE", "float32")
+DEPTH_BACKEND = os.getenv("DEPTH_BACKEND", "torch")  # "torch" or "onnx" (ONNX Runtime, CPU)
+DEPTH_ONNX_FILE = os.getenv("DEPTH_ONNX_FILE", "onnx/model.onnx")  # e.g. onnx/model_int8.onnx
+# Depth inference worker: images per forward pass, and how long the first request waits for the batch to fill
+DEPTH_BATCH_SIZE = int(os.getenv("DEPTH_BATCH_SIZE", "8"))
+DEPTH_BATCH_WAIT_MS = float(os.getenv("DEPTH_BATCH_WAIT_MS", "20"))
 
 # Gemini
 GEMINI_LLM_MODEL = os.getenv("GEMINI_LLM_MODEL", "gemini-flash-latest")
+# Gemini quota for batch jobs (requests / tokens per minute, 0 = unlimited)
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "60"))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "1000000"))
+
+# Score properties by max-sim over the listing vector and per-room vectors (needs room embeddings)
+MULTI_VECTOR_SCORING = os.getenv("MULTI_VECTOR_SCORING", "false").lower() == "true"
+
+# MMR diversification (hybrid_search(diversify=True)); street cap 0 = no per-street limit
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))
+MMR_STREET_CAP = int(os.getenv("MMR_STREET_CAP", "0"))
+# MMR only considers this many most relevant candidates (0 = all); bounds its latency at large graph limits
+MMR_CANDIDATE_POOL = int(os.getenv("MMR_CANDIDATE_POOL", "200"))
+
+# Reranker ("none", "cross_encoder" or "llm")
+RERANKER_BACKEND = os.getenv("RERANKER_BACKEND", "none")
+CROSS_ENCODER_MODEL = os.getenv("CROSS_ENCODER_MODEL", "BAAI/bge-reranker-v2-m3")
+RERANK_SHORTLIST_SIZE = int(os.getenv("RERANK_SHORTLIST_SIZE", "30"))
+RERANK_LATENCY_BUDGET_MS = int(os.getenv("RERANK_LATENCY_BUDGET_MS", "1500"))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "10000"))
+
+# hybrid_search response cache (invalidated by the Neo4j catalog version)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "600"))
+CATALOG_VERSION_POLL_SECONDS = float(os.getenv("CATALOG_VERSION_POLL_SECONDS", "1.0"))
+
+# JSON codec for batch data scripts ("auto" = orjson, then msgspec, then the standard library)
+JSON_BACKEND = os.getenv("JSON_BACKEND", "auto")
+
+# Columnar dataset store (Parquet tables + memory-mapped Arrow copies), built by scripts/dataset_store
+DATASET_STORE_DIR = os.getenv("DATASET_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "store"))
+
+# Change feed of the raw crawler directory (manifest, change log, per-stage checkpoints) for `--delta` runs
+CHANGE_FEED_DIR = os.getenv("CHANGE_FEED_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", ".pipeline", "changes"))
+
+# Record/replay of LLM intent + embedding calls ("off", "record" or "replay"); replay never calls the APIs
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off")
+CASSETTE_DIR = os.getenv("CASSETTE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cassettes"))
+
+# Adaptive concurrency limits per downstream (start, ceiling, latency above which the limit shrinks)
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+LLM_TARGET_LATENCY_SECONDS = float(os.getenv("LLM_TARGET_LATENCY_SECONDS", "30"))
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "16"))
+EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "128"))
+EMBEDDING_TARGET_LATENCY_SECONDS = float(os.getenv("EMBEDDING_TARGET_LATENCY_SECONDS", "3"))
+NEO4J_CONCURRENCY = int(os.getenv("NEO4J_CONCURRENCY", "32"))
+NEO4J_MAX_CONCURRENCY = int(os.getenv("NEO4J_MAX_CONCURRENCY", "100"))
+NEO4J_TARGET_LATENCY_SECONDS = float(os.getenv("NEO4J_TARGET_LATENCY_SECONDS", "2"))
 
 # Neo4j
 NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
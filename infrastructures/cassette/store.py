@@ -0,0 +1,107 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+from functools import cache
+from typing import Any, Awaitable, Callable
+
+import numpy as np
+
+from config import CASSETTE_DIR, CASSETTE_MODE
+
+CASSETTE_MODES = ("off", "record", "replay")
+
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+def request_key(request: dict) -> str:
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def encode_vector(vector: np.ndarray) -> str:
+    """float32 vector -> base64 (exact and ~4x smaller than a JSON float list)."""
+    return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii")
+
+
+def decode_vector(data: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype=np.float32).copy()
+
+
+class Cassette:
+    """
+    Append-only JSONL store of request hash -> response for one kind of external call.
+
+    mode="record": return recorded responses, call through and append on a miss.
+    mode="replay": return recorded responses, raise CassetteMiss on a miss (never touches the network).
+    mode="off": always call through.
+    """
+
+    def __init__(self, path: str, mode: str = CASSETTE_MODE):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode: {mode} (expected one of {CASSETTE_MODES})")
+        self.path = path
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[str, Any] | None = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict[str, Any]:
+        if self._entries is None:
+            entries = {}
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            record = json.loads(line)
+                            entries[record["key"]] = record["response"]
+            self._entries = entries
+        return self._entries
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._load().get(key, default)
+
+    def put(self, key: str, request: dict, response: Any):
+        with self._lock:
+            entries = self._load()
+            if key in entries:
+                return
+            entries[key] = response
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "request": request, "response": response}, ensure_ascii=False) + "\n")
+
+    async def call(self, request: dict, fn: Callable[[], Awaitable[Any]],
+                   encode: Callable[[Any], Any] = lambda x: x, decode: Callable[[Any], Any] = lambda x: x) -> Any:
+        """Serve `request` from the cassette, or await `fn()` and record its (JSON-encodable) response."""
+        if self.mode == "off":
+            return await fn()
+
+        key = request_key(request)
+        recorded = self.get(key, _MISSING)
+        if recorded is not _MISSING:
+            self.hits += 1
+            return decode(recorded)
+
+        self.misses += 1
+        if self.mode == "replay":
+            raise CassetteMiss(f"No recorded response in {self.path} for request {key[:12]}: {request}")
+
+        response = await fn()
+        self.put(key, request, encode(response))
+        return response
+
+    def __repr__(self) -> str:
+        return f"Cassette({os.path.basename(self.path)}, mode={self.mode}, hits={self.hits}, misses={self.misses})"
+
+
+_MISSING = object()
+
+
+@cache
+def get_cassette(name: str) -> Cassette:
+    return Cassette(os.path.join(CASSETTE_DIR, f"{name}.jsonl"))
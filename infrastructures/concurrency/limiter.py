@@ -0,0 +1,117 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from functools import cache
+
+from config import (
+    EMBEDDING_CONCURRENCY,
+    EMBEDDING_MAX_CONCURRENCY,
+    EMBEDDING_TARGET_LATENCY_SECONDS,
+    LLM_CONCURRENCY,
+    LLM_MAX_CONCURRENCY,
+    LLM_TARGET_LATENCY_SECONDS,
+    NEO4J_CONCURRENCY,
+    NEO4J_MAX_CONCURRENCY,
+    NEO4J_TARGET_LATENCY_SECONDS,
+)
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """429 from OpenAI (RateLimitError.status_code), google-genai (APIError.code) or anything shaped alike."""
+    for attr in ("status_code", "code", "status"):
+        if getattr(exc, attr, None) == 429:
+            return True
+    return type(exc).__name__ in ("RateLimitError", "ResourceExhausted")
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """429 or a 5xx server error - worth retrying after a backoff."""
+    if is_rate_limited(exc):
+        return True
+    for attr in ("status_code", "code"):
+        status = getattr(exc, attr, None)
+        if isinstance(status, int) and 500 <= status < 600:
+            return True
+    return type(exc).__name__ in ("InternalServerError", "ServiceUnavailable", "ServerError")
+
+
+class AdaptiveLimiter:
+    """
+    Semaphore whose size follows AIMD: +1 slot per window of on-time successes,
+    halved on a 429, shrunk by 10% when a call exceeds `target_latency` seconds.
+    One congestion event shrinks the limit once: calls that were already in flight when the
+    last decrease happened saw the old limit, so their 429s or slow responses are ignored.
+    """
+
+    def __init__(self, name: str, initial: int, max_limit: int, min_limit: int = 1,
+                 target_latency: float | None = None):
+        self.name = name
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self.rate_limited_count = 0
+        self._issued = 0  # sequence number of the latest acquire
+        self._last_decrease = 0  # calls with a sequence number up to this one predate the last decrease
+        self._cond: asyncio.Condition | None = None
+
+    @property
+    def cond(self) -> asyncio.Condition:
+        # Created lazily so the limiter binds to the event loop that actually uses it.
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    async def acquire(self) -> int:
+        """Wait for a slot; returns the call's sequence number for release()."""
+        async with self.cond:
+            while self.in_flight >= int(self.limit):
+                await self.cond.wait()
+            self.in_flight += 1
+            self._issued += 1
+            return self._issued
+
+    async def release(self, seq: int, latency: float, rate_limited: bool = False):
+        async with self.cond:
+            self.in_flight -= 1
+            if rate_limited:
+                self.rate_limited_count += 1
+            congested = rate_limited or (self.target_latency is not None and latency > self.target_latency)
+            if congested:
+                if seq > self._last_decrease:
+                    self.limit = max(self.min_limit, self.limit / 2 if rate_limited else self.limit * 0.9)
+                    self._last_decrease = self._issued
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self.cond.notify_all()
+
+    @asynccontextmanager
+    async def slot(self):
+        seq = await self.acquire()
+        start = time.perf_counter()
+        rate_limited = False
+        try:
+            yield
+        except Exception as e:
+            rate_limited = is_rate_limited(e)
+            raise
+        finally:
+            await self.release(seq, time.perf_counter() - start, rate_limited)
+
+    def __repr__(self) -> str:
+        return f"AdaptiveLimiter({self.name}, limit={self.limit:.1f}, in_flight={self.in_flight}, 429s={self.rate_limited_count})"
+
+
+_LIMITER_SETTINGS = {
+    "llm": (LLM_CONCURRENCY, LLM_MAX_CONCURRENCY, LLM_TARGET_LATENCY_SECONDS),
+    "embedding": (EMBEDDING_CONCURRENCY, EMBEDDING_MAX_CONCURRENCY, EMBEDDING_TARGET_LATENCY_SECONDS),
+    "neo4j": (NEO4J_CONCURRENCY, NEO4J_MAX_CONCURRENCY, NEO4J_TARGET_LATENCY_SECONDS),
+}
+
+
+@cache
+def get_limiter(name: str) -> AdaptiveLimiter:
+    """Process-wide limiter per downstream ("llm", "embedding", "neo4j")."""
+    initial, max_limit, target_latency = _LIMITER_SETTINGS[name]
+    return AdaptiveLimiter(name, initial=initial, max_limit=max_limit, target_latency=target_latency)
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Refills `per_minute` units per minute up to `capacity` (default: one minute's worth).
+    `acquire(n)` waits until n units are available; `per_minute <= 0` disables the bucket.
+    """
+
+    def __init__(self, per_minute: float, capacity: float | None = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock: asyncio.Lock | None = None
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, n: float = 1):
+        if self.rate <= 0:
+            return
+        # A request bigger than the bucket would never fit; let it through once the bucket is full.
+        n = min(n, self.capacity)
+        # Waiters queue on the lock, so a large request is not starved by a stream of small ones.
+        async with self.lock:
+            self._refill()
+            while self.tokens < n:
+                await asyncio.sleep((n - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= n
+
+    def adjust(self, delta: float):
+        """Settle an estimate: positive delta charges extra units (may go negative), negative refunds."""
+        if self.rate <= 0:
+            return
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class QuotaLimiter:
+    """Requests-per-minute and tokens-per-minute buckets for one API quota."""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+
+    async def acquire(self, estimated_tokens: int):
+        await self.requests.acquire(1)
+        await self.tokens.acquire(estimated_tokens)
+
+    def settle(self, estimated_tokens: int, actual_tokens: int | None):
+        if actual_tokens is not None:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+
+    def __repr__(self) -> str:
+        return f"QuotaLimiter(requests={self.requests.tokens:.0f}, tokens={self.tokens.tokens:.0f})"
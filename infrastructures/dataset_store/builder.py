@@ -0,0 +1,144 @@
+import os
+from collections import Counter
+from glob import glob
+
+from infrastructures.dataset_store.store import PROPERTIES_SCHEMA
+from infrastructures.listing.records import JudgeResult, Listing, to_float, to_int
+from infrastructures.listing.room_taxonomy import clean_room_title, room_taxonomy
+from infrastructures.serialization import json_codec
+
+# Listing fields with their own column (everything else non-null goes to listing_extra).
+_LISTING_COLUMNS = set(PROPERTIES_SCHEMA.names) - {"file_name", "batch_id", "batch_timestamp", "processed_at", "url",
+                                                   "public_area_ratio", "raw_description", "listing_extra"}
+# Columns taken as-is from the typed Listing record.
+_RECORD_COLUMNS = [name for name in PROPERTIES_SCHEMA.names if name in Listing.__dataclass_fields__]
+
+
+def _json_files(directory: str | None) -> list[str]:
+    return sorted(glob(os.path.join(directory, "*.json"))) if directory and os.path.isdir(directory) else []
+
+
+def property_rows(raw_dir: str) -> tuple[list[dict], list[dict], dict[str, str], dict[str, list[str]]]:
+    """properties + rooms rows from the raw crawl, the file name -> property_id map and picture lists."""
+    properties, rooms, file_to_id, pictures = [], [], {}, {}
+    for path in _json_files(raw_dir):
+        data = json_codec.load_file(path)
+        listing = Listing.from_raw(data)
+        if listing is None or not listing.property_id:
+            continue
+        raw = data["listing"]
+        property_id = listing.property_id
+        file_name = os.path.basename(path)
+        file_to_id[file_name] = property_id
+        pictures[property_id] = listing.picture_list
+
+        # Listing.from_raw does the coercion; the store only adds provenance and the fields the record drops.
+        properties.append({
+            **{name: getattr(listing, name) for name in _RECORD_COLUMNS},
+            "file_name": file_name,
+            "batch_id": data.get("batch_id"),
+            "batch_timestamp": data.get("batch_timestamp"),
+            "processed_at": data.get("processed_at"),
+            "url": listing.original_url,
+            "full_address": raw.get("full_address"),
+            "degree_of_decoration": raw.get("degree_of_decoration"),
+            "listing_extra": json_codec.dumps({
+                k: v for k, v in raw.items() if k not in _LISTING_COLUMNS and v not in (None, [], {}, "")
+            }).decode("utf-8"),
+        })
+        rooms.extend(
+            {"property_id": property_id, "room_index": i, "room": f.room, "category": room_taxonomy.classify(f.room),
+             "tag_list": f.tag_list, "raw_tags": f.raw_tags}
+            for i, f in enumerate(listing.extracted_feature_list)
+        )
+    return properties, rooms, file_to_id, pictures
+
+
+def image_rows(pictures: dict[str, list[str]], rematch_dir: str | None, file_to_id: dict[str, str]) -> list[dict]:
+    """One row per listing picture, joined with the VLM rematch result for that picture when there is one."""
+    matches: dict[tuple[str, str], dict] = {}
+    for path in _json_files(rematch_dir):
+        property_id = file_to_id.get(os.path.basename(path))
+        if property_id is None:
+            continue
+        for item in json_codec.load_file(path).get("matching_result_list", []):
+            matches[(property_id, item.get("matched_image"))] = item
+
+    rows = []
+    for property_id, urls in pictures.items():
+        for i, url in enumerate(urls):
+            item = matches.get((property_id, url), {})
+            feature = item.get("extracted_feature") or {}
+            rows.append({
+                "property_id": property_id,
+                "image_index": i,
+                "url": url,
+                "description_id": item.get("description_id"),
+                "room": feature.get("room"),
+                "category": room_taxonomy.classify(feature["room"]) if feature.get("room") else None,
+                "tag_list": feature.get("tag_list"),
+                "raw_description": feature.get("raw_description"),
+                "evidence": item.get("evidence"),
+                "match_confidence": to_float(item.get("confidence_score")),
+            })
+    return rows
+
+
+def question_rows(dataset_dirs: dict[str, str]) -> list[dict]:
+    rows = []
+    for dataset, directory in dataset_dirs.items():
+        for path in _json_files(directory):
+            data = json_codec.load_file(path)
+            rows.extend(
+                {"property_id": data.get("property_id"), "dataset": dataset, "question_index": i,
+                 "question": q.get("question"), "type": q.get("type"), "reason": q.get("reason")}
+                for i, q in enumerate(data.get("question_list", []))
+            )
+    return rows
+
+
+def evaluation_rows(judge_dirs: dict[str, str], file_to_id: dict[str, str]) -> list[dict]:
+    rows = []
+    for judge, directory in judge_dirs.items():
+        for path in _json_files(directory):
+            property_id = file_to_id.get(os.path.basename(path))
+            if property_id is None:
+                continue
+            for i, item in enumerate(json_codec.load_file(path)):
+                result = JudgeResult.from_dict(item, index=i)
+                rows.append({
+                    "property_id": property_id,
+                    "judge": judge,
+                    "item_index": i,
+                    "description_id": result.input_ref.description_id,
+                    "matched_image": result.input_ref.matched_image,
+                    "room": result.input_ref.room,
+                    "confidence_score": to_int(result.evaluation.get("confidence_score")),
+                    "reasoning": result.evaluation.get("reasoning"),
+                })
+    return rows
+
+
+def room_category_rows(*tables: list[dict]) -> list[dict]:
+    """The title -> category dictionary over every room title appearing in `tables`."""
+    counts = Counter(row["room"] for rows in tables for row in rows if row.get("room"))
+    rules = room_taxonomy.signature
+    return [
+        {"room": room, "clean_room": clean_room_title(room), "category": room_taxonomy.classify(room), "count": n,
+         "rules": rules}
+        for room, n in counts.items()
+    ]
+
+
+def build_tables(raw_dir: str, rematch_dir: str | None, question_dirs: dict[str, str],
+                 judge_dirs: dict[str, str]) -> dict[str, list[dict]]:
+    properties, rooms, file_to_id, pictures = property_rows(raw_dir)
+    images = image_rows(pictures, rematch_dir, file_to_id)
+    return {
+        "properties": properties,
+        "rooms": rooms,
+        "images": images,
+        "questions": question_rows(question_dirs),
+        "evaluations": evaluation_rows(judge_dirs, file_to_id),
+        "room_categories": room_category_rows(rooms, images),
+    }
@@ -0,0 +1,195 @@
+import os
+from typing import Any
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from config import DATASET_STORE_DIR
+
+# Rows per Parquet row group. Row-group min/max statistics are what predicate pushdown skips on, and tables are
+# sorted by property_id, so a property_id filter reads only the groups that can contain it.
+ROW_GROUP_SIZE = 16_384
+
+PROPERTIES_SCHEMA = pa.schema([
+    ("property_id", pa.string()),
+    ("file_name", pa.string()),
+    ("batch_id", pa.string()),
+    ("batch_timestamp", pa.string()),
+    ("processed_at", pa.string()),
+    ("url", pa.string()),
+    ("title", pa.string()),
+    ("total_price", pa.float64()),
+    ("city", pa.string()),
+    ("district", pa.string()),
+    ("street", pa.string()),
+    ("full_address", pa.string()),
+    ("property_type", pa.string()),
+    ("property_usage", pa.string()),
+    ("property_age", pa.int32()),
+    ("floor", pa.int32()),
+    ("total_floors", pa.int32()),
+    ("gross_area", pa.float64()),
+    ("interior_area", pa.float64()),
+    ("public_area_ratio", pa.float64()),
+    ("land_ownership_area", pa.float64()),
+    ("num_bedroom", pa.int32()),
+    ("num_bathroom", pa.float64()),
+    ("num_living_room", pa.int32()),
+    ("orientation", pa.string()),
+    ("has_elevator", pa.bool_()),
+    ("parking_type", pa.string()),
+    ("degree_of_decoration", pa.string()),
+    ("transportation", pa.string()),
+    ("description", pa.string()),
+    ("raw_description", pa.string()),
+    ("picture_list", pa.list_(pa.string())),
+    # Remaining non-null listing fields as a JSON object, so the store stays lossless.
+    ("listing_extra", pa.string()),
+])
+
+ROOMS_SCHEMA = pa.schema([
+    ("property_id", pa.string()),
+    ("room_index", pa.int32()),
+    ("room", pa.string()),
+    ("category", pa.string()),
+    ("tag_list", pa.list_(pa.string())),
+    ("raw_tags", pa.string()),
+])
+
+IMAGES_SCHEMA = pa.schema([
+    ("property_id", pa.string()),
+    ("image_index", pa.int32()),
+    ("url", pa.string()),
+    # VLM rematch result for the image (null when no description block was matched to it)
+    ("description_id", pa.string()),
+    ("room", pa.string()),
+    ("category", pa.string()),
+    ("tag_list", pa.list_(pa.string())),
+    ("raw_description", pa.string()),
+    ("evidence", pa.string()),
+    ("match_confidence", pa.float64()),
+])
+
+QUESTIONS_SCHEMA = pa.schema([
+    ("property_id", pa.string()),
+    ("dataset", pa.string()),
+    ("question_index", pa.int32()),
+    ("question", pa.string()),
+    ("type", pa.string()),
+    ("reason", pa.string()),
+])
+
+EVALUATIONS_SCHEMA = pa.schema([
+    ("property_id", pa.string()),
+    ("judge", pa.string()),
+    ("item_index", pa.int32()),
+    ("description_id", pa.string()),
+    ("matched_image", pa.string()),
+    ("room", pa.string()),
+    ("confidence_score", pa.int32()),
+    ("reasoning", pa.string()),
+])
+
+# Dimension table: every distinct room title in rooms/images with its room_taxonomy category. `rules` is the
+# RoomTaxonomy signature the categories were computed with.
+ROOM_CATEGORIES_SCHEMA = pa.schema([
+    ("room", pa.string()),
+    ("clean_room", pa.string()),
+    ("category", pa.string()),
+    ("count", pa.int64()),
+    ("rules", pa.string()),
+])
+
+SCHEMAS = {
+    "properties": PROPERTIES_SCHEMA,
+    "rooms": ROOMS_SCHEMA,
+    "images": IMAGES_SCHEMA,
+    "questions": QUESTIONS_SCHEMA,
+    "evaluations": EVALUATIONS_SCHEMA,
+    "room_categories": ROOM_CATEGORIES_SCHEMA,
+}
+
+# Sort order of each table; fact tables lead with property_id.
+SORT_KEYS = {
+    "properties": ("property_id",),
+    "rooms": ("property_id", "room_index"),
+    "images": ("property_id", "image_index"),
+    "questions": ("property_id", "dataset", "question_index"),
+    "evaluations": ("property_id", "judge", "item_index"),
+    "room_categories": ("category", "room"),
+}
+
+
+def to_expression(filter: pc.Expression | dict[str, Any] | None) -> pc.Expression | None:
+    """{"property_id": [...], "dataset": "v2"} -> AND of isin / equality; Expressions pass through."""
+    if filter is None or isinstance(filter, pc.Expression):
+        return filter
+    expression = None
+    for column, value in filter.items():
+        term = pc.field(column).isin(value) if isinstance(value, (list, tuple, set)) else pc.field(column) == value
+        expression = term if expression is None else expression & term
+    return expression
+
+
+class DatasetStore:
+    """
+    Canonical columnar copy of the pipeline data: one zstd Parquet file per table (see SCHEMAS), keyed by
+    property_id. `read` projects columns and pushes filters down to row groups; `mmap` serves a table from an
+    uncompressed Arrow IPC copy through a memory map, so repeated loads are zero-copy.
+    """
+
+    def __init__(self, root: str = DATASET_STORE_DIR):
+        self.root = root
+
+    def path(self, name: str, suffix: str = "parquet") -> str:
+        return os.path.join(self.root, f"{name}.{suffix}")
+
+    @property
+    def names(self) -> list[str]:
+        return [name for name in SCHEMAS if os.path.exists(self.path(name))]
+
+    def write(self, name: str, rows: list[dict] | pa.Table):
+        schema = SCHEMAS[name]
+        table = rows if isinstance(rows, pa.Table) else pa.Table.from_pylist(rows, schema=schema)
+        table = table.sort_by([(key, "ascending") for key in SORT_KEYS[name]])
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.path(name) + ".tmp"
+        pq.write_table(table, tmp_path, compression="zstd", row_group_size=ROW_GROUP_SIZE)
+        os.replace(tmp_path, self.path(name))
+        # The IPC copy is derived from the Parquet file; drop it so mmap() rebuilds it.
+        if os.path.exists(self.path(name, "arrow")):
+            os.remove(self.path(name, "arrow"))
+
+    def read(self, name: str, columns: list[str] | None = None,
+             filter: pc.Expression | dict[str, Any] | None = None) -> pa.Table:
+        dataset = ds.dataset(self.path(name), format="parquet")
+        return dataset.to_table(columns=columns, filter=to_expression(filter))
+
+    def read_pylist(self, name: str, columns: list[str] | None = None,
+                    filter: pc.Expression | dict[str, Any] | None = None) -> list[dict]:
+        return self.read(name, columns, filter).to_pylist()
+
+    def mmap(self, name: str, columns: list[str] | None = None) -> pa.Table:
+        """Zero-copy table backed by the page cache; the IPC copy is written on first use."""
+        ipc_path = self.path(name, "arrow")
+        if not os.path.exists(ipc_path) or os.path.getmtime(ipc_path) < os.path.getmtime(self.path(name)):
+            table = pq.read_table(self.path(name))
+            tmp_path = ipc_path + ".tmp"
+            with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table, max_chunksize=ROW_GROUP_SIZE)
+            os.replace(tmp_path, ipc_path)
+        table = pa.ipc.open_file(pa.memory_map(ipc_path, "r")).read_all()
+        return table.select(columns) if columns else table
+
+    def room_category_dictionary(self, rules: str) -> dict[str, str]:
+        """room title -> category from the room_categories table, if it was built with the `rules` signature."""
+        path = self.path("room_categories")
+        if not os.path.exists(path) or "rules" not in pq.read_schema(path).names:
+            return {}
+        table = self.read("room_categories", ["room", "category"], filter={"rules": rules})
+        return dict(zip(table["room"].to_pylist(), table["category"].to_pylist()))
+
+    def disk_usage(self) -> dict[str, int]:
+        return {name: os.path.getsize(self.path(name)) for name in self.names}
@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+from functools import cache
+
+import numpy as np
+
+from config import (
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_PROVIDER,
+    HASHING_EMBEDDING_DIM,
+    LOCAL_EMBEDDING_BACKEND,
+    LOCAL_EMBEDDING_DEVICE,
+    LOCAL_EMBEDDING_MODEL,
+    LOCAL_EMBEDDING_ONNX_FILE,
+    OPENAI_API_KEY,
+    OPENAI_BASE_URL,
+    OPENAI_EMBEDDING_MODEL,
+)
+
+
+class EmbeddingProvider(ABC):
+    """
+    Text -> float32 matrix of shape (len(texts), dim).
+    Vectors stored in Neo4j must come from the same provider/model that embeds queries.
+    """
+    name = "base"
+
+    @abstractmethod
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Embed a batch of texts; rows are aligned with `texts`."""
+
+    async def aembed(self, texts: list[str]) -> np.ndarray:
+        return await asyncio.to_thread(self.embed, texts)
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    name = "openai"
+
+    def __init__(self, model: str = OPENAI_EMBEDDING_MODEL, batch_size: int = EMBEDDING_BATCH_SIZE):
+        from openai import AsyncOpenAI, OpenAI
+
+        self.model = model
+        self.batch_size = batch_size
+        self.client = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
+        self.async_client = AsyncOpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            resp = self.client.embeddings.create(model=self.model, input=texts[i:i + self.batch_size])
+            vectors.extend(d.embedding for d in resp.data)
+        return np.asarray(vectors, dtype=np.float32)
+
+    async def aembed(self, texts: list[str]) -> np.ndarray:
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            resp = await self.async_client.embeddings.create(model=self.model, input=texts[i:i + self.batch_size])
+            vectors.extend(d.embedding for d in resp.data)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+class SentenceTransformerEmbeddingProvider(EmbeddingProvider):
+    """
+    Local multilingual model. `backend="onnx"` runs through ONNX Runtime; point `onnx_file_name`
+    at a quantized export (e.g. "onnx/model_qint8_avx512_vnni.onnx") for int8 CPU inference.
+    """
+    name = "sentence_transformers"
+
+    def __init__(self, model: str = LOCAL_EMBEDDING_MODEL, device: str = LOCAL_EMBEDDING_DEVICE,
+                 backend: str = LOCAL_EMBEDDING_BACKEND, onnx_file_name: str = LOCAL_EMBEDDING_ONNX_FILE,
+                 batch_size: int = EMBEDDING_BATCH_SIZE):
+        from sentence_transformers import SentenceTransformer
+
+        model_kwargs = {"file_name": onnx_file_name} if backend == "onnx" and onnx_file_name else None
+        self.model = SentenceTransformer(model, device=device, backend=backend, model_kwargs=model_kwargs)
+        self.batch_size = batch_size
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        return self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        ).astype(np.float32, copy=False)
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Deterministic, dependency-free stand-in: signed feature hashing of character uni/bi-grams.
+    Texts sharing characters land close together, which is enough for offline tests and benchmarks.
+    """
+    name = "hashing"
+
+    def __init__(self, dim: int = HASHING_EMBEDDING_DIM):
+        self.dim = dim
+
+    def _embed_one(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        grams = list(text) + [text[i:i + 2] for i in range(len(text) - 1)]
+        for g in grams:
+            h = int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "little")
+            vec[h % self.dim] += 1.0 if (h >> 63) & 1 else -1.0
+        return vec / (np.linalg.norm(vec) + 1e-12)
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.vstack([self._embed_one(t) for t in texts])
+
+    async def aembed(self, texts: list[str]) -> np.ndarray:
+        return self.embed(texts)
+
+
+def embedding_signature(name: str = EMBEDDING_PROVIDER) -> str:
+    """Identifies the vector space of a provider without loading it (used in cassette keys)."""
+    if name == "openai":
+        return f"openai:{OPENAI_EMBEDDING_MODEL}"
+    if name == "sentence_transformers":
+        return f"sentence_transformers:{LOCAL_EMBEDDING_MODEL}:{LOCAL_EMBEDDING_BACKEND}:{LOCAL_EMBEDDING_ONNX_FILE}"
+    if name == "hashing":
+        return f"hashing:{HASHING_EMBEDDING_DIM}"
+    raise ValueError(f"Unknown embedding provider: {name}")
+
+
+@cache
+def get_embedding_provider(name: str = EMBEDDING_PROVIDER) -> EmbeddingProvider:
+    if name == "openai":
+        return OpenAIEmbeddingProvider()
+    if name == "sentence_transformers":
+        return SentenceTransformerEmbeddingProvider()
+    if name == "hashing":
+        return HashingEmbeddingProvider()
+    raise ValueError(f"Unknown embedding provider: {name}")
@@ -0,0 +1,102 @@
+import re
+from dataclasses import dataclass
+
+from infrastructures.serialization import json_codec
+
+# One block per listing image:
+# Group 1: Room Name (e.g., 客廳/餐工作區)
+# Group 2: Raw Tags Content (e.g., 格局方正(長方形空間好擺家具), 採光普通...)
+FEATURE_PATTERN = re.compile(r"(?:^|\n)(?:Image\s*)?\d+\s+([^\n,]+).*?Tags:\s*([^\n]+)", re.IGNORECASE)
+TAG_SEPARATOR = re.compile(r"[、,]+")
+PARENTHESIZED = re.compile(r"\(.*?\)")
+
+
+@dataclass(slots=True)
+class RoomFeature:
+    """One image block of the description: room name, cleaned tags and the tag line as written."""
+    room: str
+    tag_list: list[str]
+    raw_tags: str | None = None
+
+    def to_dict(self) -> dict:
+        return {"room": self.room, "tag_list": self.tag_list, "raw_tags": self.raw_tags}
+
+
+class ParsedListing:
+    """A raw listing description scanned once: free-text prefix plus the per-room features after it."""
+    __slots__ = ("description", "description_prefix", "room_features")
+
+    def __init__(self, description: str, description_prefix: str, room_features: list[RoomFeature]):
+        self.description = description
+        self.description_prefix = description_prefix
+        self.room_features = room_features
+
+    @property
+    def extracted_feature_list(self) -> list[dict]:
+        """Rooms with at least one tag, as stored in the cleaned dataset."""
+        return [f.to_dict() for f in self.room_features if f.tag_list]
+
+    @property
+    def raw_tag_map(self) -> dict[str, str]:
+        """Room name -> raw tag string; a room named twice keeps its last block."""
+        return {f.room: f.raw_tags for f in self.room_features}
+
+    def __repr__(self) -> str:
+        return f"ParsedListing(rooms={len(self.room_features)}, prefix={len(self.description_prefix)} chars)"
+
+
+def split_tags(tags_raw: str) -> list[str]:
+    tag_list = []
+    for t in TAG_SEPARATOR.split(tags_raw):
+        tag_cleaned = PARENTHESIZED.sub("", t).strip()
+        if tag_cleaned:
+            tag_list.append(tag_cleaned)
+    return tag_list
+
+
+def parse_description(description: str | None) -> ParsedListing:
+    description = description or ""
+    room_features = []
+    first_match = None
+
+    for match in FEATURE_PATTERN.finditer(description):
+        if first_match is None:
+            first_match = match
+
+        room_raw = match.group(1).strip()
+        tags_raw = match.group(2).strip()
+        if room_raw and tags_raw:
+            room_features.append(RoomFeature(room_raw, split_tags(tags_raw), tags_raw))
+
+    prefix = description[:first_match.start()] if first_match else description
+    return ParsedListing(description, prefix.strip(), room_features)
+
+
+def parse_listing(data: dict) -> ParsedListing:
+    """Parse a raw crawler document ({"listing": {...}} or the listing itself)."""
+    listing = data.get("listing", data)
+    return parse_description(listing.get("description", ""))
+
+
+def load_parsed_listing(path: str) -> ParsedListing:
+    return parse_listing(json_codec.load_file(path))
+
+
+def attach_raw_descriptions(rematch_data: dict, original_file_path: str) -> bool:
+    """
+    Set `raw_description` on every matched room feature of a rematch output. Features rematched from cleaned data
+    carry their raw tag line already; the raw listing is only parsed for older outputs without it.
+    Returns False when the raw listing is needed but missing.
+    """
+    features = [item.get("extracted_feature", {}) for item in rematch_data.get("matching_result_list", [])]
+    raw_tag_map = {}
+    if any("raw_tags" not in f for f in features):
+        try:
+            raw_tag_map = load_parsed_listing(original_file_path).raw_tag_map
+        except FileNotFoundError:
+            return False
+
+    for feature in features:
+        raw_tags = feature.pop("raw_tags", None)
+        feature["raw_description"] = raw_tags if raw_tags is not None else raw_tag_map.get(feature.get("room"))
+    return True
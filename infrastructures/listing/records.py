@@ -0,0 +1,186 @@
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any
+
+from infrastructures.listing.parser import RoomFeature, parse_description
+from infrastructures.serialization import json_codec
+
+
+def to_float(value: Any) -> float | None:
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace(",", "").strip())
+    except ValueError:
+        return None
+
+
+def to_int(value: Any) -> int | None:
+    number = to_float(value)
+    return None if number is None else int(number)
+
+
+def public_area_ratio(gross_area: float | None, interior_area: float | None) -> float | None:
+    """公設比 (gross - interior) / gross, rounded; None when the areas do not allow it."""
+    if gross_area is None or interior_area is None or gross_area <= 0 or gross_area < interior_area:
+        return None
+    return round((gross_area - interior_area) / gross_area, 4)
+
+
+@dataclass(slots=True)
+class Listing:
+    """
+    A cleaned listing (one file of cleaned_twhg_with_latlng_and_places). Values are coerced to these types once,
+    in `from_raw` while cleaning; `from_dict` rebuilds a record from cleaned output without re-validating.
+    """
+    original_url: str | None
+    property_id: str
+    title: str | None
+    total_price: float | None
+    city: str | None
+    district: str | None
+    street: str | None
+    property_type: str | None
+    property_age: int | None
+    gross_area: float | None
+    interior_area: float | None
+    public_area_ratio: float | None
+    num_bedroom: int | None
+    num_bathroom: float | None
+    num_living_room: int | None
+    transportation: Any
+    orientation: str | None
+    picture_list: list[str]
+    floor: int | None
+    total_floors: int | None
+    land_ownership_area: float | None
+    property_usage: str | None
+    has_elevator: bool | None
+    parking_type: str | None
+    raw_description: str
+    description: str
+    extracted_feature_list: list[RoomFeature] = field(default_factory=list)
+
+    @classmethod
+    def from_raw(cls, data: dict) -> "Listing | None":
+        """Validated record for one raw crawler document; None when it has no listing."""
+        listing = data.get("listing") or {}
+        if not listing:
+            return None
+        raw_description = listing.get("description") or ""
+        parsed = parse_description(raw_description)
+        gross_area, interior_area = to_float(listing.get("gross_area")), to_float(listing.get("interior_area"))
+        has_elevator = listing.get("has_elevator")
+        return cls(
+            original_url=data.get("url"),
+            property_id=str(listing.get("property_id") or "").strip(),
+            title=listing.get("title"),
+            total_price=to_float(listing.get("total_price")),
+            city=listing.get("city"),
+            district=listing.get("district"),
+            street=listing.get("street"),
+            property_type=listing.get("property_type"),
+            property_age=to_int(listing.get("property_age")),
+            gross_area=gross_area,
+            interior_area=interior_area,
+            public_area_ratio=public_area_ratio(gross_area, interior_area),
+            num_bedroom=to_int(listing.get("num_bedroom")),
+            num_bathroom=to_float(listing.get("num_bathroom")),
+            num_living_room=to_int(listing.get("num_living_room")),
+            transportation=listing.get("transportation"),
+            orientation=listing.get("orientation"),
+            picture_list=[str(u).strip() for u in listing.get("picture_list") or [] if str(u).strip()],
+            floor=to_int(listing.get("floor")),
+            total_floors=to_int(listing.get("total_floors")),
+            land_ownership_area=to_float(listing.get("land_ownership_area")),
+            property_usage=listing.get("property_usage"),
+            has_elevator=has_elevator if isinstance(has_elevator, bool) else None,
+            parking_type=listing.get("parking_type"),
+            raw_description=raw_description,
+            description=parsed.description_prefix,
+            # Rooms with at least one tag; each keeps its raw tag line for add_raw_description.py.
+            extracted_feature_list=[f for f in parsed.room_features if f.tag_list],
+        )
+
+    @classmethod
+    def from_dict(cls, doc: dict) -> "Listing":
+        values = {name: doc.get(name) for name in _LISTING_FIELDS}
+        values["picture_list"] = values["picture_list"] or []
+        values["extracted_feature_list"] = [
+            RoomFeature(f["room"], f.get("tag_list") or [], f.get("raw_tags"))
+            for f in doc.get("extracted_feature_list") or []
+        ]
+        return cls(**values)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+_LISTING_FIELDS = tuple(f.name for f in fields(Listing))
+
+
+@dataclass(slots=True)
+class MatchedRoom:
+    """The description block a VLM rematch assigned to an image."""
+    room: str
+    tag_list: list[str]
+    raw_description: str | None = None
+
+
+@dataclass(slots=True)
+class ImageMatchRef:
+    """Points at one item of a rematch file (matching_result_list[index]) instead of copying it."""
+    index: int
+    description_id: str | None
+    matched_image: str | None
+    room: str | None
+
+
+@dataclass(slots=True)
+class ImageMatch:
+    """One item of a rematch output's matching_result_list."""
+    description_id: str | None
+    matched_image: str | None
+    evidence: str | None
+    confidence_score: float | None
+    extracted_feature: MatchedRoom
+
+    @classmethod
+    def from_dict(cls, item: dict) -> "ImageMatch":
+        feature = item.get("extracted_feature") or {}
+        return cls(
+            description_id=item.get("description_id"),
+            matched_image=item.get("matched_image"),
+            evidence=item.get("evidence"),
+            confidence_score=to_float(item.get("confidence_score")),
+            extracted_feature=MatchedRoom(
+                feature.get("room") or "",
+                feature.get("tag_list") or [],
+                feature.get("raw_description", feature.get("raw_tags")),
+            ),
+        )
+
+    def ref(self, index: int) -> ImageMatchRef:
+        return ImageMatchRef(index, self.description_id, self.matched_image, self.extracted_feature.room)
+
+
+def load_image_matches(path: str) -> list[ImageMatch]:
+    return [ImageMatch.from_dict(item) for item in json_codec.load_file(path).get("matching_result_list", [])]
+
+
+@dataclass(slots=True)
+class JudgeResult:
+    """
+    One VLM-as-a-judge verdict. `input_ref` points into the rematch file with the same name; outputs written
+    before it existed embed the whole rematch item as `original_input`, which `from_dict` still reads.
+    """
+    input_ref: ImageMatchRef
+    evaluation: dict
+
+    @classmethod
+    def from_dict(cls, item: dict, index: int = 0) -> "JudgeResult":
+        ref = item.get("input_ref")
+        if ref is not None:
+            return cls(ImageMatchRef(**ref), item.get("evaluation") or {})
+        return cls(ImageMatch.from_dict(item.get("original_input") or {}).ref(index), item.get("evaluation") or {})
@@ -0,0 +1,125 @@
+import hashlib
+import re
+from collections.abc import Iterable, Mapping
+
+# Categories (names as used by the raw_data_analyze reports).
+BATH = "衛(廁所/浴室)"
+PUBLIC_OR_EXTERNAL = "其他(公設/車位/外部/店面)"
+HALL = "廳(客廳/餐廳/廚房)"
+ROOM = "房(書房/臥室/客房)"
+INDOOR_MISC = "其他(玄關/陽台/走道/儲藏)"
+UNCLASSIFIED = "未分類/其他"
+
+CATEGORIES = (HALL, ROOM, BATH, INDOOR_MISC, PUBLIC_OR_EXTERNAL, UNCLASSIFIED)
+
+_PARENTHESIZED = re.compile(r"[\(（].*?[\)）]")
+_ALNUM = re.compile(r"[A-Za-z0-9]")
+_SYMBOLS = re.compile(r"[/\+\-_]")
+
+
+class RoomRule:
+    """Titles containing any of `keywords` (and none of `unless`) belong to `category`."""
+    __slots__ = ("category", "keywords", "unless")
+
+    def __init__(self, category: str, keywords: Iterable[str], unless: Iterable[str] = ()):
+        self.category = category
+        self.keywords = tuple(keywords)
+        self.unless = tuple(unless)
+
+    def __repr__(self) -> str:
+        return f"RoomRule({self.category!r}, {len(self.keywords)} keywords)"
+
+
+# Priority order: the first rule with a keyword in the title decides.
+RULES = (
+    # Bathrooms are the least ambiguous, so they go first.
+    RoomRule(BATH, ["衛", "浴", "廁", "洗手"]),
+    # Shared facilities / outside / shops before halls: "梯廳" and "交誼廳" are not living rooms.
+    RoomRule(PUBLIC_OR_EXTERNAL, [
+        "交誼", "健身", "遊戲", "撞球", "公設",
+        "大廳", "門廳", "梯廳", "櫃台", "信箱", "中庭",
+        "店面", "騎樓", "商", "辦公",
+        "車", "停",
+        "頂樓", "外觀", "大門", "花園", "入口", "外牆",
+        "電箱", "水塔", "機房", "垃圾",
+    ]),
+    # Living / dining / kitchen; "客餐廳玄關" lands here (main function wins).
+    RoomRule(HALL, ["客廳", "客餐廳", "餐廳", "廚", "起居", "餐", "吧", "中島"]),
+    RoomRule(HALL, ["廳"], unless=["梯"]),
+    RoomRule(ROOM, ["臥", "房", "書房", "和室", "孝親", "更衣室"]),
+    # A bare "玄關" / "陽台" / "走道" ends up here.
+    RoomRule(INDOOR_MISC, ["玄關", "鞋櫃", "走廊", "走道", "梯", "通道", "陽台", "露台", "曬衣", "儲藏", "倉", "置物"]),
+)
+
+
+def clean_room_title(title: str | None) -> str:
+    """Drop parenthesized notes, letters/digits and separators: "主臥(2)" -> "主臥"."""
+    if not title:
+        return ""
+    cleaned = _PARENTHESIZED.sub("", title)
+    cleaned = _ALNUM.sub("", cleaned)
+    cleaned = _SYMBOLS.sub("", cleaned)
+    return cleaned.strip()
+
+
+class RoomTaxonomy:
+    """
+    Room title -> category. All keywords are compiled into one alternation, ordered by rule priority, inside a
+    lookahead, so a single scan reports the highest-priority keyword starting at every position and the title's
+    category is the best of those. Results are memoized per raw title; listing titles repeat heavily, so after
+    warm-up classification is a dict lookup. `dictionary` seeds the memo (e.g. from the room_categories table).
+    """
+
+    def __init__(self, rules: tuple[RoomRule, ...] = RULES, dictionary: Mapping[str, str] | None = None):
+        self.rules = rules
+        self._priority: dict[str, int] = {}
+        for priority, rule in enumerate(rules):
+            for keyword in rule.keywords:
+                self._priority.setdefault(keyword, priority)
+        # Alternation order = priority, then longest first, so the lookahead picks the winning keyword.
+        ordered = sorted(self._priority, key=lambda k: (self._priority[k], -len(k)))
+        self._pattern = re.compile("(?=(" + "|".join(map(re.escape, ordered)) + "))")
+        self._cache: dict[str, str] = dict(dictionary or {})
+
+    @property
+    def signature(self) -> str:
+        """Fingerprint of the rules; a stored dictionary is only valid for the rules that produced it."""
+        rules = repr([(rule.category, rule.keywords, rule.unless) for rule in self.rules])
+        return hashlib.sha256(rules.encode("utf-8")).hexdigest()[:16]
+
+    def seed(self, dictionary: Mapping[str, str]):
+        """Add title -> category pairs to the memo, e.g. the room_categories table of a previous build."""
+        self._cache.update(dictionary)
+
+    def resolve(self, cleaned: str) -> str:
+        """Category of an already cleaned title (no memo)."""
+        hits = {self._priority[m] for m in self._pattern.findall(cleaned)}
+        for priority in sorted(hits):
+            rule = self.rules[priority]
+            if not any(u in cleaned for u in rule.unless):
+                return rule.category
+        if any(self.rules[p].unless for p in hits):
+            # A guarded keyword may have shadowed a lower-priority one at the same position; scan rule by rule.
+            for rule in self.rules:
+                if any(k in cleaned for k in rule.keywords) and not any(u in cleaned for u in rule.unless):
+                    return rule.category
+        return UNCLASSIFIED
+
+    def classify(self, title: str | None) -> str:
+        if not title:
+            return UNCLASSIFIED
+        category = self._cache.get(title)
+        if category is None:
+            category = self._cache[title] = self.resolve(clean_room_title(title))
+        return category
+
+    def classify_many(self, titles: Iterable[str | None]) -> list[str]:
+        cache, classify = self._cache, self.classify
+        return [cache.get(t) or classify(t) for t in titles]
+
+    def dictionary(self, titles: Iterable[str | None]) -> dict[str, str]:
+        """title -> category for the distinct non-empty titles."""
+        return {t: self.classify(t) for t in dict.fromkeys(titles) if t}
+
+
+room_taxonomy = RoomTaxonomy()
@@ -0,0 +1,96 @@
+import threading
+import time
+from functools import wraps
+from typing import TYPE_CHECKING, Callable
+
+from pydantic import BaseModel
+
+from config import OPENAI_API_KEY, OPENAI_BASE_URL, OPENAI_LLM_MODEL
+
+if TYPE_CHECKING:
+    # langchain_openai pulls in the whole openai SDK (~1-2 s); it is imported when the first client is built.
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.runnables import Runnable
+    from langchain_openai import ChatOpenAI
+
+
+class ChainRegistry:
+    """
+    Builds every `prompt | llm.with_structured_output(schema)` chain once and hands out the same
+    instance afterwards. Chains are keyed by (factory, model, schema), clients by (model, base_url),
+    so all chains on one model share a single ChatOpenAI and its connection pool.
+    """
+
+    def __init__(self, base_url: str | None = OPENAI_BASE_URL):
+        self.base_url = base_url
+        self._factories: dict[str, tuple[type[BaseModel], Callable[[], "ChatPromptTemplate"]]] = {}
+        self._llms: dict[tuple, "ChatOpenAI"] = {}
+        self._chains: dict[tuple, "Runnable"] = {}
+        self._lock = threading.RLock()
+
+    def register(self, schema: type[BaseModel]):
+        """
+        Decorate a function that returns the chain's prompt template. The decorated name becomes the
+        memoized getter: `get_x_chain(model=OPENAI_LLM_MODEL)` -> prompt | structured llm.
+        """
+        def decorator(build_prompt: Callable[[], "ChatPromptTemplate"]):
+            name = f"{build_prompt.__module__}.{build_prompt.__name__}"
+            self._factories[name] = (schema, build_prompt)
+
+            @wraps(build_prompt)
+            def get_chain(model: str = OPENAI_LLM_MODEL) -> "Runnable":
+                return self.get(name, model)
+
+            return get_chain
+
+        return decorator
+
+    def llm(self, model: str = OPENAI_LLM_MODEL) -> "ChatOpenAI":
+        key = (model, self.base_url)
+        if key not in self._llms:
+            with self._lock:
+                if key not in self._llms:
+                    from langchain_openai import ChatOpenAI
+
+                    self._llms[key] = ChatOpenAI(api_key=OPENAI_API_KEY, base_url=self.base_url, model=model,
+                                                 temperature=0)
+        return self._llms[key]
+
+    def build(self, name: str, model: str = OPENAI_LLM_MODEL) -> "Runnable":
+        """Construct the chain from scratch (prompt template + Pydantic JSON-schema binding); not memoized."""
+        schema, build_prompt = self._factories[name]
+        return build_prompt() | self.llm(model).with_structured_output(schema)
+
+    def get(self, name: str, model: str = OPENAI_LLM_MODEL) -> "Runnable":
+        schema, _ = self._factories[name]
+        key = (name, model, self.base_url, schema)
+        chain = self._chains.get(key)
+        if chain is not None:
+            return chain
+
+        with self._lock:
+            chain = self._chains.get(key)
+            if chain is None:
+                chain = self._chains[key] = self.build(name, model)
+        return chain
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._factories)
+
+    def warm_up(self, model: str = OPENAI_LLM_MODEL) -> dict[str, float]:
+        """Build every registered chain now (at startup) instead of on the first request. Returns ms per chain."""
+        timings = {}
+        for name in list(self._factories):
+            start = time.perf_counter()
+            self.get(name, model)
+            timings[name] = (time.perf_counter() - start) * 1000
+        return timings
+
+    def clear(self):
+        with self._lock:
+            self._llms.clear()
+            self._chains.clear()
+
+
+chain_registry = ChainRegistry()
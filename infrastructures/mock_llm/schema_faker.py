@@ -0,0 +1,95 @@
+import random
+
+# Nullable fields (Optional[...] in pydantic, `nullable` in Gemini schemas) come back null this often,
+# so faked intents look like real ones: a few hard filters, not all of them.
+NULL_PROBABILITY = 0.7
+DEFAULT_ARRAY_ITEMS = (1, 4)
+WORDS = ("採光", "景觀", "格局方正", "近捷運", "車位", "安靜", "邊間", "高樓層", "學區", "電梯", "陽台", "收納")
+
+
+def _resolve(schema: dict, root: dict) -> dict:
+    while "$ref" in schema:
+        ref = schema["$ref"]
+        node = root
+        for part in ref.lstrip("#/").split("/"):
+            node = node[part]
+        schema = {**node, **{k: v for k, v in schema.items() if k != "$ref"}}
+    if "allOf" in schema and len(schema["allOf"]) == 1:
+        schema = {**_resolve(schema["allOf"][0], root), **{k: v for k, v in schema.items() if k != "allOf"}}
+    return schema
+
+
+def _type(schema: dict) -> str | None:
+    t = schema.get("type")
+    if isinstance(t, list):
+        t = next((x for x in t if str(x).lower() != "null"), None)
+    return str(t).lower() if t else None
+
+
+def _is_nullable(schema: dict) -> bool:
+    t = schema.get("type")
+    return bool(schema.get("nullable")) or (isinstance(t, list) and "null" in t)
+
+
+def _fake_string(schema: dict, rng: random.Random) -> str:
+    if schema.get("enum"):
+        return str(rng.choice(schema["enum"]))
+    min_len = schema.get("minLength", schema.get("min_length", 0)) or 0
+    max_len = schema.get("maxLength", schema.get("max_length"))
+    text = "、".join(rng.sample(WORDS, k=rng.randint(1, 3)))
+    while len(text) < int(min_len):
+        text += "，" + rng.choice(WORDS)
+    return text[:int(max_len)] if max_len else text
+
+
+def _fake_number(schema: dict, rng: random.Random, integer: bool):
+    lo = schema.get("minimum", schema.get("exclusiveMinimum"))
+    hi = schema.get("maximum", schema.get("exclusiveMaximum"))
+    lo = float(lo) if lo is not None else 0.0
+    hi = float(hi) if hi is not None else max(lo, 0.0) + 100.0
+    if "exclusiveMinimum" in schema and "minimum" not in schema:
+        lo += 1 if integer else 1e-6
+    if "exclusiveMaximum" in schema and "maximum" not in schema:
+        hi -= 1 if integer else 1e-6
+    if schema.get("enum"):
+        return rng.choice(schema["enum"])
+    return rng.randint(int(lo), int(hi)) if integer else round(rng.uniform(lo, hi), 3)
+
+
+def fake_value(schema: dict, rng: random.Random, root: dict | None = None):
+    """
+    A value that validates against `schema`, drawn from `rng`. Understands the JSON Schema emitted by
+    pydantic (`$ref`/`$defs`, `anyOf` with null, enums, numeric and length bounds) and Gemini's
+    OpenAPI-style `Schema` (upper-case types, `nullable`).
+    """
+    root = root if root is not None else schema
+    schema = _resolve(schema, root)
+
+    variants = schema.get("anyOf") or schema.get("oneOf")
+    if variants:
+        non_null = [v for v in variants if _type(_resolve(v, root)) != "null"]
+        if len(non_null) < len(variants) and (not non_null or rng.random() < NULL_PROBABILITY):
+            return None
+        return fake_value(rng.choice(non_null), rng, root)
+
+    if _is_nullable(schema) and rng.random() < NULL_PROBABILITY:
+        return None
+    if "const" in schema:
+        return schema["const"]
+
+    t = _type(schema) or ("object" if "properties" in schema else "string")
+    if t == "object":
+        return {key: fake_value(sub, rng, root) for key, sub in schema.get("properties", {}).items()}
+    if t == "array":
+        lo = schema.get("minItems", schema.get("min_items", DEFAULT_ARRAY_ITEMS[0]))
+        hi = schema.get("maxItems", schema.get("max_items", max(int(lo), DEFAULT_ARRAY_ITEMS[1])))
+        return [fake_value(schema.get("items", {}), rng, root) for _ in range(rng.randint(int(lo), int(hi)))]
+    if t == "integer":
+        return _fake_number(schema, rng, integer=True)
+    if t == "number":
+        return _fake_number(schema, rng, integer=False)
+    if t == "boolean":
+        return rng.random() < 0.5
+    if t == "null":
+        return None
+    return _fake_string(schema, rng)
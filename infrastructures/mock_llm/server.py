@@ -0,0 +1,287 @@
+import base64
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from infrastructures.embedding.provider import HashingEmbeddingProvider
+from infrastructures.mock_llm.schema_faker import fake_value
+
+EMBEDDING_DIMS = {"text-embedding-3-small": 1536, "text-embedding-3-large": 3072, "text-embedding-ada-002": 1536}
+GEMINI_PATH = re.compile(r"^/(?:v1beta|v1)/models/(?P<model>[^:/]+):(?P<method>generateContent|streamGenerateContent)$")
+
+
+@dataclass
+class LatencyModel:
+    """
+    Per-request delay in milliseconds: "fixed:200", "uniform:50:400" or "lognormal:300:0.5"
+    (median ms, sigma) - the long right tail is what real LLM endpoints look like.
+    """
+    kind: str = "fixed"
+    params: tuple[float, ...] = (0.0,)
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        kind, *params = spec.split(":")
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2}
+        if kind not in expected or len(params) != expected[kind]:
+            raise ValueError(f"Bad latency spec {spec!r}; use fixed:MS, uniform:LO:HI or lognormal:MEDIAN:SIGMA")
+        return cls(kind, tuple(float(p) for p in params))
+
+    def sample_ms(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        median, sigma = self.params
+        return median * float(np.exp(rng.gauss(0.0, sigma)))
+
+
+@dataclass
+class MockConfig:
+    chat_latency: LatencyModel = field(default_factory=lambda: LatencyModel.parse("lognormal:400:0.5"))
+    embedding_latency: LatencyModel = field(default_factory=lambda: LatencyModel.parse("lognormal:60:0.3"))
+    gemini_latency: LatencyModel = field(default_factory=lambda: LatencyModel.parse("lognormal:1500:0.5"))
+    error_rate: float = 0.0       # fraction of requests answered with a 500
+    rate_limit_rate: float = 0.0  # fraction of requests answered with a 429
+    rpm: int = 0                  # requests per minute before 429s (0 = unlimited)
+    retry_after_seconds: float = 1.0
+    seed: int = 0
+
+
+class MockStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts: dict[str, int] = {}
+
+    def incr(self, key: str):
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+
+class _RpmWindow:
+    """Sliding one-minute window of request timestamps."""
+
+    def __init__(self, rpm: int):
+        self.rpm = rpm
+        self._lock = threading.Lock()
+        self._stamps: list[float] = []
+
+    def allow(self) -> bool:
+        if self.rpm <= 0:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            self._stamps = [t for t in self._stamps if now - t < 60]
+            if len(self._stamps) >= self.rpm:
+                return False
+            self._stamps.append(now)
+            return True
+
+
+def _seed_for(body: dict, salt: int) -> int:
+    canonical = json.dumps(body, sort_keys=True, ensure_ascii=False)
+    return int.from_bytes(hashlib.sha256(f"{salt}:{canonical}".encode("utf-8")).digest()[:8], "little")
+
+
+def openai_chat_completion(body: dict, rng: random.Random) -> dict:
+    """Structured output via response_format=json_schema or a forced tool call; plain text otherwise."""
+    model = body.get("model", "mock")
+    message: dict = {"role": "assistant", "content": None}
+    finish_reason = "stop"
+
+    response_format = body.get("response_format") or {}
+    tools = body.get("tools") or []
+    if response_format.get("type") == "json_schema":
+        schema = response_format["json_schema"].get("schema", {})
+        message["content"] = json.dumps(fake_value(schema, rng), ensure_ascii=False)
+    elif response_format.get("type") == "json_object":
+        message["content"] = "{}"
+    elif tools:
+        choice = body.get("tool_choice")
+        name = choice["function"]["name"] if isinstance(choice, dict) else tools[0]["function"]["name"]
+        tool = next(t for t in tools if t["function"]["name"] == name)
+        arguments = fake_value(tool["function"].get("parameters", {}), rng)
+        message["tool_calls"] = [{
+            "id": f"call_{rng.getrandbits(48):012x}",
+            "type": "function",
+            "function": {"name": name, "arguments": json.dumps(arguments, ensure_ascii=False)},
+        }]
+        finish_reason = "tool_calls"
+    else:
+        message["content"] = "mock response"
+
+    return {
+        "id": f"chatcmpl-mock-{rng.getrandbits(48):012x}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason, "logprobs": None}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def openai_embeddings(body: dict) -> dict:
+    """Deterministic hashing vectors; the same text always embeds the same way."""
+    texts = body.get("input", [])
+    texts = [texts] if isinstance(texts, str) else list(texts)
+    model = body.get("model", "text-embedding-3-small")
+    dim = int(body.get("dimensions") or EMBEDDING_DIMS.get(model, 1536))
+    vectors = HashingEmbeddingProvider(dim=dim).embed([str(t) for t in texts])
+
+    base64_out = body.get("encoding_format") == "base64"
+    data = [
+        {
+            "object": "embedding",
+            "index": i,
+            "embedding": base64.b64encode(v.astype(np.float32).tobytes()).decode("ascii") if base64_out else v.tolist(),
+        }
+        for i, v in enumerate(vectors)
+    ]
+    return {"object": "list", "data": data, "model": model, "usage": {"prompt_tokens": 0, "total_tokens": 0}}
+
+
+def gemini_generate_content(model: str, body: dict, rng: random.Random) -> dict:
+    config = body.get("generationConfig") or body.get("generation_config") or {}
+    schema = config.get("responseJsonSchema") or config.get("responseSchema") or config.get("response_schema")
+    if schema:
+        text = json.dumps(fake_value(schema, rng), ensure_ascii=False)
+    elif config.get("responseMimeType") == "application/json":
+        text = "{}"
+    else:
+        text = "mock response"
+
+    return {
+        "candidates": [{
+            "content": {"role": "model", "parts": [{"text": text}]},
+            "finishReason": "STOP",
+            "index": 0,
+        }],
+        "usageMetadata": {"promptTokenCount": 0, "candidatesTokenCount": 0, "totalTokenCount": 0},
+        "modelVersion": model,
+    }
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY each response waits on a delayed ACK (~40 ms).
+    disable_nagle_algorithm = True
+    server: "MockLLMServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers: dict | None = None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status: int, gemini: bool):
+        cfg = self.server.config
+        if gemini:
+            reason = "RESOURCE_EXHAUSTED" if status == 429 else "INTERNAL"
+            payload = {"error": {"code": status, "message": f"mock {reason.lower()}", "status": reason}}
+        else:
+            kind = "rate_limit_exceeded" if status == 429 else "server_error"
+            payload = {"error": {"message": f"mock {kind}", "type": kind, "param": None, "code": kind}}
+        headers = {"Retry-After": f"{cfg.retry_after_seconds:g}"} if status == 429 else None
+        self._send_json(status, payload, headers)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            self._send_json(200, self.server.stats.snapshot())
+        else:
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        path = self.path.split("?", 1)[0]
+        if path.startswith("/v1/") and not GEMINI_PATH.match(path):
+            path = path[len("/v1"):]
+
+        gemini_match = GEMINI_PATH.match(path)
+        if path == "/chat/completions":
+            endpoint, latency = "chat", self.server.config.chat_latency
+        elif path == "/embeddings":
+            endpoint, latency = "embeddings", self.server.config.embedding_latency
+        elif gemini_match:
+            endpoint, latency = "gemini", self.server.config.gemini_latency
+        else:
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+
+        stats = self.server.stats
+        stats.incr(f"{endpoint}.requests")
+        cfg = self.server.config
+        # Fault injection draws from a shared stream (varies per request); outputs are seeded by the body.
+        fault = self.server.next_random()
+
+        if not self.server.rpm_window.allow() or fault < cfg.rate_limit_rate:
+            stats.incr(f"{endpoint}.429")
+            self._send_error(429, gemini=bool(gemini_match))
+            return
+
+        rng = random.Random(_seed_for(body, cfg.seed))
+        time.sleep(latency.sample_ms(random.Random(self.server.next_random())) / 1000)
+
+        if fault < cfg.rate_limit_rate + cfg.error_rate:
+            stats.incr(f"{endpoint}.500")
+            self._send_error(500, gemini=bool(gemini_match))
+            return
+
+        if endpoint == "chat":
+            payload = openai_chat_completion(body, rng)
+        elif endpoint == "embeddings":
+            payload = openai_embeddings(body)
+        else:
+            payload = gemini_generate_content(gemini_match["model"], body, rng)
+        stats.incr(f"{endpoint}.200")
+        self._send_json(200, payload)
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the OpenAI (`/v1/chat/completions`, `/v1/embeddings`) and Gemini
+    (`/v1beta/models/{model}:generateContent`) APIs. Point OPENAI_BASE_URL at `http://host:port/v1`
+    and GEMINI_BASE_URL at `http://host:port`. `GET /stats` returns per-endpoint status counts.
+    """
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address: tuple[str, int], config: MockConfig | None = None):
+        super().__init__(address, MockLLMHandler)
+        self.config = config or MockConfig()
+        self.stats = MockStats()
+        self.rpm_window = _RpmWindow(self.config.rpm)
+        self._rng = random.Random(self.config.seed)
+        self._rng_lock = threading.Lock()
+
+    def next_random(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+    def start_in_thread(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
@@ -0,0 +1,148 @@
+import numpy as np
+
+from infrastructures.embedding.provider import embedding_signature
+from infrastructures.neo4j.catalog_version import get_catalog_version
+from infrastructures.neo4j.client import neo4j_client
+
+# Same node order as FILTER_CYPHER's unordered scan, so LIMIT picks the same candidates locally.
+EXPORT_SNAPSHOT_CYPHER = """
+MATCH (p:Property)
+RETURN
+  p.property_id AS property_id,
+  p.title AS title,
+  p.total_price AS total_price,
+  p.city AS city,
+  p.district AS district,
+  p.street AS street,
+  p.interior_area AS interior_area,
+  p.num_bedroom AS num_bedroom,
+  p.num_bathroom AS num_bathroom,
+  p.property_type AS property_type,
+  p.property_age AS property_age,
+  CASE WHEN p.embedding_signature = $signature THEN p.text_embedding ELSE null END AS embedding,
+  CASE WHEN p.room_embedding_signature = $signature THEN p.room_embeddings ELSE null END AS room_embeddings,
+  head([(p)-[:LOCATED_ON]->(s:Street) | s.key]) AS street_key
+"""
+
+STRING_COLUMNS = ("property_id", "title", "city", "district", "street", "property_type", "street_key")
+NUMERIC_COLUMNS = ("total_price", "interior_area", "num_bedroom", "num_bathroom", "property_age")
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    return matrix / (np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12)
+
+
+class CatalogSnapshot:
+    """
+    Columnar, in-memory copy of the Property catalog for offline retriever experiments.
+
+    `filter()` mirrors FILTER_CYPHER (NULL properties never match a set filter) and `scores()`
+    mirrors max_sim_scores over the listing vector plus per-room vectors. Missing strings are ""
+    and missing numbers NaN. Room vectors are stored CSR-style: rows
+    `room_offsets[i]:room_offsets[i + 1]` of `rooms` belong to property i.
+    """
+
+    def __init__(self, columns: dict[str, np.ndarray], listing: np.ndarray, has_embedding: np.ndarray,
+                 rooms: np.ndarray, room_offsets: np.ndarray, catalog_version: int = 0):
+        self.columns = columns
+        self.listing = listing
+        self.has_embedding = has_embedding
+        self.rooms = rooms
+        self.room_offsets = room_offsets
+        self.catalog_version = catalog_version
+
+    def __len__(self) -> int:
+        return len(self.has_embedding)
+
+    @classmethod
+    def from_rows(cls, rows: list[dict], catalog_version: int = 0) -> "CatalogSnapshot":
+        columns = {c: np.array([r.get(c) or "" for r in rows], dtype=str) for c in STRING_COLUMNS}
+        for c in NUMERIC_COLUMNS:
+            columns[c] = np.array([np.nan if r.get(c) is None else r[c] for r in rows], dtype=np.float64)
+
+        dim = next((len(r["embedding"]) for r in rows if r.get("embedding")), 0)
+        listing = np.zeros((len(rows), dim), dtype=np.float32)
+        has_embedding = np.zeros(len(rows), dtype=bool)
+        room_blocks, room_offsets = [], [0]
+        for i, r in enumerate(rows):
+            if r.get("embedding"):
+                listing[i] = r["embedding"]
+                has_embedding[i] = True
+            room_emb = r.get("room_embeddings") or []
+            block = np.asarray(room_emb, dtype=np.float32).reshape(-1, dim)
+            room_blocks.append(block)
+            room_offsets.append(room_offsets[-1] + len(block))
+
+        rooms = np.vstack(room_blocks) if room_offsets[-1] else np.empty((0, dim), dtype=np.float32)
+        return cls(columns, _normalize(listing), has_embedding, _normalize(rooms),
+                   np.asarray(room_offsets, dtype=np.int64), catalog_version)
+
+    @classmethod
+    async def from_neo4j(cls) -> "CatalogSnapshot":
+        version = await get_catalog_version(max_age=0)
+        rows = await neo4j_client.query(EXPORT_SNAPSHOT_CYPHER, signature=embedding_signature())
+        return cls.from_rows(rows, catalog_version=version)
+
+    def save(self, path: str):
+        np.savez(
+            path,
+            listing=self.listing,
+            has_embedding=self.has_embedding,
+            rooms=self.rooms,
+            room_offsets=self.room_offsets,
+            catalog_version=np.int64(self.catalog_version),
+            **{f"col_{c}": v for c, v in self.columns.items()},
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "CatalogSnapshot":
+        with np.load(path) as data:
+            columns = {k[len("col_"):]: data[k] for k in data.files if k.startswith("col_")}
+            return cls(columns, data["listing"], data["has_embedding"], data["rooms"], data["room_offsets"],
+                       int(data["catalog_version"]))
+
+    def filter(self, cypher_variables: dict, limit: int) -> np.ndarray:
+        """Indices FILTER_CYPHER would return for these parameters, minus rows without an embedding."""
+        c = self.columns
+        v = cypher_variables
+        mask = np.ones(len(self), dtype=bool)
+        for name in ("city", "district", "property_type"):
+            if v.get(name) is not None:
+                mask &= c[name] == v[name]
+        if v.get("street") is not None:
+            mask &= (c["street"] != "") & (np.char.find(c["street"], v["street"]) >= 0)
+        # NaN compares False, which matches Cypher's NULL semantics inside WHERE.
+        bounds = (
+            ("min_price", "total_price", np.greater_equal),
+            ("max_price", "total_price", np.less_equal),
+            ("min_interior_area", "interior_area", np.greater_equal),
+            ("min_bedroom", "num_bedroom", np.greater_equal),
+            ("min_bathroom", "num_bathroom", np.greater_equal),
+            ("min_age", "property_age", np.greater_equal),
+            ("max_age", "property_age", np.less_equal),
+        )
+        for param, column, op in bounds:
+            if v.get(param) is not None:
+                mask &= op(c[column], v[param])
+
+        idx = np.flatnonzero(mask)[:limit]
+        return idx[self.has_embedding[idx]]
+
+    def scores(self, q_emb: np.ndarray, idx: np.ndarray, multi_vector: bool) -> np.ndarray:
+        """Cosine of the query to each property in `idx`, maxed over its room vectors when multi_vector."""
+        q_norm = q_emb / (np.linalg.norm(q_emb) + 1e-12)
+        scores = self.listing[idx] @ q_norm
+        if not multi_vector or not len(self.rooms):
+            return scores
+
+        starts = self.room_offsets[idx]
+        counts = self.room_offsets[idx + 1] - starts
+        total = int(counts.sum())
+        if total == 0:
+            return scores
+        # Gather every room row of the selected properties without a Python loop.
+        first = np.cumsum(counts) - counts
+        rows = np.repeat(starts - first, counts) + np.arange(total)
+        owners = np.repeat(np.arange(len(idx)), counts)
+        np.maximum.at(scores, owners, self.rooms[rows] @ q_norm)
+        return scores
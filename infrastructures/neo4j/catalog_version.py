@@ -0,0 +1,44 @@
+import time
+
+from config import CATALOG_VERSION_POLL_SECONDS
+from infrastructures.neo4j.client import neo4j_client
+
+# A single counter node; every writer (importer, embedding backfill) bumps it after it commits,
+# so readers can tell whether anything derived from the catalog is stale.
+GET_CATALOG_VERSION = """
+MATCH (v:CatalogVersion {name: 'catalog'})
+RETURN v.version AS version
+"""
+
+BUMP_CATALOG_VERSION = """
+MERGE (v:CatalogVersion {name: 'catalog'})
+SET v.version = coalesce(v.version, 0) + 1,
+    v.updated_at = datetime()
+RETURN v.version AS version
+"""
+
+_last_version: int | None = None
+_last_checked_at = 0.0
+
+
+def bump_catalog_version(session) -> int:
+    """Bump the catalog version from a sync (script) session. Returns the new version."""
+    rec = session.run(BUMP_CATALOG_VERSION).single()
+    return rec["version"]
+
+
+async def get_catalog_version(max_age: float = CATALOG_VERSION_POLL_SECONDS) -> int:
+    """
+    Current catalog version, re-read from Neo4j at most once every `max_age` seconds.
+    Returns 0 for a catalog that has never been bumped.
+    """
+    global _last_version, _last_checked_at
+
+    now = time.monotonic()
+    if _last_version is not None and now - _last_checked_at < max_age:
+        return _last_version
+
+    rows = await neo4j_client.query(GET_CATALOG_VERSION)
+    _last_version = (rows[0]["version"] if rows else None) or 0
+    _last_checked_at = now
+    return _last_version
@@ -1,5 +1,6 @@
 from neo4j import AsyncGraphDatabase
 from config import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD
+from infrastructures.concurrency.limiter import get_limiter
 
 class Neo4jClient:
     def __init__(self):
@@ -17,8 +18,9 @@ class Neo4jClient:
             self._driver = None
 
     async def query(self, cypher: str, **parameters):
-        async with self.driver.session() as session:
-            result = await session.run(cypher, **parameters)
-            return [record.data() async for record in result]
+        async with get_limiter("neo4j").slot():
+            async with self.driver.session() as session:
+                result = await session.run(cypher, **parameters)
+                return [record.data() async for record in result]
 
 neo4j_client = Neo4jClient()
\ No newline at end of file
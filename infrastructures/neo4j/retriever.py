@@ -1,12 +1,31 @@
 import asyncio
+import hashlib
+import json
+import time
+
 import numpy as np
-from openai import AsyncOpenAI
 
-from config import OPENAI_API_KEY, OPENAI_EMBEDDING_MODEL
+from config import (
+    MMR_CANDIDATE_POOL,
+    MMR_LAMBDA,
+    MMR_STREET_CAP,
+    MULTI_VECTOR_SCORING,
+    RERANK_LATENCY_BUDGET_MS,
+    RERANK_SHORTLIST_SIZE,
+    RESPONSE_CACHE_SIZE,
+    RESPONSE_CACHE_TTL_SECONDS,
+)
+from infrastructures.cache.lru_cache import LRUCache
+from infrastructures.cassette.store import decode_vector, encode_vector, get_cassette
+from infrastructures.concurrency.limiter import get_limiter
+from infrastructures.embedding.provider import embedding_signature, get_embedding_provider
 from services.property_search_recommendation.models import CypherVariables, RealEstateQuery
+from services.property_search_recommendation.reranker import Reranker, build_document, rerank
+from infrastructures.neo4j.catalog_version import get_catalog_version
 from infrastructures.neo4j.client import neo4j_client
 
-client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+response_cache = LRUCache(maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL_SECONDS)
+_response_cache_version: int | None = None
 
 FILTER_CYPHER = """
 MATCH (p:Property)
@@ -27,14 +46,34 @@ RETURN
   p.property_id AS property_id,
   p.title AS title,
   p.total_price AS total_price,
-  p.text_embedding AS embedding
+  // Vectors from another embedding space (EMBEDDING_PROVIDER switched, backfill pending) are not comparable to
+  // the query; the property is skipped like one without an embedding.
+  CASE WHEN p.embedding_signature = $signature THEN p.text_embedding ELSE null END AS embedding,
+  CASE WHEN $multi_vector AND p.room_embedding_signature = $signature THEN p.room_embeddings ELSE null END
+    AS room_embeddings,
+  // One row per property even if it is LOCATED_ON several streets; only MMR's street cap needs it.
+  CASE WHEN $diversify THEN head([(p)-[:LOCATED_ON]->(s:Street) | s.key]) ELSE null END AS street_key
 LIMIT $limit;
 """
 
+RERANK_DOCUMENT_CYPHER = """
+UNWIND $property_ids AS pid
+MATCH (p:Property {property_id: pid})
+RETURN
+  p.property_id AS property_id,
+  p.title AS title,
+  coalesce(p.description, '') + '\n' + coalesce(p.raw_description, '') AS text
+"""
+
 
 async def embed(text: str):
-    resp = await client.embeddings.create(model=OPENAI_EMBEDDING_MODEL, input=[text])
-    return np.array(resp.data[0].embedding, dtype=np.float32)
+    async def call():
+        async with get_limiter("embedding").slot():
+            vectors = await get_embedding_provider().aembed([text])
+        return vectors[0]
+
+    request = {"embedding": embedding_signature(), "text": text}
+    return await get_cassette("embedding").call(request, call, encode=encode_vector, decode=decode_vector)
 
 
 def cosine_sim(a: np.ndarray, b: np.ndarray) -> float:
@@ -44,35 +83,239 @@ def cosine_sim(a: np.ndarray, b: np.ndarray) -> float:
     return float(np.dot(a_norm, b_norm))
 
 
+def pack_multi_vectors(rows: list[dict], multi_vector: bool) -> tuple[list[dict], np.ndarray, np.ndarray]:
+    """
+    Pack every property's vectors (listing vector first, then one per room) into a single
+    row-normalized ragged matrix. `offsets[i]` is the first row that belongs to `kept_rows[i]`.
+    Rows without a listing embedding are dropped.
+    """
+    kept_rows, blocks, offsets = [], [], []
+    n_vectors = 0
+    for r in rows:
+        emb = r.get("embedding")
+        if not emb:
+            continue
+        block = np.asarray(emb, dtype=np.float32)[None, :]
+
+        room_emb = r.get("room_embeddings") if multi_vector else None
+        if room_emb:
+            # Stored flattened on the node (Neo4j has no list-of-lists properties).
+            block = np.vstack([block, np.asarray(room_emb, dtype=np.float32).reshape(-1, block.shape[1])])
+
+        kept_rows.append(r)
+        blocks.append(block)
+        offsets.append(n_vectors)
+        n_vectors += block.shape[0]
+
+    if not blocks:
+        return [], np.empty((0, 0), dtype=np.float32), np.empty(0, dtype=np.int64)
+
+    matrix = np.vstack(blocks)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+    return kept_rows, matrix, np.asarray(offsets, dtype=np.int64)
+
+
+def max_sim_scores(q_emb: np.ndarray, matrix: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Cosine of the query against every packed vector, reduced to the max per property."""
+    q_norm = q_emb / (np.linalg.norm(q_emb) + 1e-12)
+    sims = matrix @ q_norm
+    # Every segment is non-empty (it always holds the listing vector), so reduceat is safe.
+    return np.maximum.reduceat(sims, offsets)
+
+
+def mmr_select(relevance: np.ndarray, vectors: np.ndarray, k: int, mmr_lambda: float = MMR_LAMBDA,
+               groups: list | None = None, group_cap: int = 0, candidate_pool: int = MMR_CANDIDATE_POOL) -> list[int]:
+    """
+    Maximal Marginal Relevance: greedily pick `k` indices maximizing
+    `mmr_lambda * relevance - (1 - mmr_lambda) * max cosine to already-picked`.
+    `vectors` must be row-normalized. With `group_cap`, at most that many picks share a `groups`
+    key (e.g. Street key); if the cap starves the list, the rest is filled by relevance.
+
+    Only the `candidate_pool` most relevant candidates compete (0 = all), so the cost is k matvecs
+    over at most candidate_pool rows whatever the graph limit. Picked and capped candidates get a
+    -inf weighted relevance, and every pick runs in place on preallocated float32 buffers.
+    """
+    relevance = np.asarray(relevance, dtype=np.float32)
+    n = len(relevance)
+    k = min(k, n)
+    if k == 0:
+        return []
+
+    candidates = np.arange(n)
+    if candidate_pool and n > max(candidate_pool, k):
+        candidates = np.argpartition(-relevance, candidate_pool - 1)[:candidate_pool]
+    pool = vectors[candidates] if len(candidates) < n else vectors
+
+    group_ids = None
+    group_counts: dict = {}
+    if groups is not None and group_cap:
+        codes: dict = {}
+        group_ids = np.fromiter((codes.setdefault(groups[i], len(codes)) for i in candidates.tolist()),
+                                dtype=np.int64, count=len(candidates))
+
+    weighted = (mmr_lambda * relevance[candidates]).astype(np.float32)
+    penalty = np.float32(1 - mmr_lambda)
+    max_sim = np.full(len(candidates), -np.inf, dtype=np.float32)
+    sims = np.empty_like(max_sim)
+    scores = np.empty_like(max_sim)
+
+    selected = []
+    j = int(np.argmax(weighted))
+    while True:
+        selected.append(j)
+        weighted[j] = -np.inf
+        if group_ids is not None:
+            g = group_ids[j]
+            group_counts[g] = group_counts.get(g, 0) + 1
+            if group_counts[g] >= group_cap:
+                weighted[group_ids == g] = -np.inf
+        if len(selected) == k:
+            break
+
+        np.dot(pool, pool[j], out=sims)
+        np.maximum(max_sim, sims, out=max_sim)
+        np.multiply(max_sim, penalty, out=scores)
+        np.subtract(weighted, scores, out=scores)
+        j = int(np.argmax(scores))
+        if scores[j] == -np.inf:
+            break
+
+    selected = candidates[selected].tolist()
+    if len(selected) < k:
+        taken = set(selected)
+        selected.extend(int(i) for i in np.argsort(-relevance) if int(i) not in taken)
+    return selected[:k]
+
+
 def build_query_text(abstract_requirements: list[str]) -> str:
     # You can enrich this string
     return "需求：" + "；".join([x.strip() for x in abstract_requirements if x.strip()])
 
 
-async def hybrid_search(query: RealEstateQuery, graph_limit=200, topk=10):
+def query_cache_key(query: RealEstateQuery, **params) -> str:
+    """Canonical hash of the query model plus every search parameter that affects the ranking."""
+    payload = {"query": query.model_dump(mode="json"), **params}
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+async def hybrid_search(query: RealEstateQuery, graph_limit=200, topk=10, reranker: Reranker | None = None,
+                        rerank_shortlist=RERANK_SHORTLIST_SIZE, rerank_budget_ms=RERANK_LATENCY_BUDGET_MS,
+                        multi_vector=MULTI_VECTOR_SCORING, diversify=False, mmr_lambda=MMR_LAMBDA,
+                        street_cap=MMR_STREET_CAP, use_cache=True, timings: dict | None = None):
+    """
+    Graph filter -> embedding similarity (optionally MMR) -> optional rerank.
+    Pass a dict as `timings` to receive per-stage wall-clock seconds
+    (graph_filter, embedding, ranking, rerank); cache hits record no stages.
+    """
+    global _response_cache_version
+
+    search_params = dict(
+        graph_limit=graph_limit,
+        topk=topk,
+        reranker=reranker,
+        rerank_shortlist=rerank_shortlist,
+        rerank_budget_ms=rerank_budget_ms,
+        multi_vector=multi_vector,
+        diversify=diversify,
+        mmr_lambda=mmr_lambda,
+        street_cap=street_cap,
+        timings=timings if timings is not None else {},
+    )
+    if not use_cache:
+        return await _hybrid_search(query, **search_params)
+
+    # Any write to the catalog bumps its version; drop everything computed against an older one.
+    version = await get_catalog_version()
+    if version != _response_cache_version:
+        response_cache.clear()
+        _response_cache_version = version
+
+    key = query_cache_key(
+        query,
+        graph_limit=graph_limit,
+        topk=topk,
+        reranker=reranker.name if reranker else None,
+        rerank_shortlist=rerank_shortlist if reranker else None,
+        multi_vector=multi_vector,
+        diversify=diversify,
+        mmr_lambda=mmr_lambda if diversify else None,
+        street_cap=street_cap if diversify else None,
+    )
+    cached = response_cache.get(key)
+    if cached is not None:
+        return [dict(x) for x in cached]
+
+    results = await _hybrid_search(query, **search_params)
+
+    # A rerank that fell back to cosine order is a degraded answer; let the next call retry it.
+    if reranker is None or all("rerank_score" in x for x in results[:rerank_shortlist]):
+        response_cache.set(key, [dict(x) for x in results])
+    return results
+
+
+async def _hybrid_search(query: RealEstateQuery, graph_limit, topk, reranker, rerank_shortlist, rerank_budget_ms,
+                         multi_vector, diversify, mmr_lambda, street_cap, timings):
     # 1) Graph filter
-    rows = await neo4j_client.query(FILTER_CYPHER, **query.cypher_variables.model_dump(), limit=graph_limit)
+    start = time.perf_counter()
+    rows = await neo4j_client.query(FILTER_CYPHER, **query.cypher_variables.model_dump(), limit=graph_limit,
+                                    multi_vector=multi_vector, diversify=diversify, signature=embedding_signature())
+    timings["graph_filter"] = time.perf_counter() - start
 
     if not rows:
         return []
 
-    # 2) Embedding rerank
+    # 2) Embedding rerank (max-sim over listing + room vectors when multi_vector is on)
+    start = time.perf_counter()
     q_text = build_query_text(query.abstract_requirements)
     q_emb = await embed(q_text)
+    timings["embedding"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    kept_rows, matrix, offsets = pack_multi_vectors(rows, multi_vector)
+    if not kept_rows:
+        return []
+    scores = max_sim_scores(q_emb, matrix, offsets)
 
     scored = []
-    for r in rows:
-        emb = r.get("embedding")
-        if not emb:
-            continue
-        p_emb = np.array(emb, dtype=np.float32)
-        score = cosine_sim(q_emb, p_emb)
+    for r, score in zip(kept_rows, scores):
         scored.append({
             "property_id": r["property_id"],
             "title": r["title"],
             "total_price": r["total_price"],
-            "score": score,
+            "score": float(score),
         })
 
-    scored.sort(key=lambda x: x["score"], reverse=True)
-    return scored[:topk]
+    n_keep = max(rerank_shortlist, topk) if reranker is not None else topk
+    if diversify:
+        # Redundancy is measured on the listing vectors (first packed row of each property).
+        order = mmr_select(
+            scores,
+            matrix[offsets],
+            n_keep,
+            mmr_lambda=mmr_lambda,
+            groups=[r.get("street_key") or r["property_id"] for r in kept_rows],
+            group_cap=street_cap,
+        )
+        scored = [scored[i] for i in order]
+    else:
+        scored.sort(key=lambda x: x["score"], reverse=True)
+    timings["ranking"] = time.perf_counter() - start
+
+    if reranker is None:
+        return scored[:topk]
+
+    # 3) Rerank a bounded shortlist. A topk deeper than the shortlist (e.g. recall@50 in the evaluation) is filled
+    # with the following candidates in their cosine/MMR order, so every topk reranks exactly what production does.
+    start = time.perf_counter()
+    shortlist, tail = scored[:rerank_shortlist], scored[rerank_shortlist:n_keep]
+    doc_rows = await neo4j_client.query(RERANK_DOCUMENT_CYPHER, property_ids=[x["property_id"] for x in shortlist])
+    documents = {r["property_id"]: build_document(r) for r in doc_rows}
+    for x in shortlist:
+        x["document"] = documents.get(x["property_id"], x["title"] or "")
+
+    reranked = await rerank(reranker, q_text, shortlist, budget_ms=rerank_budget_ms)
+    for x in reranked:
+        x.pop("document", None)
+    timings["rerank"] = time.perf_counter() - start
+    return (reranked + tail)[:topk]
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import os
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+from config import CHANGE_FEED_DIR
+from infrastructures.serialization import json_codec
+
+ADDED = "added"
+CHANGED = "changed"
+REMOVED = "removed"
+
+
+@dataclass(slots=True)
+class Change:
+    """One raw listing file that appeared, changed or disappeared in scan number `seq`."""
+    seq: int
+    op: str
+    file_name: str
+    property_id: str | None
+    batch_id: str | None
+    batch_timestamp: str | None
+    processed_at: str | None
+
+    @property
+    def removed(self) -> bool:
+        return self.op == REMOVED
+
+
+@dataclass
+class Delta:
+    """
+    What a consumer has not processed yet: the net change per file (the latest one wins), sorted by file name.
+    `held` are changes the upstream consumer has not managed to process; they are carried over, not returned.
+    """
+    consumer: str
+    seq: int
+    offset: int
+    changes: list[Change] = field(default_factory=list)
+    held: dict[str, Change] = field(default_factory=dict)
+
+    @property
+    def upserts(self) -> list[Change]:
+        return [c for c in self.changes if not c.removed]
+
+    @property
+    def removals(self) -> list[Change]:
+        return [c for c in self.changes if c.removed]
+
+    def remove_outputs(self, output_dir: str) -> int:
+        """Delete the per-property files of removed listings (stage outputs share the raw file name)."""
+        removed = 0
+        for change in self.removals:
+            path = os.path.join(output_dir, change.file_name)
+            if os.path.exists(path):
+                os.remove(path)
+                removed += 1
+        return removed
+
+    def summary(self) -> str:
+        counts = Counter(c.op for c in self.changes)
+        text = ", ".join(f"{counts[op]} {op}" for op in (ADDED, CHANGED, REMOVED))
+        return f"{text} (up to change set {self.seq}" + (f", {len(self.held)} held upstream)" if self.held else ")")
+
+
+def _write_json(path: str, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+class ChangeFeed:
+    """
+    Change-data capture for the raw crawler directory.
+
+    `scan` compares the directory with the manifest of the previous scan (size/mtime first, sha256 only when those
+    moved) and appends every added, changed or removed listing file to an append-only log under a new change set
+    number; the manifest also keeps the crawler batches seen. Only files that changed are read, so a scan costs a
+    stat per file plus the churn. A file without a listing (Listing.from_raw returns None) counts as absent: it is
+    logged as removed if it had one before and as added once it gets one, so no stage waits on it.
+
+    Each consumer (a pipeline stage) keeps a checkpoint: the change set and log offset it has processed, plus the
+    files it failed on. `delta(consumer, upstream)` reads the log from that offset, capped at the upstream
+    consumer's checkpoint, so a stage never sees a listing before the stage that produces its input has processed
+    it. `commit` advances the checkpoint; failed files come back in the next delta.
+    """
+
+    def __init__(self, directory: str = CHANGE_FEED_DIR):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        self.log_path = os.path.join(directory, "changes.jsonl")
+        self.checkpoint_dir = os.path.join(directory, "checkpoints")
+
+    def manifest(self) -> dict:
+        if not os.path.exists(self.manifest_path):
+            return {"seq": 0, "files": {}, "batches": {}}
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def scan(self, raw_dir: str) -> list[Change]:
+        """Record what changed in `raw_dir` since the last scan as a new change set; returns its changes."""
+        manifest = self.manifest()
+        files, seq = manifest["files"], manifest["seq"] + 1
+        changes, seen, touched = [], set(), False
+        with os.scandir(raw_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".json") or not entry.is_file():
+                    continue
+                seen.add(entry.name)
+                stat = entry.stat()
+                known = files.get(entry.name)
+                if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+                    continue
+                with open(entry.path, "rb") as f:
+                    data = f.read()
+                sha = hashlib.sha256(data).hexdigest()
+                if known and known["sha256"] == sha:
+                    known["mtime_ns"] = stat.st_mtime_ns  # touched, not changed
+                    touched = True
+                    continue
+                try:
+                    doc = json_codec.loads(data)
+                except ValueError:
+                    doc = {}
+                listing = doc.get("listing") or {}
+                record = files[entry.name] = {
+                    "empty": not listing,
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "sha256": sha,
+                    "property_id": str(listing.get("property_id") or "").strip() or None,
+                    "batch_id": doc.get("batch_id"),
+                    "batch_timestamp": doc.get("batch_timestamp"),
+                    "processed_at": doc.get("processed_at"),
+                }
+                was_listed = bool(known) and not known.get("empty")
+                if not listing:
+                    if was_listed:
+                        # The old property_id goes with the removal so importers can delete the node.
+                        changes.append(self._change(seq, REMOVED, entry.name, known))
+                    else:
+                        touched = True
+                    continue
+                changes.append(self._change(seq, CHANGED if was_listed else ADDED, entry.name, record))
+        for name in set(files) - seen:
+            record = files.pop(name)
+            if record.get("empty"):
+                touched = True
+            else:
+                changes.append(self._change(seq, REMOVED, name, record))
+        if not changes:
+            if touched:
+                self._save_manifest(manifest)
+            return []
+
+        changes.sort(key=lambda c: c.file_name)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.log_path, "ab") as f:
+            f.write(b"".join(json_codec.dumps(c) + b"\n" for c in changes))
+
+        per_batch = Counter(r["batch_id"] for r in files.values())
+        batches = manifest["batches"]
+        for change in changes:
+            if not change.removed and change.batch_id not in batches:
+                batches[change.batch_id] = {"batch_timestamp": change.batch_timestamp, "first_seq": seq}
+        for batch_id, batch in batches.items():
+            batch["files"] = per_batch.get(batch_id, 0)
+        manifest["seq"] = seq
+        manifest["scanned_at"] = datetime.now().isoformat()
+        self._save_manifest(manifest)
+        return changes
+
+    @staticmethod
+    def _change(seq: int, op: str, file_name: str, record: dict) -> Change:
+        return Change(seq, op, file_name, record["property_id"], record["batch_id"], record["batch_timestamp"],
+                      record["processed_at"])
+
+    def _save_manifest(self, manifest: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        _write_json(self.manifest_path, manifest)
+
+    def checkpoint(self, consumer: str) -> dict:
+        path = os.path.join(self.checkpoint_dir, f"{consumer}.json")
+        if not os.path.exists(path):
+            return {"seq": 0, "offset": 0, "retry": {}}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def delta(self, consumer: str, upstream: str | None = None) -> Delta:
+        checkpoint = self.checkpoint(consumer)
+        net = {name: Change(**c) for name, c in checkpoint["retry"].items()}
+        seq, offset = checkpoint["seq"], checkpoint["offset"]
+        upstream_checkpoint = self.checkpoint(upstream) if upstream else None
+        limit = upstream_checkpoint["seq"] if upstream_checkpoint else None
+
+        if os.path.exists(self.log_path):
+            with open(self.log_path, "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # a scan is still appending
+                    change = Change(**json_codec.loads(line))
+                    if limit is not None and change.seq > limit:
+                        break
+                    net[change.file_name] = change
+                    seq, offset = change.seq, offset + len(line)
+
+        pending = set(upstream_checkpoint["retry"]) if upstream_checkpoint else set()
+        held = {name: change for name, change in net.items() if name in pending}
+        changes = sorted((c for name, c in net.items() if name not in held), key=lambda c: c.file_name)
+        return Delta(consumer, seq, offset, changes, held)
+
+    def commit(self, delta: Delta, failed=()):
+        """Mark `delta` as processed, except the `failed` file names, which the next delta returns again."""
+        failed = set(failed)
+        retry = {c.file_name: asdict(c) for c in delta.changes if c.file_name in failed}
+        retry.update({name: asdict(c) for name, c in delta.held.items()})
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        _write_json(os.path.join(self.checkpoint_dir, f"{delta.consumer}.json"), {
+            "seq": delta.seq,
+            "offset": delta.offset,
+            "retry": retry,
+            "committed_at": datetime.now().isoformat(),
+        })
@@ -0,0 +1,211 @@
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+SKIP_DIRS = {"__pycache__", ".git", ".ipynb_checkpoints"}
+SKIP_SUFFIXES = (".pyc", ".tmp")
+
+
+@dataclass
+class Stage:
+    """
+    One pipeline step: `script` runs with its own directory as cwd and the repo root on PYTHONPATH, the way the
+    README runs it by hand. Paths are relative to the repo root.
+
+    inputs   files/directories the stage reads (part of the cache key)
+    outputs  files/directories the stage writes (empty for stages whose result lives in Neo4j)
+    code     modules besides `script` that define what the stage does (part of the cache key)
+    deps     stages that must finish first; their results are part of the cache key
+    """
+    name: str
+    script: str
+    args: list[str] = field(default_factory=list)
+    inputs: list[str] = field(default_factory=list)
+    outputs: list[str] = field(default_factory=list)
+    code: list[str] = field(default_factory=list)
+    deps: list[str] = field(default_factory=list)
+
+
+class ContentHasher:
+    """sha256 of files and directory trees; file hashes are reused while (size, mtime) is unchanged."""
+
+    def __init__(self, root: str, cache: dict | None = None):
+        self.root = root
+        self.cache: dict[str, list] = cache or {}
+
+    def file(self, path: str) -> str:
+        stat = os.stat(path)
+        cached = self.cache.get(path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        self.cache[path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def path(self, relpath: str) -> str | None:
+        """Hash of a file or directory tree; None when it does not exist."""
+        path = os.path.join(self.root, relpath)
+        if os.path.isfile(path):
+            return self.file(path)
+        if not os.path.isdir(path):
+            return None
+        digest = hashlib.sha256()
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+            for name in sorted(filenames):
+                if name.endswith(SKIP_SUFFIXES):
+                    continue
+                full = os.path.join(dirpath, name)
+                digest.update(f"{os.path.relpath(full, path)}\0{self.file(full)}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+
+class Pipeline:
+    """
+    Runs stages in dependency order, independent branches concurrently. A stage is skipped when its cache key
+    (script + code + inputs + dependency results + args) matches the last successful run and its outputs still
+    hash to what that run produced. State lives in `state_path` as JSON.
+    """
+
+    def __init__(self, stages: list[Stage], root: str, state_path: str):
+        self.stages = {s.name: s for s in stages}
+        self.root = root
+        self.state_path = state_path
+        self.state = {"stages": {}, "hashes": {}}
+        if os.path.exists(state_path):
+            with open(state_path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+        self.hasher = ContentHasher(root, self.state.get("hashes"))
+        for stage in stages:
+            unknown = set(stage.deps) - set(self.stages)
+            if unknown:
+                raise ValueError(f"Stage {stage.name!r} depends on unknown stages {sorted(unknown)}")
+
+    def upstream(self, targets: list[str]) -> list[str]:
+        """Targets plus everything they depend on, in topological order."""
+        order, visiting, done = [], set(), set()
+
+        def visit(name: str):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through {name!r}")
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage {name!r}; stages: {', '.join(self.stages)}")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for target in targets or list(self.stages):
+            visit(target)
+        return order
+
+    def cache_key(self, stage: Stage) -> str:
+        record = {
+            "args": stage.args,
+            "code": {p: self.hasher.path(p) for p in [stage.script, *stage.code]},
+            "inputs": {p: self.hasher.path(p) for p in stage.inputs},
+            # A rerun of a dependency (forced, or with outputs that live outside the repo such as Neo4j) invalidates
+            # its dependents too, so the fingerprint includes when it last finished.
+            "deps": {d: self._fingerprint(d) for d in stage.deps},
+        }
+        return hashlib.sha256(json.dumps(record, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _fingerprint(self, name: str) -> dict | None:
+        last = self.state["stages"].get(name)
+        return last and {k: last[k] for k in ("key", "outputs", "finished_at")}
+
+    def outputs_hash(self, stage: Stage) -> dict[str, str | None]:
+        return {p: self.hasher.path(p) for p in stage.outputs}
+
+    def is_fresh(self, stage: Stage, key: str) -> bool:
+        last = self.state["stages"].get(stage.name)
+        return bool(last) and last["key"] == key and last["outputs"] == self.outputs_hash(stage)
+
+    def save(self, prune: bool = False):
+        if prune:
+            self.hasher.cache = {p: v for p, v in self.hasher.cache.items() if os.path.exists(p)}
+        self.state["hashes"] = self.hasher.cache
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=1)
+        os.replace(tmp_path, self.state_path)
+
+    async def _execute(self, stage: Stage) -> int:
+        script = os.path.join(self.root, stage.script)
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [self.root, os.environ.get("PYTHONPATH")]))}
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.basename(script), *stage.args,
+            cwd=os.path.dirname(script), env=env,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+        )
+        async for line in process.stdout:
+            print(f"[{stage.name}] {line.decode('utf-8', errors='replace').rstrip()}")
+        return await process.wait()
+
+    async def run(self, targets: list[str] | None = None, force: set[str] = frozenset(), jobs: int = 4,
+                  dry_run: bool = False) -> dict[str, str]:
+        """Returns stage -> "cached" / "ran" / "failed" / "blocked" (or "would run" for a dry run)."""
+        order = self.upstream(targets or [])
+        status: dict[str, str] = {}
+        done = {name: asyncio.Event() for name in order}
+        slots = asyncio.Semaphore(jobs)
+
+        async def run_stage(name: str):
+            stage = self.stages[name]
+            try:
+                for dep in stage.deps:
+                    if dep in done:
+                        await done[dep].wait()
+                if any(status.get(dep) in ("failed", "blocked") for dep in stage.deps):
+                    status[name] = "blocked"
+                    return
+                if dry_run and any(status.get(dep) == "would run" for dep in stage.deps):
+                    status[name] = "would run"
+                    return
+
+                key = self.cache_key(stage)
+                if name not in force and self.is_fresh(stage, key):
+                    status[name] = "cached"
+                    return
+                if dry_run:
+                    status[name] = "would run"
+                    return
+
+                async with slots:
+                    print(f"[{name}] running {stage.script} {' '.join(stage.args)}".rstrip())
+                    start = time.perf_counter()
+                    code = await self._execute(stage)
+                    seconds = time.perf_counter() - start
+                if code != 0:
+                    print(f"[{name}] failed with exit code {code} after {seconds:.1f}s")
+                    status[name] = "failed"
+                    return
+                self.state["stages"][name] = {
+                    "key": key,
+                    "outputs": self.outputs_hash(stage),
+                    "seconds": round(seconds, 2),
+                    "finished_at": datetime.now().isoformat(),
+                }
+                self.save()
+                status[name] = "ran"
+                print(f"[{name}] done in {seconds:.1f}s")
+            finally:
+                done[name].set()
+
+        await asyncio.gather(*(run_stage(name) for name in order))
+        if not dry_run:
+            self.save(prune=True)
+        return {name: status[name] for name in order}
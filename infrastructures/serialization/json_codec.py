@@ -0,0 +1,69 @@
+import dataclasses
+import json
+from typing import Any, Callable
+
+from config import JSON_BACKEND
+
+
+def _orjson_codec() -> tuple[Callable, Callable]:
+    import orjson
+
+    def dumps(obj: Any, indent: bool = False) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+
+    return orjson.loads, dumps
+
+
+def _msgspec_codec() -> tuple[Callable, Callable]:
+    import msgspec
+
+    encoder, decoder = msgspec.json.Encoder(), msgspec.json.Decoder()
+
+    def dumps(obj: Any, indent: bool = False) -> bytes:
+        data = encoder.encode(obj)
+        return msgspec.json.format(data, indent=2) if indent else data
+
+    return decoder.decode, dumps
+
+
+def _stdlib_codec() -> tuple[Callable, Callable]:
+    def default(obj: Any) -> dict:
+        # orjson and msgspec encode dataclasses natively; match them field by field (nested ones recurse here too).
+        if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+            return {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    def dumps(obj: Any, indent: bool = False) -> bytes:
+        if indent:
+            return json.dumps(obj, ensure_ascii=False, indent=2, default=default).encode("utf-8")
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=default).encode("utf-8")
+
+    return json.loads, dumps
+
+
+_BACKENDS = {"orjson": _orjson_codec, "msgspec": _msgspec_codec, "json": _stdlib_codec}
+
+
+def _select(name: str) -> tuple[str, Callable, Callable]:
+    if name != "auto":
+        return name, *_BACKENDS[name]()
+    for candidate in ("orjson", "msgspec"):
+        try:
+            return candidate, *_BACKENDS[candidate]()
+        except ImportError:
+            continue
+    return "json", *_stdlib_codec()
+
+
+# All backends emit UTF-8 with non-ASCII characters unescaped, so outputs are interchangeable.
+backend, loads, dumps = _select(JSON_BACKEND)
+
+
+def load_file(path: str) -> Any:
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def dump_file(obj: Any, path: str, indent: bool = False):
+    with open(path, "wb") as f:
+        f.write(dumps(obj, indent=indent))
@@ -0,0 +1,86 @@
+"""
+Per-call chain construction overhead: rebuilding `prompt | llm.with_structured_output(schema)` on every request
+(the old get_*_chain behaviour) versus the memoized chain_registry.
+
+Two measurements per chain:
+  build         construction only (prompt template + Pydantic JSON-schema binding) vs. registry lookup
+  call (mock)   full ainvoke against the in-process mock LLM server with zero injected latency, so the
+                difference is pure client-side overhead
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from infrastructures.llm.chain_registry import chain_registry
+from infrastructures.mock_llm.server import LatencyModel, MockConfig, MockLLMServer
+from services.property_search_recommendation import chains  # noqa: F401  registers the search chains
+
+INPUTS = {
+    "get_extract_user_question_intent_chain": {"user_query": "楠梓區三房兩廳，預算一千五百萬以內，要有車位"},
+    "get_rerank_candidates_chain": {"query_text": "需求：採光好；近捷運", "candidates": "[0] 楠梓 三房\n\n[1] 左營 兩房"},
+}
+
+
+def percentiles(samples: list[float]) -> tuple[float, float]:
+    return float(np.percentile(samples, 50)), float(np.percentile(samples, 95))
+
+
+def time_build(name: str, repeat: int) -> dict:
+    fresh, cached = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chain_registry.build(name)
+        fresh.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        chain_registry.get(name)
+        cached.append((time.perf_counter() - start) * 1000)
+    return {"rebuild": percentiles(fresh), "registry": percentiles(cached)}
+
+
+async def time_calls(name: str, payload: dict, repeat: int) -> dict:
+    results = {}
+    for mode, get_chain in (("rebuild", chain_registry.build), ("registry", chain_registry.get)):
+        await get_chain(name).ainvoke(payload)
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await get_chain(name).ainvoke(payload)
+            samples.append((time.perf_counter() - start) * 1000)
+        results[mode] = percentiles(samples)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--build-repeat", type=int, default=500)
+    parser.add_argument("--call-repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    server = MockLLMServer(("127.0.0.1", 0), MockConfig(chat_latency=LatencyModel.parse("fixed:0")))
+    server.start_in_thread()
+    chain_registry.base_url = f"{server.url}/v1"
+
+    print("warm-up ms:", {k.rsplit(".", 1)[-1]: round(v, 2) for k, v in chain_registry.warm_up().items()})
+    names = {name.rsplit(".", 1)[-1]: name for name in chain_registry.names}
+
+    async def run_calls():
+        # One event loop for every chain: the shared ChatOpenAI's async HTTP client is bound to it.
+        return {short: await time_calls(names[short], payload, args.call_repeat) for short, payload in INPUTS.items()}
+
+    builds = {short: time_build(names[short], args.build_repeat) for short in INPUTS}
+    calls = asyncio.run(run_calls())
+    server.shutdown()
+
+    print("| chain | stage | rebuild p50 ms | rebuild p95 ms | registry p50 ms | registry p95 ms | saved p50 ms |")
+    print("|---|---|---|---|---|---|---|")
+    for short in INPUTS:
+        for stage, r in (("build", builds[short]), ("call (mock)", calls[short])):
+            (rb50, rb95), (rg50, rg95) = r["rebuild"], r["registry"]
+            print(f"| {short} | {stage} | {rb50:.3f} | {rb95:.3f} | {rg50:.3f} | {rg95:.3f} | {rb50 - rg50:.3f} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Disk footprint and load time: per-property JSON directories vs the columnar dataset store.
+
+The sample corpus (raw crawl, rematch, testing questions, judge outputs) is replicated to --sizes properties with
+fresh property_ids, written out in the JSON directory layout, built into a store, then loaded both ways:
+  json_all          glob + parse every JSON directory (what each stage does today)
+  store_all         read every Parquet table
+  store_projected   questions table, one dataset, question column only (column projection + filter pushdown)
+  store_lookup      all rows of 10 properties across tables (row-group skipping on the sorted property_id)
+  store_mmap        every table through the memory-mapped Arrow copy (warm)
+"""
+import argparse
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "dataset_store"))
+
+from build_dataset_store import JUDGE_DATA_DIRS, QUESTION_DATA_DIRS, RAW_DATA_DIR, REMATCH_DATA_DIR  # noqa: E402
+from infrastructures.dataset_store.builder import build_tables  # noqa: E402
+from infrastructures.dataset_store.store import SORT_KEYS, DatasetStore  # noqa: E402
+from infrastructures.serialization import json_codec  # noqa: E402
+
+
+def replicate(work_dir: str, n: int) -> dict:
+    """Copy the sample corpus into work_dir until it holds n properties; returns the replicated directory layout."""
+    layout = {
+        "raw": RAW_DATA_DIR,
+        "rematch": REMATCH_DATA_DIR,
+        **{f"questions_{k}": v for k, v in QUESTION_DATA_DIRS.items()},
+        **{f"judge_{k}": v for k, v in JUDGE_DATA_DIRS.items()},
+    }
+    sources = {key: {os.path.basename(p): json_codec.load_file(p) for p in glob.glob(os.path.join(d, "*.json"))}
+               for key, d in layout.items()}
+    raw_names = sorted(sources["raw"])
+    raw_ids = {name: sources["raw"][name]["listing"]["property_id"] for name in raw_names}
+
+    out = {key: os.path.join(work_dir, key) for key in layout}
+    for d in out.values():
+        os.makedirs(d, exist_ok=True)
+    for i in range(n):
+        name = raw_names[i % len(raw_names)]
+        copy_no = i // len(raw_names)
+        new_name = f"{copy_no:05d}_{name}"
+        new_id = f"{raw_ids[name]}_{copy_no}"
+        for key, docs in sources.items():
+            doc = docs.get(name)
+            if doc is None:
+                # testing datasets are keyed by property_id, not by the raw file name
+                doc = next((d for d in docs.values() if isinstance(d, dict) and d.get("property_id") == raw_ids[name]),
+                           None)
+            if doc is None:
+                continue
+            if key == "raw":
+                doc = {**doc, "listing": {**doc["listing"], "property_id": new_id}}
+            elif isinstance(doc, dict) and "property_id" in doc:
+                doc = {**doc, "property_id": new_id}
+            json_codec.dump_file(doc, os.path.join(out[key], new_name), indent=True)
+    return out
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print("| properties | JSON MB | store MB | json_all ms | store_all ms | store_projected ms | store_lookup ms "
+          "| store_mmap ms |")
+    print("|---|---|---|---|---|---|---|---|")
+    for n in args.sizes:
+        work_dir = tempfile.mkdtemp(prefix="dataset_store_bench_")
+        try:
+            dirs = replicate(work_dir, n)
+            files = [p for d in dirs.values() for p in glob.glob(os.path.join(d, "*.json"))]
+            json_bytes = sum(os.path.getsize(p) for p in files)
+
+            store = DatasetStore(os.path.join(work_dir, "store"))
+            tables = build_tables(dirs["raw"], dirs["rematch"],
+                                  {k: dirs[f"questions_{k}"] for k in QUESTION_DATA_DIRS},
+                                  {k: dirs[f"judge_{k}"] for k in JUDGE_DATA_DIRS})
+            for name, rows in tables.items():
+                store.write(name, rows)
+            store_bytes = sum(store.disk_usage().values())
+            some_ids = [r["property_id"] for r in tables["properties"][::max(1, n // 10)]][:10]
+            for name in store.names:
+                store.mmap(name)
+
+            json_ms = timed(lambda: [json_codec.load_file(p) for p in files], 1)
+            all_ms = timed(lambda: [store.read(name) for name in store.names], args.repeat)
+            projected_ms = timed(lambda: store.read("questions", ["question"], {"dataset": "v2"}), args.repeat)
+            keyed = [name for name in store.names if SORT_KEYS[name][0] == "property_id"]
+            lookup_ms = timed(lambda: [store.read(name, filter={"property_id": some_ids}) for name in keyed],
+                              args.repeat)
+            mmap_ms = timed(lambda: [store.mmap(name) for name in store.names], args.repeat)
+            print(f"| {n:,} | {json_bytes / 1e6:.1f} | {store_bytes / 1e6:.1f} | {json_ms:.0f} | {all_ms:.0f} "
+                  f"| {projected_ms:.1f} | {lookup_ms:.1f} | {mmap_ms:.2f} |")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
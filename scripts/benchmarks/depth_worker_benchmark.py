@@ -0,0 +1,62 @@
+"""
+Depth-estimation throughput (services/vlm_tag_quality_service/depth.py): one image per forward pass, the way the
+spatial judge used to call the model, against the micro-batching DepthBatchWorker with many concurrent callers.
+
+Images are synthetic photos in the listing aspect ratios (4:3, 3:4, 16:9), so batches mix preprocessed shapes the way
+real requests do. The model follows the DEPTH_* settings; e.g. on a CPU worker:
+
+  DEPTH_MODEL_SIZE=small DEPTH_BACKEND=onnx DEPTH_ONNX_FILE=onnx/model_int8.onnx python depth_worker_benchmark.py
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+from PIL import Image
+
+from services.vlm_tag_quality_service.depth import DepthBatchWorker, depth_model
+
+SIZES = [(1024, 768), (768, 1024), (1280, 720)]
+
+
+def synthetic_images(n: int) -> list[Image.Image]:
+    rng = np.random.default_rng(0)
+    return [
+        Image.fromarray(rng.integers(0, 256, (h, w, 3), dtype=np.uint8))
+        for w, h in (SIZES[i % len(SIZES)] for i in range(n))
+    ]
+
+
+async def run_worker(worker: DepthBatchWorker, images: list[Image.Image]) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(worker.estimate(image) for image in images))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=64)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--wait-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    images = synthetic_images(args.images)
+    print(f"Depth model: {depth_model.describe()}, warm-up {depth_model.warm_up():.1f}s\n")
+
+    start = time.perf_counter()
+    for image in images:
+        depth_model.estimate(image)
+    sequential = time.perf_counter() - start
+
+    print("| mode | images/s | batches |")
+    print("|---|---|---|")
+    print(f"| one at a time | {len(images) / sequential:.1f} | {len(images)} |")
+    for batch_size in args.batch_sizes:
+        worker = DepthBatchWorker(depth_model, max_batch_size=batch_size, max_wait_ms=args.wait_ms)
+        seconds = asyncio.run(run_worker(worker, images))
+        worker.close()
+        print(f"| worker, batch {batch_size} | {len(images) / seconds:.1f} | {worker.batches} |")
+
+
+if __name__ == "__main__":
+    main()
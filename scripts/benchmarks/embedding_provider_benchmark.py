@@ -0,0 +1,57 @@
+"""
+Single-query embedding latency of the configured EMBEDDING_PROVIDER.
+Query embedding sits on the hybrid_search critical path, so p50/p95 of one-text calls is what matters.
+"""
+import argparse
+import asyncio
+import json
+import time
+from glob import glob
+from pathlib import Path
+
+import numpy as np
+
+from config import EMBEDDING_PROVIDER
+from infrastructures.embedding.provider import get_embedding_provider
+
+DATASET_DIR = "../../data/v2_testing_dataset_twhg_with_latlng_and_places"
+
+
+def load_questions(limit: int) -> list[str]:
+    questions = []
+    for path in sorted(glob(str(Path(DATASET_DIR) / "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            questions.extend(q["question"] for q in json.load(f).get("question_list", []))
+    return questions[:limit]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--provider", default=EMBEDDING_PROVIDER)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=5)
+    args = parser.parse_args()
+
+    provider = get_embedding_provider(args.provider)
+    questions = load_questions(args.queries)
+
+    for q in questions[:args.warmup]:
+        await provider.aembed([q])
+
+    latencies = []
+    for q in questions:
+        start = time.perf_counter()
+        await provider.aembed([q])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    provider.embed(questions)
+    batch_ms = (time.perf_counter() - start) * 1000
+
+    print(f"provider: {provider.name}, queries: {len(latencies)}")
+    print(f"single-query p50: {np.percentile(latencies, 50):.2f} ms, p95: {np.percentile(latencies, 95):.2f} ms")
+    print(f"batched: {batch_ms:.1f} ms total, {batch_ms / max(len(questions), 1):.2f} ms/query")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
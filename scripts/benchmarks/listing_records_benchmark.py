@@ -0,0 +1,114 @@
+"""
+Per-property cost of typed listing records (infrastructures/listing/records.py) against the plain dicts the
+pipeline used to pass around.
+
+The raw listings are replicated up to each catalog size and compared on:
+- memory: retained size (tracemalloc) of the cleaned catalog held as dicts and as slots-dataclass Listings.
+- encode: json_codec.dumps of the catalog as dicts and as records (orjson/msgspec encode dataclasses natively).
+- import: building Neo4j parameters, re-validating every field of a cleaned dict with the old safe_float/safe_int
+  coercion compared with reading a Listing decoded from the same file.
+- judge output: bytes written per image match when the whole rematch item is embedded (`original_input`) compared
+  with an `input_ref` pointer.
+"""
+import argparse
+import glob
+import os
+import time
+import tracemalloc
+
+from infrastructures.listing.records import ImageMatch, JudgeResult, Listing
+from infrastructures.serialization import json_codec
+
+RAW_DATA_DIR = "../../data/twhg_with_latlng_and_places/"
+REMATCH_DATA_DIR = "../../data/vlm_rematch_add_info_twhg_with_latlng_and_places/"
+
+FLOAT_FIELDS = ("total_price", "gross_area", "interior_area", "public_area_ratio", "land_ownership_area")
+INT_FIELDS = ("property_age", "num_bedroom", "num_bathroom", "num_living_room", "floor", "total_floors")
+
+
+def safe_float(x):
+    try:
+        return None if x is None else float(x)
+    except Exception:
+        return None
+
+
+def safe_int(x):
+    try:
+        return None if x is None else int(x)
+    except Exception:
+        return None
+
+
+def params_from_dict(doc: dict) -> dict:
+    """What import_properties.build_params did per file before records: coerce and normalize everything again."""
+    params = {k: safe_float(doc.get(k)) for k in FLOAT_FIELDS}
+    params.update({k: safe_int(doc.get(k)) for k in INT_FIELDS})
+    params["rooms"] = [
+        {"room": str(f["room"]).strip(),
+         "tag_list": [str(t).strip() for t in f.get("tag_list") or [] if str(t).strip()]}
+        for f in doc.get("extracted_feature_list") or [] if isinstance(f, dict) and f.get("room")
+    ]
+    params["picture_list"] = [str(u).strip() for u in doc.get("picture_list") or [] if str(u).strip()]
+    return params
+
+
+def params_from_record(listing: Listing) -> dict:
+    params = {k: getattr(listing, k) for k in FLOAT_FIELDS + INT_FIELDS}
+    params["rooms"] = [{"room": f.room, "tag_list": f.tag_list} for f in listing.extracted_feature_list]
+    params["picture_list"] = listing.picture_list
+    return params
+
+
+def retained_bytes(build) -> int:
+    tracemalloc.start()
+    value = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del value
+    return size
+
+
+def timed_ms(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    args = parser.parse_args()
+
+    raw = [json_codec.load_file(p) for p in sorted(glob.glob(os.path.join(RAW_DATA_DIR, "*.json")))]
+    cleaned = [json_codec.dumps(Listing.from_raw(d)) for d in raw]
+    matches = [json_codec.load_file(p).get("matching_result_list", [])
+               for p in sorted(glob.glob(os.path.join(REMATCH_DATA_DIR, "*.json")))]
+
+    embedded = json_codec.dumps([{"original_input": item, "evaluation": {}} for items in matches for item in items])
+    referenced = json_codec.dumps([JudgeResult(ImageMatch.from_dict(item).ref(i), {})
+                                   for items in matches for i, item in enumerate(items)])
+    n_matches = sum(len(items) for items in matches)
+    print(f"Judge output per image match: {len(embedded) / n_matches:.0f} B embedded, "
+          f"{len(referenced) / n_matches:.0f} B referenced (evaluation excluded)\n")
+
+    print("| properties | dict KB/property | record KB/property | encode dict ms | encode record ms "
+          "| import dict ms | import record ms |")
+    print("|---|---|---|---|---|---|---|")
+    for n in args.sizes:
+        files = [cleaned[i % len(cleaned)] for i in range(n)]
+        dict_bytes = retained_bytes(lambda: [json_codec.loads(b) for b in files])
+        record_bytes = retained_bytes(lambda: [Listing.from_dict(json_codec.loads(b)) for b in files])
+
+        docs = [json_codec.loads(b) for b in files]
+        records = [Listing.from_dict(d) for d in docs]
+        encode_dict_ms = timed_ms(lambda: [json_codec.dumps(d) for d in docs])
+        encode_record_ms = timed_ms(lambda: [json_codec.dumps(r) for r in records])
+        dict_ms = timed_ms(lambda: [params_from_dict(d) for d in docs])
+        record_ms = timed_ms(lambda: [params_from_record(r) for r in records])
+        print(f"| {n:,} | {dict_bytes / n / 1024:.1f} | {record_bytes / n / 1024:.1f} | {encode_dict_ms:.0f} "
+              f"| {encode_record_ms:.0f} | {dict_ms:.0f} | {record_ms:.0f} |")
+
+
+if __name__ == "__main__":
+    main()
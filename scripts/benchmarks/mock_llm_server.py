@@ -0,0 +1,57 @@
+"""
+Local OpenAI + Gemini stand-in for load tests and CI (no API keys, no network).
+
+  python mock_llm_server.py --port 8089 --chat-latency lognormal:400:0.5 --rate-limit-rate 0.05
+
+Then, in another shell:
+
+  export OPENAI_BASE_URL=http://127.0.0.1:8089/v1 GEMINI_BASE_URL=http://127.0.0.1:8089
+  export OPENAI_API_KEY=mock GEMINI_AI_STUDIO_API_KEY=mock
+  cd ../property_search_recommendation && python task_1_end_2_end_test.py
+
+Structured outputs are generated from the JSON schema each request carries (RealEstateQuery,
+RerankResult, RealEstateTagEvaluation, SpatialEvaluation, the Gemini response schemas), seeded by
+the request body so identical requests get identical answers. `GET /stats` shows status counts.
+"""
+import argparse
+
+from infrastructures.mock_llm.server import LatencyModel, MockConfig, MockLLMServer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--chat-latency", default="lognormal:400:0.5", help="fixed:MS | uniform:LO:HI | lognormal:MEDIAN:SIGMA")
+    parser.add_argument("--embedding-latency", default="lognormal:60:0.3")
+    parser.add_argument("--gemini-latency", default="lognormal:1500:0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute before 429s (0 = unlimited)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        chat_latency=LatencyModel.parse(args.chat_latency),
+        embedding_latency=LatencyModel.parse(args.embedding_latency),
+        gemini_latency=LatencyModel.parse(args.gemini_latency),
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        rpm=args.rpm,
+        retry_after_seconds=args.retry_after,
+        seed=args.seed,
+    )
+    server = MockLLMServer((args.host, args.port), config)
+    print(f"Mock LLM server on {server.url} (OpenAI: {server.url}/v1, Gemini: {server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(server.stats.snapshot())
+
+
+if __name__ == "__main__":
+    main()
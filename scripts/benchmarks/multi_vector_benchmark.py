@@ -0,0 +1,90 @@
+"""
+Single-vector vs multi-vector (max-sim) scoring on the imported catalog.
+
+Questions are embedded as-is (no intent extraction, no graph filter) and ranked against
+every property, so the numbers isolate the vector-scoring stage:
+recall@k of the target property, packed index memory and per-query scoring latency.
+"""
+import json
+import time
+from glob import glob
+from pathlib import Path
+
+import numpy as np
+from neo4j import GraphDatabase
+
+from config import NEO4J_PASSWORD, NEO4J_URI, NEO4J_USER
+from infrastructures.embedding.provider import embedding_signature, get_embedding_provider
+from infrastructures.neo4j.retriever import max_sim_scores, pack_multi_vectors
+
+DATASET_DIR = "../../data/v2_testing_dataset_twhg_with_latlng_and_places"
+RECALL_AT = (1, 5, 10)
+
+GET_ALL_VECTORS = """
+MATCH (p:Property)
+WHERE p.text_embedding IS NOT NULL AND p.embedding_signature = $signature
+RETURN p.property_id AS property_id,
+       p.text_embedding AS embedding,
+       CASE WHEN p.room_embedding_signature = $signature THEN p.room_embeddings END AS room_embeddings
+"""
+
+
+def load_questions() -> list[tuple[str, str]]:
+    questions = []
+    for path in sorted(glob(str(Path(DATASET_DIR) / "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for q in data.get("question_list", []):
+            questions.append((data["property_id"], q["question"]))
+    return questions
+
+
+def evaluate(rows: list[dict], questions: list[tuple[str, str]], q_embs: np.ndarray, multi_vector: bool) -> dict:
+    kept_rows, matrix, offsets = pack_multi_vectors(rows, multi_vector)
+    property_ids = np.array([r["property_id"] for r in kept_rows])
+
+    hits = {k: 0 for k in RECALL_AT}
+    latencies = []
+    for (target_id, _), q_emb in zip(questions, q_embs):
+        start = time.perf_counter()
+        scores = max_sim_scores(q_emb, matrix, offsets)
+        latencies.append(time.perf_counter() - start)
+
+        ranking = property_ids[np.argsort(-scores)]
+        for k in RECALL_AT:
+            hits[k] += int(target_id in ranking[:k])
+
+    return {
+        "mode": "multi_vector" if multi_vector else "single_vector",
+        "vectors": int(matrix.shape[0]),
+        "index_mb": (matrix.nbytes + offsets.nbytes) / 1e6,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+        **{f"recall@{k}": hits[k] / len(questions) for k in RECALL_AT},
+    }
+
+
+def main():
+    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+    try:
+        with driver.session() as session:
+            rows = session.run(GET_ALL_VECTORS, signature=embedding_signature()).data()
+    finally:
+        driver.close()
+
+    questions = load_questions()
+    print(f"{len(rows)} properties, {len(questions)} questions")
+    q_embs = get_embedding_provider().embed([q for _, q in questions])
+
+    results = [evaluate(rows, questions, q_embs, multi_vector=m) for m in (False, True)]
+
+    header = ["mode", "vectors", "index_mb", "p50_ms", "p95_ms"] + [f"recall@{k}" for k in RECALL_AT]
+    print("| " + " | ".join(header) + " |")
+    print("|" + "---|" * len(header))
+    for r in results:
+        cells = [f"{r[h]:.3f}" if isinstance(r[h], float) else str(r[h]) for h in header]
+        print("| " + " | ".join(cells) + " |")
+
+
+if __name__ == "__main__":
+    main()
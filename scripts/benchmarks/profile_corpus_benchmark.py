@@ -0,0 +1,71 @@
+"""
+Data-quality profiler (scripts/data_quality/profile_corpus.py) at corpus scale.
+
+The raw sample is parsed once; its profile table is then replicated to each size. Replicas share their Arrow buffers
+with one combined block, so a 1M-row table fits in a few hundred MB, while profile() still runs over every row.
+Parsing is timed per file on one process; the corpus parse time is projected for `--workers` processes. Re-profiling
+reads the table saved with --save-table instead, which is timed for real (reading it back materializes every row,
+about 4 GB peak at 1M).
+
+  python profile_corpus_benchmark.py --sizes 100000 1000000 --workers 8
+"""
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_quality"))
+from profile_corpus import INPUT_DIR, load_table, profile, profile_chunk  # noqa: E402
+
+BLOCK_ROWS = 65_536
+
+
+def parse_seconds_per_file(paths: list[str], rounds: int) -> float:
+    profile_chunk(paths)  # warm the page cache
+    start = time.perf_counter()
+    for _ in range(rounds):
+        profile_chunk(paths)
+    return (time.perf_counter() - start) / (rounds * len(paths))
+
+
+def replicate(table: pa.Table, rows: int) -> pa.Table:
+    block = pa.concat_tables([table] * -(-min(rows, BLOCK_ROWS) // table.num_rows)).combine_chunks()
+    return pa.concat_tables([block] * -(-rows // block.num_rows)).slice(0, rows)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", default=os.path.join("../data_quality", INPUT_DIR))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.input, "*.json")))
+    per_file = parse_seconds_per_file(paths, args.rounds)
+    table = load_table(args.input, 1)
+    print(f"Sample: {table.num_rows} listings, parse {per_file * 1000:.2f} ms/file on one process\n")
+
+    print(f"| listings | parse, {args.workers} workers (projected) | read saved table | profile() |")
+    print("|---|---|---|---|")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, f"profile_{size}.parquet")
+            pq.write_table(replicate(table, size), path, compression="zstd")
+            start = time.perf_counter()
+            replicated = load_table(path, 1)
+            read = time.perf_counter() - start
+            start = time.perf_counter()
+            profile(replicated)
+            seconds = time.perf_counter() - start
+            del replicated
+            print(f"| {size:,} | {size * per_file / args.workers:.1f}s | {read:.2f}s | {seconds:.2f}s |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+Retrieval scaling benchmarks on synthetic catalogs (1k / 10k / 100k / 1M properties).
+
+Benchmarks per catalog size:
+  columnar_filter        CatalogSnapshot.filter (the FILTER_CYPHER predicate in numpy) over an intent-shaped query mix
+  vector_search_filtered cosine + top-k over the graph-filtered candidates (what hybrid_search ranks)
+  vector_search_full     brute-force cosine + top-k over the whole catalog (no hard filters)
+  hybrid_search          end-to-end retriever.hybrid_search (graph filter -> pack -> max-sim -> sort)
+  hybrid_search_rerank   hybrid_search with reranking: shortlist documents fetched and scored by a deterministic
+                         stub reranker (no score cache), so the rerank plumbing is timed without a model
+
+hybrid_search runs against an in-memory stand-in for Neo4j by default. The stand-in answers FILTER_CYPHER from the
+snapshot and returns Neo4j-shaped rows, so row materialization and packing are still measured. With --backend neo4j,
+the synthetic catalog is loaded into the configured Neo4j and FILTER_CYPHER runs there. Use a scratch database:
+synthetic nodes are Property nodes tagged `synthetic: true` and are deleted before every load.
+Query embeddings are random, so embedding API latency is excluded.
+
+Results are compared against a stored baseline: p50 per benchmark, keyed by the run configuration (size, dim, rooms,
+backend, graph limit, top-k, rerank shortlist). A benchmark slower than the baseline by more than --tolerance is reported as a
+regression and the exit code is 1. Timings only compare on the same machine: the baseline records the machine it was
+taken on, and against another machine's baseline regressions are reported but do not fail the run. The committed
+baselines/retrieval_benchmark.json is a reference from a single-core sandbox; record your own with --save-baseline
+(and --baseline <path> to keep it next to the reference).
+
+  python retrieval_benchmark.py                           # 1k, 10k, 100k; compare with baseline
+  python retrieval_benchmark.py --sizes 1000 1000000      # include 1M (~1 GB of vectors at dim 256)
+  python retrieval_benchmark.py --save-baseline           # record this machine's numbers
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from infrastructures.embedding.provider import embedding_signature
+from infrastructures.neo4j import retriever
+from infrastructures.neo4j.catalog_snapshot import CatalogSnapshot
+from infrastructures.neo4j.client import neo4j_client
+from config import RERANK_SHORTLIST_SIZE
+from infrastructures.neo4j.retriever import FILTER_CYPHER, RERANK_DOCUMENT_CYPHER, hybrid_search
+from services.property_search_recommendation.models import CypherVariables, RealEstateQuery
+from services.property_search_recommendation.reranker import Reranker
+from synthetic_catalog import generate_snapshot, sample_cypher_variables, snapshot_rows
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "retrieval_benchmark.json")
+# Differences below this are timer noise, never regressions.
+NOISE_FLOOR_MS = 0.05
+
+LOAD_SYNTHETIC_CYPHER = """
+UNWIND $rows AS row
+CREATE (p:Property {
+  property_id: row.property_id, title: row.title, city: row.city, district: row.district, street: row.street,
+  total_price: row.total_price, interior_area: row.interior_area, num_bedroom: row.num_bedroom,
+  num_bathroom: row.num_bathroom, property_type: row.property_type, property_age: row.property_age,
+  text_embedding: row.embedding, embedding_signature: $signature, synthetic: true
+})
+MERGE (s:Street {key: row.street_key})
+  ON CREATE SET s.name = row.street
+CREATE (p)-[:LOCATED_ON]->(s)
+"""
+
+DELETE_SYNTHETIC_CYPHER = """
+MATCH (p:Property {synthetic: true})
+WITH p LIMIT 10000
+DETACH DELETE p
+RETURN count(*) AS deleted
+"""
+
+
+class InMemoryNeo4j:
+    """Answers the retriever's queries from a CatalogSnapshot instead of a database."""
+
+    def __init__(self, snapshot: CatalogSnapshot):
+        self.snapshot = snapshot
+        self.index = {pid: i for i, pid in enumerate(snapshot.columns["property_id"].tolist())}
+
+    async def query(self, cypher: str, **params):
+        if cypher == FILTER_CYPHER:
+            idx = self.snapshot.filter(params, params["limit"])
+            return snapshot_rows(self.snapshot, idx, with_embeddings=True)
+        if cypher == RERANK_DOCUMENT_CYPHER:
+            titles = self.snapshot.columns["title"]
+            return [{"property_id": pid, "title": str(titles[self.index[pid]]), "text": ""}
+                    for pid in params["property_ids"]]
+        raise ValueError("InMemoryNeo4j only serves FILTER_CYPHER and RERANK_DOCUMENT_CYPHER")
+
+
+class StubReranker(Reranker):
+    """Deterministic scores from a checksum of the document; stands in for a model in timing runs."""
+    name = "bench_stub"
+
+    def __init__(self):
+        # No score cache: every call goes through _score, as a cold query would.
+        super().__init__(cache_size=0)
+
+    async def _score(self, query_text: str, documents: list[str]) -> list[float | None]:
+        return [zlib.crc32(d.encode("utf-8")) / 2 ** 32 for d in documents]
+
+
+def time_calls(fn, inputs: list, min_repeat: int, budget_seconds: float) -> dict:
+    """Cycle through `inputs` calling fn(x); stop after min_repeat calls once the time budget is spent."""
+    for x in inputs[:3]:
+        fn(x)
+    samples = []
+    deadline = time.perf_counter() + budget_seconds
+    i = 0
+    while len(samples) < min_repeat or (time.perf_counter() < deadline and len(samples) < 100 * min_repeat):
+        x = inputs[i % len(inputs)]
+        start = time.perf_counter()
+        fn(x)
+        samples.append((time.perf_counter() - start) * 1000)
+        i += 1
+    return {
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p95_ms": float(np.percentile(samples, 95)),
+        "mean_ms": float(np.mean(samples)),
+        "calls": len(samples),
+    }
+
+
+def bench_size(n: int, args, loop: asyncio.AbstractEventLoop) -> dict:
+    print(f"Generating {n:,} properties (dim {args.dim}, {args.rooms} rooms each)...")
+    snapshot = generate_snapshot(n, dim=args.dim, rooms_per_property=args.rooms, seed=args.seed)
+    filters = sample_cypher_variables(snapshot, args.queries, seed=args.seed + 1)
+    rng = np.random.default_rng(args.seed + 2)
+    q_vectors = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    cases = [
+        (f, v, RealEstateQuery(cypher_variables=CypherVariables(**f), abstract_requirements=["bench"]))
+        for f, v in zip(filters, q_vectors)
+    ]
+
+    def columnar_filter(case):
+        snapshot.filter(case[0], args.graph_limit)
+
+    def vector_search_filtered(case):
+        idx = snapshot.filter(case[0], args.graph_limit)
+        scores = snapshot.scores(case[1], idx, multi_vector=args.rooms > 0)
+        np.argsort(-scores)[:args.topk]
+
+    def vector_search_full(case):
+        scores = snapshot.listing @ (case[1] / np.linalg.norm(case[1]))
+        top = np.argpartition(-scores, args.topk)[:args.topk]
+        top[np.argsort(-scores[top])]
+
+    current = {}
+
+    async def fake_embed(text):
+        return current["q_emb"]
+
+    def hybrid(case):
+        current["q_emb"] = case[1]
+        loop.run_until_complete(hybrid_search(case[2], graph_limit=args.graph_limit, topk=args.topk,
+                                              multi_vector=args.rooms > 0, use_cache=False))
+
+    reranker = StubReranker()
+
+    def hybrid_rerank(case):
+        current["q_emb"] = case[1]
+        loop.run_until_complete(hybrid_search(case[2], graph_limit=args.graph_limit, topk=args.topk,
+                                              reranker=reranker, rerank_shortlist=args.rerank_shortlist,
+                                              multi_vector=args.rooms > 0, use_cache=False))
+
+    results = {}
+    for name, fn in (("columnar_filter", columnar_filter), ("vector_search_filtered", vector_search_filtered),
+                     ("vector_search_full", vector_search_full)):
+        results[name] = time_calls(fn, cases, args.min_repeat, args.budget)
+
+    original_embed, original_client = retriever.embed, retriever.neo4j_client
+    retriever.embed = fake_embed
+    try:
+        if args.backend == "neo4j":
+            loop.run_until_complete(load_into_neo4j(snapshot, args.load_batch))
+        else:
+            retriever.neo4j_client = InMemoryNeo4j(snapshot)
+        results[f"hybrid_search_{args.backend}"] = time_calls(hybrid, cases, args.min_repeat, args.budget)
+        results[f"hybrid_search_rerank_{args.backend}"] = time_calls(hybrid_rerank, cases, args.min_repeat,
+                                                                     args.budget)
+    finally:
+        retriever.embed, retriever.neo4j_client = original_embed, original_client
+    return results
+
+
+async def load_into_neo4j(snapshot: CatalogSnapshot, batch_size: int):
+    while (await neo4j_client.query(DELETE_SYNTHETIC_CYPHER))[0]["deleted"]:
+        pass
+    c = snapshot.columns
+    start = time.perf_counter()
+    for lo in range(0, len(snapshot), batch_size):
+        idx = np.arange(lo, min(lo + batch_size, len(snapshot)))
+        rows = snapshot_rows(snapshot, idx)
+        for i, row in zip(idx, rows):
+            row.update({k: str(c[k][i]) for k in ("city", "district", "street", "property_type")})
+            row.update({k: float(c[k][i]) for k in ("interior_area", "num_bathroom")})
+            row.update({k: int(c[k][i]) for k in ("num_bedroom", "property_age")})
+        # Stamped with the configured signature so FILTER_CYPHER treats the random vectors as current.
+        await neo4j_client.query(LOAD_SYNTHETIC_CYPHER, rows=rows, signature=embedding_signature())
+    print(f"Loaded {len(snapshot):,} synthetic properties into Neo4j in {time.perf_counter() - start:.1f}s")
+
+
+def run_key(size: int, args) -> str:
+    """Baseline key: every setting that changes what is timed."""
+    return (f"size={size} dim={args.dim} rooms={args.rooms} backend={args.backend} graph_limit={args.graph_limit} "
+            f"topk={args.topk} rerank_shortlist={args.rerank_shortlist}")
+
+
+def machine() -> dict:
+    return {
+        "system": platform.system(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    print("\n| benchmark | run | p50 ms | p95 ms | baseline p50 ms | change |")
+    print("|---|---|---|---|---|---|")
+    for key, benches in results.items():
+        for name, stats in benches.items():
+            base = baseline.get(key, {}).get(name)
+            change = ""
+            if base:
+                delta = stats["p50_ms"] - base["p50_ms"]
+                change = f"{delta / base['p50_ms']:+.1%}"
+                if delta > NOISE_FLOOR_MS and stats["p50_ms"] > base["p50_ms"] * (1 + tolerance):
+                    change += " REGRESSION"
+                    regressions.append(f"{name} @ {key}")
+            base_p50 = f"{base['p50_ms']:.3f}" if base else "-"
+            print(f"| {name} | {key} | {stats['p50_ms']:.3f} | {stats['p95_ms']:.3f} | {base_p50} | {change} |")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--rooms", type=int, default=0, help="Room vectors per property (multi-vector scoring)")
+    parser.add_argument("--graph-limit", type=int, default=200)
+    parser.add_argument("--topk", type=int, default=10)
+    parser.add_argument("--rerank-shortlist", type=int, default=RERANK_SHORTLIST_SIZE)
+    parser.add_argument("--queries", type=int, default=200, help="Distinct queries in the mix")
+    parser.add_argument("--min-repeat", type=int, default=30)
+    parser.add_argument("--budget", type=float, default=2.0, help="Seconds per benchmark after min-repeat")
+    parser.add_argument("--backend", choices=["memory", "neo4j"], default="memory")
+    parser.add_argument("--load-batch", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p50 slowdown vs baseline")
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    try:
+        results = {run_key(n, args): bench_size(n, args, loop) for n in args.sizes}
+    finally:
+        loop.run_until_complete(neo4j_client.close())
+        loop.close()
+
+    baseline = {"machine": None, "runs": {}}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    same_machine = baseline["machine"] == machine()
+    if baseline["runs"] and not same_machine:
+        print(f"\n[Warning] {args.baseline} was recorded on another machine ({baseline['machine']}); "
+              f"the comparison is indicative only. Record this machine's baseline with --save-baseline.")
+    regressions = compare(results, baseline["runs"], args.tolerance)
+
+    if args.save_baseline:
+        runs = {**baseline["runs"], **results} if same_machine else results
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"machine": machine(), "runs": runs}, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+    elif regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        if same_machine:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Throughput of room title classification (infrastructures/listing/room_taxonomy.py).
+
+Compares the keyword scan the raw_data_analyze script used (`any(k in title)` rule by rule, re-cleaning every
+title) with RoomTaxonomy's single compiled scan, cold and memoized. Titles are the rematch room titles, sampled
+with replacement to the requested stream length, so the memo sees the repetition real data has. Also checks that
+both classifiers agree on every distinct title.
+"""
+import argparse
+import glob
+import os
+import random
+import time
+
+from infrastructures.listing.room_taxonomy import RULES, UNCLASSIFIED, RoomTaxonomy, clean_room_title
+from infrastructures.serialization import json_codec
+
+REMATCH_DATA_DIR = "../../data/vlm_rematch_twhg_with_latlng_and_places/"
+
+
+def keyword_scan(title: str) -> str:
+    cleaned = clean_room_title(title)
+    for rule in RULES:
+        if any(k in cleaned for k in rule.keywords) and not any(u in cleaned for u in rule.unless):
+            return rule.category
+    return UNCLASSIFIED
+
+
+def load_titles(directory: str) -> list[str]:
+    titles = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        for item in json_codec.load_file(path).get("matching_result_list", []):
+            room = (item.get("extracted_feature") or {}).get("room")
+            if room:
+                titles.append(room)
+    return titles
+
+
+def throughput(fn, titles: list[str]) -> float:
+    start = time.perf_counter()
+    fn(titles)
+    return len(titles) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--titles", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000])
+    args = parser.parse_args()
+
+    taxonomy = RoomTaxonomy()
+    distinct = sorted(set(load_titles(REMATCH_DATA_DIR)))
+    mismatches = [t for t in distinct if keyword_scan(t) != taxonomy.resolve(clean_room_title(t))]
+    print(f"{len(distinct)} distinct titles, {len(mismatches)} classified differently")
+
+    print("| titles | keyword scan /s | compiled, cold /s | compiled, memoized /s |")
+    print("|---|---|---|---|")
+    rng = random.Random(0)
+    for n in args.titles:
+        stream = rng.choices(distinct, k=n)
+        scan = throughput(lambda ts: [keyword_scan(t) for t in ts], stream[:100_000])
+        cold = throughput(lambda ts: [taxonomy.resolve(clean_room_title(t)) for t in ts], stream[:100_000])
+        memoized = throughput(RoomTaxonomy().classify_many, stream)
+        print(f"| {n:,} | {scan:,.0f} | {cold:,.0f} | {memoized:,.0f} |")
+
+
+if __name__ == "__main__":
+    main()
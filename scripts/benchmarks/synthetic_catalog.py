@@ -0,0 +1,119 @@
+"""
+Synthetic Property catalogs for scaling benchmarks.
+
+Attribute distributions follow the Kaohsiung sample listings (Nanzi-heavy district mix, condo/townhouse
+split, lognormal prices and areas); embeddings are random unit vectors. `generate_snapshot` builds the
+columnar CatalogSnapshot directly, so a 1M-property catalog takes seconds rather than minutes.
+"""
+import numpy as np
+
+from infrastructures.neo4j.catalog_snapshot import CatalogSnapshot
+
+CITY = "高雄市"
+DISTRICTS = {
+    "楠梓區": 0.20, "三民區": 0.10, "苓雅區": 0.09, "左營區": 0.09, "鳳山區": 0.09, "前鎮區": 0.07,
+    "小港區": 0.06, "鼓山區": 0.06, "橋頭區": 0.04, "大社區": 0.04, "仁武區": 0.04, "前金區": 0.03,
+    "新興區": 0.03, "燕巢區": 0.03, "岡山區": 0.03,
+}
+STREETS_PER_DISTRICT = 40
+STREET_SUFFIXES = ("路", "街", "一路", "二路", "三路")
+# property_type -> (share, median interior ping, median age, price per ping in TWD)
+PROPERTY_TYPES = {
+    "condo": (0.44, 26.0, 12, 420_000),
+    "townhouse": (0.30, 42.0, 25, 330_000),
+    "apartment": (0.14, 24.0, 35, 260_000),
+    "walkup": (0.12, 22.0, 38, 230_000),
+}
+FILTERABLE_TYPES = ("condo", "townhouse")
+
+
+def generate_snapshot(n: int, dim: int = 256, rooms_per_property: int = 0, seed: int = 0) -> CatalogSnapshot:
+    rng = np.random.default_rng(seed)
+
+    districts = np.array(list(DISTRICTS))
+    district = rng.choice(districts, size=n, p=np.array(list(DISTRICTS.values())) / sum(DISTRICTS.values()))
+    street_no = rng.integers(0, STREETS_PER_DISTRICT, size=n)
+    suffix = np.array(STREET_SUFFIXES)[street_no % len(STREET_SUFFIXES)]
+    street = np.char.add(np.char.add(np.char.add(np.char.replace(district, "區", ""), "第"), street_no.astype(str)), suffix)
+
+    types = np.array(list(PROPERTY_TYPES))
+    shares = np.array([v[0] for v in PROPERTY_TYPES.values()])
+    type_idx = rng.choice(len(types), size=n, p=shares / shares.sum())
+    median_area = np.array([v[1] for v in PROPERTY_TYPES.values()])[type_idx]
+    median_age = np.array([v[2] for v in PROPERTY_TYPES.values()])[type_idx]
+    price_per_ping = np.array([v[3] for v in PROPERTY_TYPES.values()])[type_idx]
+
+    interior_area = np.round(median_area * rng.lognormal(0.0, 0.35, size=n), 2)
+    property_age = np.clip(np.round(median_age * rng.lognormal(0.0, 0.6, size=n)), 0, 60)
+    num_bedroom = np.clip(np.round(interior_area / 10 + rng.normal(0, 0.8, size=n)), 0, 8)
+    num_bathroom = np.clip(np.round(num_bedroom * 0.6 + rng.normal(0.5, 0.5, size=n)), 1, 6)
+    total_price = np.round(interior_area * price_per_ping * rng.lognormal(0.0, 0.25, size=n), -4)
+
+    ids = np.char.add("SYN", np.char.zfill(np.arange(n).astype(str), 8))
+    columns = {
+        "property_id": ids,
+        "title": np.char.add(np.char.add(district, " "), types[type_idx]),
+        "city": np.full(n, CITY),
+        "district": district,
+        "street": street,
+        "property_type": types[type_idx],
+        "street_key": np.char.add(np.char.add(CITY, district), street),
+        "total_price": total_price.astype(np.float64),
+        "interior_area": interior_area.astype(np.float64),
+        "num_bedroom": num_bedroom.astype(np.float64),
+        "num_bathroom": num_bathroom.astype(np.float64),
+        "property_age": property_age.astype(np.float64),
+    }
+
+    listing = rng.standard_normal((n, dim), dtype=np.float32)
+    listing /= np.linalg.norm(listing, axis=1, keepdims=True)
+    rooms = rng.standard_normal((n * rooms_per_property, dim), dtype=np.float32)
+    rooms /= np.linalg.norm(rooms, axis=1, keepdims=True) + 1e-12
+    room_offsets = np.arange(n + 1, dtype=np.int64) * rooms_per_property
+    return CatalogSnapshot(columns, listing, np.ones(n, dtype=bool), rooms, room_offsets)
+
+
+def sample_cypher_variables(snapshot: CatalogSnapshot, n_queries: int, seed: int = 1) -> list[dict]:
+    """Query mix shaped like extracted intents: most pin a district, about half a budget, fewer the rest."""
+    rng = np.random.default_rng(seed)
+    c = snapshot.columns
+    queries = []
+    for _ in range(n_queries):
+        anchor = int(rng.integers(len(snapshot)))
+        price = c["total_price"][anchor]
+        q = {
+            "city": CITY if rng.random() < 0.8 else None,
+            "district": str(c["district"][anchor]) if rng.random() < 0.6 else None,
+            "street": str(c["street"][anchor])[-3:] if rng.random() < 0.05 else None,
+            "min_price": int(price * 0.7) if rng.random() < 0.3 else None,
+            "max_price": int(price * 1.3) if rng.random() < 0.5 else None,
+            "min_interior_area": float(c["interior_area"][anchor] * 0.8) if rng.random() < 0.2 else None,
+            "min_bedroom": int(c["num_bedroom"][anchor]) if rng.random() < 0.4 else None,
+            "min_bathroom": int(c["num_bathroom"][anchor]) if rng.random() < 0.15 else None,
+            # Intents can only name the types PropertyTypeEnum knows.
+            "property_type": str(c["property_type"][anchor])
+            if rng.random() < 0.3 and c["property_type"][anchor] in FILTERABLE_TYPES else None,
+            "min_age": None,
+            "max_age": int(c["property_age"][anchor] + 5) if rng.random() < 0.2 else None,
+        }
+        queries.append(q)
+    return queries
+
+
+def snapshot_rows(snapshot: CatalogSnapshot, idx: np.ndarray, with_embeddings: bool = True) -> list[dict]:
+    """Neo4j-shaped row dicts (as FILTER_CYPHER / EXPORT_SNAPSHOT_CYPHER return them) for `idx`."""
+    c = snapshot.columns
+    rows = []
+    for i in idx:
+        row = {
+            "property_id": str(c["property_id"][i]),
+            "title": str(c["title"][i]),
+            "total_price": float(c["total_price"][i]),
+            "street_key": str(c["street_key"][i]),
+        }
+        if with_embeddings:
+            row["embedding"] = snapshot.listing[i].tolist()
+            start, end = snapshot.room_offsets[i], snapshot.room_offsets[i + 1]
+            row["room_embeddings"] = snapshot.rooms[start:end].ravel().tolist() or None
+        rows.append(row)
+    return rows
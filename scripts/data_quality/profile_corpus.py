@@ -0,0 +1,345 @@
+"""
+Data-quality profile of the raw listing corpus.
+
+Raw files are parsed in parallel into one Arrow table with a fixed profile schema (a "filled" flag per listing field,
+numeric fields coerced to float with a flag for unparseable values, tag lists and room-parse counts). Every statistic
+is then computed column-wise on that table:
+
+- fill rate of every listing field (None, "", [] and {} count as empty)
+- numeric fields that could not be parsed
+- outliers: Tukey fences on price per 坪, areas, age and the public area ratio, plus hard inconsistencies the
+  cleaner would otherwise drop silently (interior area > gross area, floor > total floors, ...)
+- tag cardinalities (room tags, room names, environment tags)
+- room-parse failures: "Tags:" blocks in the description that FEATURE_PATTERN did not turn into a room
+
+  python profile_corpus.py                                        # raw corpus -> reports/data_quality/
+  python profile_corpus.py --save-table ../../data/profile.parquet
+  python profile_corpus.py --input ../../data/profile.parquet     # re-profile a saved table without re-parsing
+"""
+import argparse
+import glob
+import html
+import json
+import math
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from infrastructures.listing.parser import parse_description
+from infrastructures.listing.records import to_float
+from infrastructures.serialization import json_codec
+
+INPUT_DIR = "../../data/twhg_with_latlng_and_places/"
+REPORT_JSON_FILE = "../../reports/data_quality/profile.json"
+REPORT_HTML_FILE = "../../reports/data_quality/profile.html"
+
+CHUNK_SIZE = 512
+NUMERIC_FIELDS = ("total_price", "gross_area", "interior_area", "land_ownership_area", "property_age", "floor",
+                  "total_floors", "num_bedroom", "num_bathroom", "num_living_room")
+STRING_FIELDS = ("property_id", "city", "district", "property_type", "property_usage")
+TAG_FIELDS = ("environment_tags", "environment_tags_facilities")
+FILLED_PREFIX = "filled."
+INVALID_PREFIX = "invalid."
+# Values outside [q1 - k * IQR, q3 + k * IQR]; 3 is Tukey's "far out".
+FENCE_K = 3.0
+TOP_N = 20
+SAMPLE_IDS = 10
+
+TAGS_MARKER = re.compile(r"Tags:", re.IGNORECASE)
+
+# Columns every profile table has; the "filled." columns depend on the listing keys seen and are added per chunk.
+BASE_SCHEMA = pa.schema(
+    [pa.field(f, pa.float64()) for f in NUMERIC_FIELDS]
+    + [pa.field(INVALID_PREFIX + f, pa.bool_()) for f in NUMERIC_FIELDS]
+    + [pa.field(f, pa.string()) for f in STRING_FIELDS]
+    + [pa.field(f, pa.list_(pa.string())) for f in (*TAG_FIELDS, "room_names", "room_tags")]
+    + [pa.field(f, pa.int64()) for f in ("tag_blocks", "rooms_parsed", "rooms_with_tags", "picture_count")]
+)
+
+
+def is_filled(value) -> bool:
+    return value is not None and value != "" and value != [] and value != {}
+
+
+def profile_row(data: dict) -> dict | None:
+    listing = data.get("listing")
+    if not isinstance(listing, dict):
+        return None
+    row = {FILLED_PREFIX + k: is_filled(v) for k, v in listing.items()}
+    for field in NUMERIC_FIELDS:
+        value = listing.get(field)
+        number = to_float(value)
+        row[field] = number
+        row[INVALID_PREFIX + field] = is_filled(value) and number is None
+    for field in STRING_FIELDS:
+        value = listing.get(field)
+        row[field] = None if value is None else str(value)
+    for field in TAG_FIELDS:
+        row[field] = [str(t) for t in listing.get(field) or [] if t is not None]
+
+    description = listing.get("description") or ""
+    parsed = parse_description(description)
+    row["tag_blocks"] = len(TAGS_MARKER.findall(description))
+    row["rooms_parsed"] = len(parsed.room_features)
+    row["rooms_with_tags"] = sum(1 for f in parsed.room_features if f.tag_list)
+    row["room_names"] = [f.room for f in parsed.room_features]
+    row["room_tags"] = [t for f in parsed.room_features for t in f.tag_list]
+    row["picture_count"] = len(listing.get("picture_list") or [])
+    return row
+
+
+def profile_chunk(paths: list[str]) -> pa.Table | None:
+    """Pool task: one Arrow table for a chunk of raw files."""
+    rows = []
+    for path in paths:
+        try:
+            row = profile_row(json_codec.load_file(path))
+        except Exception as e:
+            print(f"[Error] Failed to read {path}: {e}")
+            continue
+        if row is not None:
+            rows.append(row)
+    if not rows:
+        return None
+    # from_pylist would take the columns from the first row only and type an all-null column as null, so the schema
+    # is explicit: the union of the listing keys across the chunk, and fixed types for the rest.
+    filled = sorted({name for row in rows for name in row if name.startswith(FILLED_PREFIX)})
+    schema = pa.schema([pa.field(name, pa.bool_()) for name in filled] + list(BASE_SCHEMA))
+    absent = dict.fromkeys(filled, False)
+    return pa.Table.from_pylist([absent | row for row in rows], schema=schema)
+
+
+def load_table(input_path: str, workers: int) -> pa.Table:
+    if os.path.isfile(input_path):
+        table = pq.read_table(input_path)
+        return table.cast(pa.schema([BASE_SCHEMA.field(f.name) if f.name in BASE_SCHEMA.names else f
+                                     for f in table.schema]))
+    paths = sorted(glob.glob(os.path.join(input_path, "*.json")))
+    chunks = [paths[i:i + CHUNK_SIZE] for i in range(0, len(paths), CHUNK_SIZE)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        tables = [t for t in executor.map(profile_chunk, chunks) if t is not None]
+    # A field that is absent from a whole chunk only exists in other chunks; permissive promotion fills it with null.
+    if not tables:
+        raise SystemExit(f"No listings found in {input_path}")
+    table = pa.concat_tables(tables, promote_options="permissive")
+    return pa.Table.from_arrays(
+        [pc.fill_null(table[name], False) if name.startswith(FILLED_PREFIX) else table[name]
+         for name in table.column_names],
+        names=table.column_names,
+    )
+
+
+def _rate(count: int, total: int) -> float:
+    return round(count / total, 4) if total else 0.0
+
+
+def _sample_ids(table: pa.Table, mask: pa.ChunkedArray) -> list[str]:
+    return table.filter(mask)["property_id"].slice(0, SAMPLE_IDS).to_pylist()
+
+
+def field_fill_rates(table: pa.Table) -> list[dict]:
+    n = table.num_rows
+    rows = []
+    for name in table.column_names:
+        if name.startswith(FILLED_PREFIX):
+            filled = pc.sum(table[name]).as_py() or 0
+            rows.append({"field": name[len(FILLED_PREFIX):], "filled": filled, "empty_rate": _rate(n - filled, n)})
+    return sorted(rows, key=lambda r: (-r["empty_rate"], r["field"]))
+
+
+def invalid_numbers(table: pa.Table) -> list[dict]:
+    n = table.num_rows
+    rows = []
+    for field in NUMERIC_FIELDS:
+        mask = table[INVALID_PREFIX + field]
+        count = pc.sum(mask).as_py() or 0
+        rows.append({"field": field, "unparseable": count, "rate": _rate(count, n),
+                     "sample_ids": _sample_ids(table, mask) if count else []})
+    return rows
+
+
+def derived_columns(table: pa.Table) -> dict[str, pa.ChunkedArray]:
+    gross, interior = table["gross_area"], table["interior_area"]
+    positive_gross = pc.if_else(pc.greater(gross, 0), gross, None)
+    return {
+        "total_price": table["total_price"],
+        "gross_area": gross,
+        "interior_area": interior,
+        "property_age": table["property_age"],
+        "price_per_ping": pc.divide(table["total_price"], positive_gross),
+        "public_area_ratio": pc.divide(pc.subtract(gross, interior), positive_gross),
+    }
+
+
+def fence_outliers(table: pa.Table) -> list[dict]:
+    """Tukey fences per column; price-like columns are fenced on a log scale because they are heavily skewed."""
+    rows = []
+    for name, values in derived_columns(table).items():
+        log_scale = name in ("total_price", "price_per_ping", "gross_area", "interior_area")
+        scaled = pc.ln(pc.if_else(pc.greater(values, 0), values, None)) if log_scale else values
+        n = pc.count(scaled).as_py()
+        if not n:
+            continue
+        q1, q3 = pc.quantile(scaled, q=[0.25, 0.75]).to_pylist()
+        iqr = q3 - q1
+        low, high = q1 - FENCE_K * iqr, q3 + FENCE_K * iqr
+        mask = pc.fill_null(pc.or_(pc.less(scaled, low), pc.greater(scaled, high)), False)
+        count = pc.sum(mask).as_py() or 0
+        to_value = math.exp if log_scale else float
+        rows.append({
+            "column": name,
+            "values": n,
+            "median": round(pc.approximate_median(values).as_py(), 4),
+            "fence_low": round(to_value(low), 4),
+            "fence_high": round(to_value(high), 4),
+            "outliers": count,
+            "rate": _rate(count, n),
+            "sample_ids": _sample_ids(table, mask) if count else [],
+        })
+    return rows
+
+
+def consistency_checks(table: pa.Table) -> list[dict]:
+    """Values that cannot be right; the cleaner drops the public area ratio for the first two without a word."""
+    gross, interior = table["gross_area"], table["interior_area"]
+    derived = derived_columns(table)
+    checks = {
+        "gross_area <= 0": pc.less_equal(gross, 0),
+        "interior_area > gross_area": pc.greater(interior, gross),
+        "public_area_ratio > 0.6": pc.greater(derived["public_area_ratio"], 0.6),
+        "floor > total_floors": pc.greater(table["floor"], table["total_floors"]),
+        "total_price <= 0": pc.less_equal(table["total_price"], 0),
+        "property_age < 0": pc.less(table["property_age"], 0),
+        "num_bedroom > 20": pc.greater(table["num_bedroom"], 20),
+    }
+    rows = []
+    for name, mask in checks.items():
+        mask = pc.fill_null(mask, False)
+        count = pc.sum(mask).as_py() or 0
+        rows.append({"check": name, "count": count, "rate": _rate(count, table.num_rows),
+                     "sample_ids": _sample_ids(table, mask) if count else []})
+    return rows
+
+
+def cardinality(table: pa.Table, column: str) -> dict:
+    values = pc.list_flatten(table[column])
+    counts = pc.value_counts(values)
+    top = counts.take(pc.array_sort_indices(counts.field("counts"), order="descending")[:TOP_N])
+    return {
+        "column": column,
+        "total": len(values),
+        "distinct": len(counts),
+        "singletons": pc.sum(pc.equal(counts.field("counts"), 1)).as_py() or 0,
+        "listings_without": pc.sum(pc.equal(pc.list_value_length(table[column]), 0)).as_py() or 0,
+        "top": [{"value": v, "count": c} for v, c in zip(top.field("values").to_pylist(),
+                                                           top.field("counts").to_pylist())],
+    }
+
+
+def room_parse(table: pa.Table) -> dict:
+    blocks, parsed = table["tag_blocks"], table["rooms_parsed"]
+    with_blocks = pc.greater(blocks, 0)
+    unparsed = pc.and_(with_blocks, pc.equal(parsed, 0))
+    total_blocks = pc.sum(blocks).as_py() or 0
+    missed = pc.sum(pc.max_element_wise(pc.subtract(blocks, parsed), 0)).as_py() or 0
+    return {
+        "listings": table.num_rows,
+        "listings_without_tag_blocks": table.num_rows - (pc.sum(with_blocks).as_py() or 0),
+        "tag_blocks": total_blocks,
+        "rooms_parsed": pc.sum(parsed).as_py() or 0,
+        "rooms_without_tags": pc.sum(pc.subtract(parsed, table["rooms_with_tags"])).as_py() or 0,
+        "blocks_not_parsed": missed,
+        "block_failure_rate": _rate(missed, total_blocks),
+        "listings_with_blocks_but_no_rooms": pc.sum(unparsed).as_py() or 0,
+        "sample_ids": _sample_ids(table, unparsed),
+    }
+
+
+def profile(table: pa.Table) -> dict:
+    return {
+        "listings": table.num_rows,
+        "fields": field_fill_rates(table),
+        "unparseable_numbers": invalid_numbers(table),
+        "outliers": fence_outliers(table),
+        "consistency": consistency_checks(table),
+        "cardinality": [cardinality(table, c) for c in ("room_tags", "room_names", *TAG_FIELDS)],
+        "room_parse": room_parse(table),
+    }
+
+
+def _table_html(title: str, rows: list[dict], columns: list[str]) -> str:
+    head = "".join(f"<th>{html.escape(c)}</th>" for c in columns)
+    body = "".join(
+        "<tr>" + "".join(f"<td>{html.escape(_cell(r.get(c)))}</td>" for c in columns) + "</tr>" for r in rows
+    )
+    return f"<h2>{html.escape(title)}</h2><table><tr>{head}</tr>{body}</table>"
+
+
+def _cell(value) -> str:
+    if isinstance(value, list):
+        return ", ".join(_cell(v) if not isinstance(v, dict) else f"{v['value']} ({v['count']})" for v in value)
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return "" if value is None else str(value)
+
+
+def render_html(report: dict) -> str:
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Listing Corpus Data-Quality Profile</title>",
+        "<style>body{font-family:sans-serif}table{border-collapse:collapse;margin-bottom:2em}"
+        "td,th{border:1px solid #ccc;padding:4px 8px;text-align:right}th{background:#f3f3f3}</style></head><body>",
+        f"<h1>Listing Corpus Data-Quality Profile</h1><p>{report['listings']} listings</p>",
+        _table_html("Room parsing", [report["room_parse"]], list(report["room_parse"])),
+        _table_html("Consistency checks", report["consistency"], ["check", "count", "rate", "sample_ids"]),
+        _table_html("Outliers (Tukey fences)", report["outliers"],
+                    ["column", "values", "median", "fence_low", "fence_high", "outliers", "rate", "sample_ids"]),
+        _table_html("Unparseable numbers", report["unparseable_numbers"], ["field", "unparseable", "rate",
+                                                                          "sample_ids"]),
+        _table_html("Tag cardinality", report["cardinality"],
+                    ["column", "total", "distinct", "singletons", "listings_without", "top"]),
+        _table_html("Field fill rates", report["fields"], ["field", "filled", "empty_rate"]),
+        "</body></html>",
+    ]
+    return "\n".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", default=INPUT_DIR, help="Raw JSON directory, or a table saved with --save-table")
+    parser.add_argument("--save-table", default=None, metavar="PARQUET", help="Also save the profile table")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = load_table(args.input, args.workers)
+    load_seconds = time.perf_counter() - start
+    if args.save_table:
+        pq.write_table(table, args.save_table, compression="zstd")
+
+    start = time.perf_counter()
+    report = profile(table)
+    profile_seconds = time.perf_counter() - start
+
+    os.makedirs(os.path.dirname(REPORT_JSON_FILE), exist_ok=True)
+    with open(REPORT_JSON_FILE, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    with open(REPORT_HTML_FILE, "w", encoding="utf-8") as f:
+        f.write(render_html(report))
+
+    parse = report["room_parse"]
+    print(f"Loaded {table.num_rows} listings in {load_seconds:.2f}s, profiled in {profile_seconds:.2f}s")
+    print(f"Room parsing: {parse['blocks_not_parsed']}/{parse['tag_blocks']} tag blocks not parsed, "
+          f"{parse['listings_with_blocks_but_no_rooms']} listings with blocks but no rooms")
+    for row in report["consistency"]:
+        if row["count"]:
+            print(f"  {row['check']}: {row['count']}")
+    print(f"Report saved to {REPORT_JSON_FILE} and {REPORT_HTML_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Build the columnar dataset store (DATASET_STORE_DIR) from the per-property JSON directories.
+
+Tables, all keyed by property_id:
+  properties   one row per listing (typed columns + listing_extra JSON for the long tail of crawler fields)
+  rooms        one row per description room block (tag list and raw tag line)
+  images       one row per listing picture, with its VLM rematch result when it was matched
+  questions    golden testing questions, one row per question, `dataset` = v1 / v2 / ...
+  evaluations  VLM-as-a-judge scores, `judge` = vlm_as_a_judge / vlm_with_spatial_signals
+
+  python build_dataset_store.py             # rebuild every table, then compare size and load time with the JSON
+"""
+import argparse
+import glob
+import os
+import time
+
+from infrastructures.dataset_store.builder import build_tables
+from infrastructures.dataset_store.store import DatasetStore
+from infrastructures.listing.room_taxonomy import room_taxonomy
+from infrastructures.serialization import json_codec
+
+RAW_DATA_DIR = "../../data/twhg_with_latlng_and_places/"
+REMATCH_DATA_DIR = "../../data/vlm_rematch_add_info_twhg_with_latlng_and_places/"
+QUESTION_DATA_DIRS = {
+    "v1": "../../data/v1_testing_dataset_twhg_with_latlng_and_places/",
+    "v2": "../../data/v2_testing_dataset_twhg_with_latlng_and_places/",
+    "latest": "../../data/testing_dataset_twhg_with_latlng_and_places/",
+}
+JUDGE_DATA_DIRS = {
+    "vlm_as_a_judge": "../../data/vlm_tag_quality_service/vlm_as_a_judge/",
+    "vlm_with_spatial_signals": "../../data/vlm_tag_quality_service/vlm_with_spatial_signals_info_as_a_judge/",
+}
+
+
+def source_files() -> list[str]:
+    dirs = [RAW_DATA_DIR, REMATCH_DATA_DIR, *QUESTION_DATA_DIRS.values(), *JUDGE_DATA_DIRS.values()]
+    return [path for d in dirs for path in glob.glob(os.path.join(d, "*.json"))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--root", default=None, help="Store directory (default: DATASET_STORE_DIR)")
+    args = parser.parse_args()
+
+    store = DatasetStore(args.root) if args.root else DatasetStore()
+    start = time.perf_counter()
+    # The previous build's room_categories table warms the classifier, as long as the taxonomy rules are unchanged.
+    room_taxonomy.seed(store.room_category_dictionary(room_taxonomy.signature))
+    tables = build_tables(RAW_DATA_DIR, REMATCH_DATA_DIR, QUESTION_DATA_DIRS, JUDGE_DATA_DIRS)
+    for name, rows in tables.items():
+        store.write(name, rows)
+        print(f"{name:15s} {len(rows):8d} rows")
+    print(f"Built {store.root} in {time.perf_counter() - start:.2f}s")
+
+    files = source_files()
+    json_bytes = sum(os.path.getsize(p) for p in files)
+    start = time.perf_counter()
+    for path in files:
+        json_codec.load_file(path)
+    json_ms = (time.perf_counter() - start) * 1000
+
+    store_bytes = sum(store.disk_usage().values())
+    start = time.perf_counter()
+    for name in store.names:
+        store.read(name)
+    store_ms = (time.perf_counter() - start) * 1000
+
+    print(f"JSON directories: {len(files)} files, {json_bytes / 1e6:.2f} MB, parsed in {json_ms:.1f} ms")
+    print(f"Parquet store:    {len(store.names)} tables, {store_bytes / 1e6:.2f} MB, read in {store_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Run the data pipeline as a DAG instead of script by script.
+
+Each stage declares the files it reads, the files it writes and the code it depends on. A stage reruns only when
+that content (or an upstream stage) changed since its last successful run, or when its outputs were modified or
+removed; independent branches (the Task 1 Neo4j branch and the Task 2 VLM branch) run concurrently.
+
+  python run_pipeline.py                         # everything that is out of date
+  python run_pipeline.py evaluate                # evaluate and the stages it depends on
+  python run_pipeline.py --dry-run               # show what would run
+  python run_pipeline.py judge --force rematch   # rerun rematch even if cached, then whatever it invalidates
+
+Every stage after `changes` runs with `--delta`: `changes` records which raw listings were added, changed or removed
+(infrastructures/pipeline/change_feed.py) and each stage processes only those, so a daily crawl costs in proportion
+to listing churn rather than catalog size. `--force` reruns a stage on whatever delta it has not consumed; to rebuild
+everything (e.g. after resetting Neo4j or deleting an output directory) delete data/.pipeline/changes, which makes
+every listing new again.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from infrastructures.pipeline.runner import Pipeline, Stage
+
+REPO_ROOT = os.path.abspath("../../")
+STATE_FILE = os.path.join(REPO_ROOT, "data/.pipeline/state.json")
+
+RAW_DIR = "data/twhg_with_latlng_and_places"
+CLEANED_DIR = "data/cleaned_twhg_with_latlng_and_places"
+REMATCH_DIR = "data/vlm_rematch_twhg_with_latlng_and_places"
+REMATCH_ADD_INFO_DIR = "data/vlm_rematch_add_info_twhg_with_latlng_and_places"
+TESTING_DATASET_DIR = "data/testing_dataset_twhg_with_latlng_and_places"
+
+STAGES = [
+    Stage(
+        name="changes",
+        script="scripts/pipeline/scan_changes.py",
+        inputs=[RAW_DIR],
+        code=["infrastructures/pipeline/change_feed.py"],
+    ),
+    # Task 1: property retrieval
+    Stage(
+        name="clean",
+        script="scripts/property_search_recommendation/clean_raw_data.py",
+        args=["--delta"],
+        inputs=[RAW_DIR],
+        outputs=[CLEANED_DIR],
+        code=["infrastructures/listing", "infrastructures/serialization"],
+        deps=["changes"],
+    ),
+    Stage(
+        name="import",
+        script="scripts/property_search_recommendation/import_properties.py",
+        args=["--delta"],
+        inputs=[CLEANED_DIR],
+        code=["infrastructures/neo4j"],
+        deps=["clean"],
+    ),
+    Stage(
+        name="embed",
+        script="scripts/property_search_recommendation/embed_properties_openai.py",
+        args=["--delta"],
+        code=["infrastructures/embedding", "infrastructures/neo4j", "config.py"],
+        deps=["import"],
+    ),
+    Stage(
+        name="evaluate",
+        script="scripts/property_search_recommendation/task_1_end_2_end_test.py",
+        args=["--fresh"],
+        inputs=[TESTING_DATASET_DIR],
+        outputs=["reports/task_1"],
+        code=["services/property_search_recommendation", "infrastructures/neo4j", "infrastructures/llm",
+              "infrastructures/results", "config.py"],
+        deps=["embed"],
+    ),
+    # Task 2: VLM tag quality
+    Stage(
+        name="rematch",
+        script="scripts/vlm_tag_quality_service/vlm_tag_data_rematching.py",
+        args=["--delta"],
+        inputs=[CLEANED_DIR],
+        outputs=[REMATCH_DIR],
+        deps=["clean"],
+    ),
+    Stage(
+        name="add_raw_description",
+        script="scripts/vlm_tag_quality_service/add_raw_description.py",
+        args=["--delta"],
+        inputs=[REMATCH_DIR, RAW_DIR],
+        outputs=[REMATCH_ADD_INFO_DIR],
+        code=["infrastructures/listing", "infrastructures/serialization"],
+        deps=["rematch"],
+    ),
+    Stage(
+        name="judge",
+        script="scripts/vlm_tag_quality_service/vlm_as_a_judge_evalution.py",
+        args=["--delta"],
+        inputs=[REMATCH_ADD_INFO_DIR],
+        outputs=["data/vlm_tag_quality_service/vlm_as_a_judge"],
+        code=["services/vlm_tag_quality_service", "infrastructures/llm"],
+        deps=["add_raw_description"],
+    ),
+    Stage(
+        name="spatial_judge",
+        script="scripts/vlm_tag_quality_service/vlm_with_spatial_signals_as_a_judge_evaluation.py",
+        args=["--delta"],
+        inputs=[REMATCH_ADD_INFO_DIR],
+        outputs=["data/vlm_tag_quality_service/vlm_with_spatial_signals_info_as_a_judge"],
+        code=["services/vlm_tag_quality_service", "infrastructures/llm"],
+        deps=["add_raw_description"],
+    ),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("targets", nargs="*", help="Stages to bring up to date (default: all)")
+    parser.add_argument("--force", nargs="+", default=[], metavar="STAGE", help="Rerun these stages even if cached")
+    parser.add_argument("--jobs", type=int, default=4, help="Stages running at the same time")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    pipeline = Pipeline(STAGES, REPO_ROOT, STATE_FILE)
+    start = time.perf_counter()
+    status = asyncio.run(pipeline.run(args.targets, set(args.force), args.jobs, args.dry_run))
+
+    print(f"\n{'Stage':<22}Status")
+    for name, state in status.items():
+        print(f"{name:<22}{state}")
+    print(f"Finished in {time.perf_counter() - start:.1f}s")
+    if any(state in ("failed", "blocked") for state in status.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Record which raw listings were added, changed or removed since the last scan (infrastructures/pipeline/change_feed.py).
+
+Stages run with `--delta` then process only those listings:
+
+  python scan_changes.py
+  python scan_changes.py --status     # batches seen and how far each stage has consumed the feed
+"""
+import argparse
+import os
+import time
+from collections import Counter
+
+from infrastructures.pipeline.change_feed import ChangeFeed
+
+RAW_DIR = "../../data/twhg_with_latlng_and_places/"
+
+
+def print_status(feed: ChangeFeed):
+    manifest = feed.manifest()
+    print(f"Change sets: {manifest['seq']}, files tracked: {len(manifest['files'])}")
+    for batch_id, batch in sorted(manifest["batches"].items(), key=lambda b: b[1]["first_seq"]):
+        print(f"  batch {batch_id} ({batch['batch_timestamp']}): {batch['files']} files, "
+              f"first seen in change set {batch['first_seq']}")
+    if os.path.isdir(feed.checkpoint_dir):
+        for name in sorted(os.listdir(feed.checkpoint_dir)):
+            consumer = os.path.splitext(name)[0]
+            checkpoint = feed.checkpoint(consumer)
+            print(f"  {consumer:<22}at change set {checkpoint['seq']}, {len(checkpoint['retry'])} to retry")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--status", action="store_true", help="Only print the feed status")
+    args = parser.parse_args()
+
+    feed = ChangeFeed()
+    if not args.status:
+        start = time.perf_counter()
+        changes = feed.scan(RAW_DIR)
+        counts = Counter(c.op for c in changes)
+        batches = sorted({c.batch_id for c in changes if not c.removed and c.batch_id})
+        print(f"Scanned {RAW_DIR} in {time.perf_counter() - start:.2f}s: {counts['added']} added, "
+              f"{counts['changed']} changed, {counts['removed']} removed"
+              + (f" (batches {', '.join(batches)})" if batches else ""))
+    print_status(feed)
+
+
+if __name__ == "__main__":
+    main()
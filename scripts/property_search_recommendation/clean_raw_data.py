@@ -1,172 +1,161 @@
+import argparse
 import glob
-import json
 import os
-import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from infrastructures.listing.records import Listing
+from infrastructures.pipeline.change_feed import ChangeFeed
+from infrastructures.serialization import json_codec
 
 INPUT_DIR = "../../data/twhg_with_latlng_and_places/"
 OUTPUT_DIR = "../../data/cleaned_twhg_with_latlng_and_places/"
+# Consolidated outputs (--output-format jsonl / parquet): one shard instead of one file per property.
+OUTPUT_SHARD = "../../data/cleaned_twhg_with_latlng_and_places"
+# Files per pool task; large enough that IPC overhead is noise next to parsing.
+CHUNK_SIZE = 256
 
 
-def extract_features_and_description(description_text: str):
-    """
-    Extract a description segment before the structured features and the feature list itself.
-    Returns: (description_before_features, extracted_feature_list)
-    """
-    extracted_feature_list = []
-
-    pattern = re.compile(r"(?:^|\n)(?:Image\s*)?\d+\s+([^\n,]+).*?Tags:\s*([^\n]+)", re.IGNORECASE)
-    first_match = None
-
-    for match in pattern.finditer(description_text):
-        if first_match is None:
-            first_match = match
-
-        room_raw = match.group(1).strip()
-        tags_raw = match.group(2).strip()
-
-        tag_list = []
-        if tags_raw:
-            for t in re.split(r'[、,]+', tags_raw):
-                tag_cleaned = re.sub(r'\(.*?\)', '', t).strip()
-                if tag_cleaned:
-                    tag_list.append(tag_cleaned)
-        if room_raw and tag_list:
-            extracted_feature_list.append({
-                "room": room_raw,
-                "tag_list": tag_list
-            })
-
-    if first_match:
-        description_before_features = description_text[:first_match.start()].strip()
-    else:
-        description_before_features = description_text.strip()
+def process_single_file(input_path, output_path, indent: bool = True):
+    """Read a single file, clean it, and write to the output path"""
+    try:
+        processed_item = Listing.from_raw(json_codec.load_file(input_path))
+        if processed_item is None:
+            # Not an error to retry: the listing is gone (the change feed logs it as removed), so is its output.
+            print(f"[Warning] No listing data in {input_path}")
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            return True
 
-    return description_before_features, extracted_feature_list
+        json_codec.dump_file(processed_item, output_path, indent=indent)
+        return True
 
+    except Exception as e:
+        print(f"[Error] Failed to process {input_path}: {e}")
+        return False
 
-def calculate_public_area_ratio(gross_area, interior_area):
-    """
-    Calculate the public area ratio (公設比) from gross and interior areas.
-    Returns a rounded float or None when calculation is not possible.
-    """
 
-    def to_float(value):
-        if value is None:
-            return None
-        if isinstance(value, (int, float)):
-            return float(value)
-        if isinstance(value, str):
-            normalized = value.replace(',', '').strip()
-            if not normalized:
-                return None
-            return float(normalized)
-        return None
+def clean_files(task: tuple[list[str], str, bool]) -> list[str]:
+    """Pool task: clean a chunk of files into OUTPUT_DIR; returns the names of the files that were not written."""
+    input_paths, output_dir, indent = task
+    return [
+        os.path.basename(path) for path in input_paths
+        if not process_single_file(path, os.path.join(output_dir, os.path.basename(path)), indent=indent)
+    ]
 
-    gross = to_float(gross_area)
-    interior = to_float(interior_area)
 
-    if gross is None or interior is None or gross <= 0:
-        return None
+def clean_records(input_paths: list[str]) -> list[Listing]:
+    """Pool task: clean a chunk of files and return the records (for consolidated shards)."""
+    records = []
+    for path in input_paths:
+        try:
+            record = Listing.from_raw(json_codec.load_file(path))
+        except Exception as e:
+            print(f"[Error] Failed to process {path}: {e}")
+            continue
+        if record is None:
+            print(f"[Warning] No listing data in {path}")
+        else:
+            records.append(record)
+    return records
 
-    public_area = gross - interior
-    if public_area < 0:
-        return None
 
-    return round(public_area / gross, 4)
+def clean_jsonl(input_paths: list[str]) -> bytes:
+    """Pool task: a chunk of cleaned records as JSONL bytes - cheaper to send back than pickled dicts."""
+    return b"".join(json_codec.dumps(r) + b"\n" for r in clean_records(input_paths))
 
 
-def process_single_file(input_path, output_path):
-    """Read a single file, clean it, and write to the output path"""
-    try:
-        with open(input_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+def chunked(items: list, size: int) -> list[list]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
 
-        listing = data.get('listing', {})
-        if not listing:
-            print(f"[Warning] No listing data in {input_path}")
-            return False
-
-        # Get the original description
-        raw_description = listing.get('description', '')
-
-        description_before_features, extracted_feature_list = extract_features_and_description(raw_description)
-
-        gross_area = listing.get('gross_area')
-        interior_area = listing.get('interior_area')
-
-        public_area_ratio = calculate_public_area_ratio(gross_area, interior_area)
-
-        processed_item = {
-            "original_url": data.get('url'),
-            "property_id": listing.get('property_id'),
-            "title": listing.get('title'),
-            "total_price": listing.get('total_price'),
-            "city": listing.get('city'),
-            "district": listing.get('district'),
-            "street": listing.get('street'),
-            "property_type": listing.get('property_type'),
-            "property_age": listing.get('property_age'),
-            "gross_area": gross_area,
-            "interior_area": interior_area,
-            "public_area_ratio": public_area_ratio,
-            "num_bedroom": listing.get('num_bedroom'),
-            "num_bathroom": listing.get('num_bathroom'),
-            "num_living_room": listing.get('num_living_room'),
-            "transportation": listing.get('transportation'),
-            "orientation": listing.get('orientation'),
-            "picture_list": listing.get('picture_list'),
-            "floor": listing.get('floor'),
-            "total_floors": listing.get('total_floors'),
-            "land_ownership_area": listing.get('land_ownership_area'),
-            "property_usage": listing.get('property_usage'),
-            "has_elevator": listing.get('has_elevator'),
-            "parking_type": listing.get('parking_type'),
-            "raw_description": raw_description,
-            "description": description_before_features,
-            "extracted_feature_list": extracted_feature_list
-        }
-
-        # Write to file
-        with open(output_path, "w", encoding="utf-8") as f_out:
-            json.dump(processed_item, f_out, ensure_ascii=False, indent=2)
 
-        return True
+def write_shard(chunks, shard_path: str) -> int:
+    """Combine cleaned record chunks (in input order) into one Parquet file."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
 
-    except Exception as e:
-        print(f"[Error] Failed to process {input_path}: {e}")
-        return False
+    count = 0
+    # Free-form nested fields are stored as JSON strings; chunks are combined with type promotion so a column that
+    # happens to be all-null in one chunk does not pin the schema.
+    json_columns = ("transportation", "picture_list", "extracted_feature_list")
+    tables = []
+    for records in chunks:
+        if records:
+            rows = [r.to_dict() for r in records]
+            for row in rows:
+                row.update({k: json_codec.dumps(row[k]).decode("utf-8") for k in json_columns})
+            tables.append(pa.Table.from_pylist(rows))
+            count += len(records)
+    if tables:
+        pq.write_table(pa.concat_tables(tables, promote_options="permissive"), shard_path, compression="zstd")
+    return count
 
 
 def main():
-    json_files = glob.glob(os.path.join(INPUT_DIR, "*.json"))
-    print(f"Found {len(json_files)} files in {INPUT_DIR}")
-
-    processed_count = 0
-    skipped_count = 0
-
-    # 3. Process each file
-    for input_path in json_files:
-        filename = os.path.basename(input_path)
-        output_path = os.path.join(OUTPUT_DIR, filename)
-
-        # Skip Logic: Check if output already exists
-        if os.path.exists(path=output_path):
-            skipped_count += 1
-            continue
-
-        # Process each file
-        success = process_single_file(input_path=input_path, output_path=output_path)
-        if success:
-            processed_count += 1
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output-format", choices=["files", "jsonl", "parquet"], default="files",
+                        help="One JSON file per property (default) or a single consolidated shard")
+    parser.add_argument("--compact", action="store_true", help="Write per-property files without indentation")
+    parser.add_argument("--overwrite", action="store_true", help="Re-clean files whose output already exists")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--delta", action="store_true",
+                        help="Only clean listings the change feed reports since the last --delta run "
+                             "(scripts/pipeline/scan_changes.py); removed listings are deleted")
+    args = parser.parse_args()
+    if args.delta and args.output_format != "files":
+        parser.error("--delta works on per-property files only")
+
+    feed = delta = None
+    if args.delta:
+        feed = ChangeFeed()
+        delta = feed.delta("clean")
+        json_files = [os.path.join(INPUT_DIR, c.file_name) for c in delta.upserts]
+        print(f"Change feed: {delta.summary()}")
+    else:
+        json_files = sorted(glob.glob(os.path.join(INPUT_DIR, "*.json")))
+    print(f"Found {len(json_files)} files in {INPUT_DIR} (JSON backend: {json_codec.backend}, "
+          f"{args.workers} workers)")
+    start = time.perf_counter()
+
+    if args.output_format == "files":
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        # Skip Logic: Check if output already exists (a changed listing always has one)
+        pending = [
+            path for path in json_files
+            if args.overwrite or args.delta or not os.path.exists(os.path.join(OUTPUT_DIR, os.path.basename(path)))
+        ]
+        skipped_count = len(json_files) - len(pending)
+        tasks = [(chunk, OUTPUT_DIR, not args.compact) for chunk in chunked(pending, CHUNK_SIZE)]
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            failed = [name for names in executor.map(clean_files, tasks) for name in names]
+        processed_count = len(pending) - len(failed)
+        output = OUTPUT_DIR
+        if delta:
+            removed_count = delta.remove_outputs(OUTPUT_DIR)
+            feed.commit(delta, failed)
+    else:
+        skipped_count = 0
+        output = f"{OUTPUT_SHARD}.{args.output_format}"
+        chunks = chunked(json_files, CHUNK_SIZE)
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            if args.output_format == "jsonl":
+                processed_count = 0
+                with open(output, "wb") as f:
+                    for data in executor.map(clean_jsonl, chunks):
+                        f.write(data)
+                        processed_count += data.count(b"\n")
+            else:
+                processed_count = write_shard(executor.map(clean_records, chunks), output)
 
     print("-" * 30)
-    print(f"Job Finished.")
+    print(f"Job Finished in {time.perf_counter() - start:.2f}s.")
     print(f"Total Files Found: {len(json_files)}")
     print(f"Processed New:     {processed_count}")
     print(f"Skipped Existing:  {skipped_count}")
-    print(f"Output Directory:  {OUTPUT_DIR}")
+    if delta:
+        print(f"Removed:           {removed_count}")
+    print(f"Output:            {output}")
 
 
 if __name__ == "__main__":
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
     main()
@@ -0,0 +1,234 @@
+"""
+Compact golden testing datasets by dropping paraphrased questions.
+
+Questions are first deduplicated exactly (after Unicode/whitespace/punctuation normalization), then embedded in
+batches with the configured EMBEDDING_PROVIDER and clustered: two questions are near-duplicates when their cosine
+similarity is >= --threshold and they ask about the same property with the same question type, so every kept
+question still targets the same listing and per-type metrics keep their meaning. Similarities are only computed
+within each group, tiled into blocks of at most block x block, so memory does not grow with the dataset size.
+
+Each cluster keeps its medoid (the member most similar to the rest). The compacted dataset is written in the input
+layout ({property_id, question_list} per file) together with a mapping from every kept question to the originals
+it stands for.
+
+  python compact_testing_dataset.py                                      # v1 + v2 -> compact dataset
+  python compact_testing_dataset.py --inputs ../../data/v2_testing_dataset_twhg_with_latlng_and_places --threshold 0.9
+"""
+import argparse
+import json
+import os
+import re
+import time
+import unicodedata
+from dataclasses import dataclass
+from glob import glob
+
+import numpy as np
+
+from config import EMBEDDING_PROVIDER
+from infrastructures.embedding.provider import get_embedding_provider
+
+INPUT_DIRS = [
+    "../../data/v1_testing_dataset_twhg_with_latlng_and_places",
+    "../../data/v2_testing_dataset_twhg_with_latlng_and_places",
+]
+OUTPUT_DIR = "../../data/compact_testing_dataset_twhg_with_latlng_and_places"
+# Kept outside OUTPUT_DIR so evaluation scripts globbing "*.json" only see property files.
+MAPPING_FILE = "../../data/compact_testing_dataset_twhg_with_latlng_and_places.mapping.json"
+
+DEFAULT_THRESHOLD = 0.9
+BLOCK_SIZE = 2048
+EMBED_BATCH_SIZE = 256
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+@dataclass
+class Question:
+    dataset: str
+    file_name: str
+    index: int
+    property_id: str
+    question: str
+    type: str | None
+    reason: str | None
+
+    @property
+    def source(self) -> dict:
+        return {"dataset": self.dataset, "file_name": self.file_name, "index": self.index}
+
+
+def normalize(text: str) -> str:
+    """NFKC (full-width -> half-width), lower-case, punctuation and whitespace removed."""
+    return _NON_WORD.sub("", unicodedata.normalize("NFKC", text).lower())
+
+
+def load_questions(input_dirs: list[str]) -> list[Question]:
+    questions = []
+    for input_dir in input_dirs:
+        dataset = os.path.basename(os.path.normpath(input_dir))
+        for path in sorted(glob(os.path.join(input_dir, "*.json"))):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for i, q in enumerate(data.get("question_list", [])):
+                questions.append(Question(dataset, os.path.basename(path), i, data["property_id"], q["question"],
+                                          q.get("type"), q.get("reason")))
+    return questions
+
+
+def embed_in_batches(texts: list[str], provider_name: str, batch_size: int) -> np.ndarray:
+    provider = get_embedding_provider(provider_name)
+    vectors = []
+    for i in range(0, len(texts), batch_size):
+        vectors.append(provider.embed(texts[i:i + batch_size]))
+        print(f"  embedded {min(i + batch_size, len(texts))}/{len(texts)}")
+    vectors = np.concatenate(vectors).astype(np.float32) if vectors else np.zeros((0, 1), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+    return vectors
+
+
+def near_duplicate_pairs(vectors: np.ndarray, groups: np.ndarray, threshold: float,
+                         block_size: int = BLOCK_SIZE) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (i, j) with i < j, groups[i] == groups[j] and cos(vectors[i], vectors[j]) >= threshold.
+    `vectors` must be L2-normalized. Only members of the same group are compared, one block x block similarity
+    tile at a time.
+    """
+    rows, cols = [], []
+    # A stable sort keeps each group's members in index order, so upper-triangle tiles yield i < j.
+    order = np.argsort(groups, kind="stable")
+    for members in np.split(order, np.flatnonzero(np.diff(groups[order])) + 1):
+        for a in range(0, len(members), block_size):
+            row_ids = members[a:a + block_size]
+            for b in range(a, len(members), block_size):
+                col_ids = members[b:b + block_size]
+                hit = (vectors[row_ids] @ vectors[col_ids].T) >= threshold
+                if a == b:
+                    hit = np.triu(hit, 1)
+                i, j = np.nonzero(hit)
+                rows.append(row_ids[i])
+                cols.append(col_ids[j])
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(rows), np.concatenate(cols)
+
+
+def connected_components(n: int, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """Union-find over the duplicate pairs; returns a component label per item."""
+    parent = np.arange(n)
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j in zip(rows.tolist(), cols.tolist()):
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+    return np.array([find(i) for i in range(n)])
+
+
+def medoid(members: np.ndarray, vectors: np.ndarray) -> int:
+    if len(members) <= 2:
+        return int(members[0])
+    sub = vectors[members]
+    return int(members[np.argmax((sub @ sub.T).sum(axis=1))])
+
+
+def compact(questions: list[Question], provider_name: str, threshold: float, block_size: int,
+            batch_size: int) -> list[tuple[Question, list[tuple[Question, float | None]]]]:
+    """[(kept question, [(original, similarity to kept or None for exact duplicates), ...]), ...]"""
+    # 1. Exact duplicates (same property, type and normalized text) collapse onto their first occurrence.
+    exact: dict[tuple, list[Question]] = {}
+    for q in questions:
+        exact.setdefault((q.property_id, q.type, normalize(q.question)), []).append(q)
+    uniques = [group[0] for group in exact.values()]
+    print(f"{len(questions)} questions, {len(uniques)} after exact dedup")
+    if not uniques:
+        return []
+
+    # 2. Near duplicates within each (property, type) group.
+    start = time.perf_counter()
+    vectors = embed_in_batches([q.question for q in uniques], provider_name, batch_size)
+    print(f"Embedded {len(uniques)} questions in {time.perf_counter() - start:.1f}s")
+
+    group_keys: dict[tuple, int] = {}
+    groups = np.array([group_keys.setdefault((q.property_id, q.type), len(group_keys)) for q in uniques])
+    start = time.perf_counter()
+    rows, cols = near_duplicate_pairs(vectors, groups, threshold, block_size)
+    labels = connected_components(len(uniques), rows, cols)
+    print(f"Found {len(rows)} near-duplicate pairs in {time.perf_counter() - start:.2f}s")
+
+    clusters = []
+    order = np.argsort(labels, kind="stable")
+    boundaries = np.flatnonzero(np.diff(labels[order])) + 1
+    for members in np.split(order, boundaries):
+        kept = medoid(members, vectors)
+        originals = []
+        for m in members:
+            similarity = None if m == kept else float(vectors[m] @ vectors[kept])
+            group = exact[(uniques[m].property_id, uniques[m].type, normalize(uniques[m].question))]
+            originals.append((group[0], similarity))
+            originals.extend((q, None) for q in group[1:])
+        clusters.append((uniques[kept], originals))
+    clusters.sort(key=lambda c: (c[0].property_id, c[0].dataset, c[0].file_name, c[0].index))
+    return clusters
+
+
+def write_output(clusters, output_dir: str, mapping_file: str, args):
+    os.makedirs(output_dir, exist_ok=True)
+    by_property: dict[str, list[dict]] = {}
+    mapping = []
+    for kept, originals in clusters:
+        by_property.setdefault(kept.property_id, []).append(
+            {"question": kept.question, "reason": kept.reason, "type": kept.type, "duplicates": len(originals) - 1}
+        )
+        mapping.append({
+            "property_id": kept.property_id,
+            "question": kept.question,
+            "type": kept.type,
+            "kept": kept.source,
+            "originals": [{**q.source, "question": q.question, "similarity": sim} for q, sim in originals],
+        })
+
+    for property_id, question_list in by_property.items():
+        with open(os.path.join(output_dir, f"{property_id}.json"), "w", encoding="utf-8") as f:
+            json.dump({"property_id": property_id, "question_list": question_list}, f, ensure_ascii=False, indent=2)
+
+    with open(mapping_file, "w", encoding="utf-8") as f:
+        json.dump({
+            "inputs": args.inputs,
+            "provider": args.provider,
+            "threshold": args.threshold,
+            "questions": sum(len(originals) for _, originals in clusters),
+            "kept": len(clusters),
+            "clusters": mapping,
+        }, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--inputs", nargs="+", default=INPUT_DIRS)
+    parser.add_argument("--output", default=OUTPUT_DIR)
+    parser.add_argument("--mapping", default=MAPPING_FILE)
+    parser.add_argument("--provider", default=EMBEDDING_PROVIDER)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Cosine similarity at or above which two questions are paraphrases")
+    parser.add_argument("--block-size", type=int, default=BLOCK_SIZE)
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE)
+    args = parser.parse_args()
+
+    questions = load_questions(args.inputs)
+    clusters = compact(questions, args.provider, args.threshold, args.block_size, args.batch_size)
+    write_output(clusters, args.output, args.mapping, args)
+
+    kept = len(clusters)
+    print(f"Kept {kept}/{len(questions)} questions ({1 - kept / max(len(questions), 1):.1%} removed) "
+          f"across {len({c[0].property_id for c in clusters})} properties")
+    print(f"Compacted dataset saved to {args.output}, mapping to {args.mapping}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,38 @@
+import argparse
 from typing import Any, List
 
 from dotenv import load_dotenv
 from neo4j import GraphDatabase
-from openai import OpenAI
 from tqdm import tqdm
 
-from config import NEO4J_PASSWORD, NEO4J_URI, NEO4J_USER, OPENAI_API_KEY, OPENAI_EMBEDDING_MODEL
+from config import EMBEDDING_BATCH_SIZE, NEO4J_PASSWORD, NEO4J_URI, NEO4J_USER
+from infrastructures.embedding.provider import EmbeddingProvider, embedding_signature, get_embedding_provider
+from infrastructures.neo4j.catalog_version import bump_catalog_version
+from infrastructures.pipeline.change_feed import ChangeFeed
 
-# batch size for OpenAI embeddings
-BATCH_SIZE = 64
+# batch size per provider call
+BATCH_SIZE = EMBEDDING_BATCH_SIZE
 load_dotenv()
-client = OpenAI(api_key=OPENAI_API_KEY)
 
 # -----------------------------
 # Cypher
 # -----------------------------
+# Vectors are stamped with embedding_signature(); after switching EMBEDDING_PROVIDER (or its model) every vector
+# from the old space is selected again, and the retriever ignores it until then.
 GET_PROPERTIES_NO_EMBED = """
 MATCH (p:Property)
-WHERE p.text_embedding IS NULL
+WHERE p.text_embedding IS NULL OR coalesce(p.embedding_signature, '') <> $signature
+RETURN p.property_id AS property_id,
+       coalesce(p.title,'') + '\n' +
+       coalesce(p.description,'') + '\n' +
+       coalesce(p.raw_description,'') AS text
+"""
+
+# --delta: only the properties the change feed reports (property_id lookups instead of a label scan)
+GET_CHANGED_PROPERTIES_NO_EMBED = """
+UNWIND $property_ids AS property_id
+MATCH (p:Property {property_id: property_id})
+WHERE p.text_embedding IS NULL OR coalesce(p.embedding_signature, '') <> $signature
 RETURN p.property_id AS property_id,
        coalesce(p.title,'') + '\n' +
        coalesce(p.description,'') + '\n' +
@@ -26,7 +41,35 @@ RETURN p.property_id AS property_id,
 
 SET_EMBEDDING = """
 MATCH (p:Property {property_id: $property_id})
-SET p.text_embedding = $embedding
+SET p.text_embedding = $embedding,
+    p.embedding_signature = $signature
+"""
+
+# Per-room texts are written by import_properties.py (p.room_feature_texts).
+GET_PROPERTIES_NO_ROOM_EMBED = """
+MATCH (p:Property)
+WHERE (p.room_embeddings IS NULL OR coalesce(p.room_embedding_signature, '') <> $signature)
+  AND size(coalesce(p.room_feature_texts, [])) > 0
+RETURN p.property_id AS property_id,
+       p.room_feature_texts AS texts
+"""
+
+GET_CHANGED_PROPERTIES_NO_ROOM_EMBED = """
+UNWIND $property_ids AS property_id
+MATCH (p:Property {property_id: property_id})
+WHERE (p.room_embeddings IS NULL OR coalesce(p.room_embedding_signature, '') <> $signature)
+  AND size(coalesce(p.room_feature_texts, [])) > 0
+RETURN p.property_id AS property_id,
+       p.room_feature_texts AS texts
+"""
+
+# Neo4j properties cannot hold a list of lists, so room vectors are stored flattened
+# (room_embedding_count x dim) and reshaped by the retriever.
+SET_ROOM_EMBEDDINGS = """
+MATCH (p:Property {property_id: $property_id})
+SET p.room_embeddings = $embeddings,
+    p.room_embedding_count = $count,
+    p.room_embedding_signature = $signature
 """
 
 
@@ -35,60 +78,114 @@ def chunk_list(items: List[Any], size: int):
         yield items[i:i + size]
 
 
-def get_embeddings(texts: List[str]) -> List[List[float]]:
+def get_embeddings(provider: EmbeddingProvider, texts: List[str]) -> List[List[float]]:
     """
-    Call OpenAI Embeddings API for a list of texts (batch).
-    Docs: https://platform.openai.com/docs/guides/embeddings
+    Embed a batch of texts with the configured provider (EMBEDDING_PROVIDER).
+    Output is aligned with inputs.
     """
-    # The embeddings API accepts a list of strings as input.  [oai_citation:3‡OpenAI Platform](https://platform.openai.com/docs/api-reference/embeddings/create?lang=python&utm_source=chatgpt.com)
-    resp = client.embeddings.create(
-        model=OPENAI_EMBEDDING_MODEL,
-        input=texts
-    )
-    # resp.data is list aligned with inputs
-    return [d.embedding for d in resp.data]
+    return provider.embed(texts).tolist()
 
 
-def main():
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+def embed_listings(driver, provider: EmbeddingProvider, signature: str, property_ids: List[str] | None = None) -> int:
+    with driver.session() as session:
+        if property_ids is None:
+            rows = session.run(GET_PROPERTIES_NO_EMBED, signature=signature).data()
+        else:
+            rows = session.run(GET_CHANGED_PROPERTIES_NO_EMBED, property_ids=property_ids, signature=signature).data()
 
-    try:
-        with driver.session() as session:
-            rows = session.run(GET_PROPERTIES_NO_EMBED).data()
+    if not rows:
+        print(f"✅ No properties need listing embeddings (all have a {signature} text_embedding).")
+        return 0
 
-        if not rows:
-            print("✅ No properties need embeddings (all have text_embedding).")
-            return
+    print(f"Found {len(rows)} properties without a {signature} embedding.")
+    print(f"Embedding provider: {provider.name}")
 
-        print(f"Found {len(rows)} properties without embedding.")
-        print(f"Embedding model: text-embedding-3-small")
+    # Prepare data
+    items = []
+    for r in rows:
+        pid = r["property_id"]
+        text = (r["text"] or "").strip()
+        # Avoid empty strings (OpenAI embeddings input cannot be empty)  [oai_citation:4‡OpenAI Platform](https://platform.openai.com/docs/api-reference/embeddings/create?lang=python&utm_source=chatgpt.com)
+        if not text:
+            text = "(empty)"
+        items.append({"property_id": pid, "text": text})
 
-        # Prepare data
-        items = []
-        for r in rows:
-            pid = r["property_id"]
-            text = (r["text"] or "").strip()
-            # Avoid empty strings (OpenAI embeddings input cannot be empty)  [oai_citation:4‡OpenAI Platform](https://platform.openai.com/docs/api-reference/embeddings/create?lang=python&utm_source=chatgpt.com)
-            if not text:
-                text = "(empty)"
-            items.append({"property_id": pid, "text": text})
+    updated = 0
 
-        updated = 0
+    for batch in tqdm(list(chunk_list(items, BATCH_SIZE))):
+        texts = [x["text"] for x in batch]
+        pids = [x["property_id"] for x in batch]
 
-        for batch in tqdm(list(chunk_list(items, BATCH_SIZE))):
-            texts = [x["text"] for x in batch]
-            pids = [x["property_id"] for x in batch]
+        embeddings = get_embeddings(provider, texts)
 
-            embeddings = get_embeddings(texts)
+        # write back to neo4j
+        with driver.session() as session:
+            for pid, emb in zip(pids, embeddings):
+                session.run(SET_EMBEDDING, property_id=pid, embedding=emb, signature=signature).consume()
+                updated += 1
+
+    return updated
+
+
+def embed_rooms(driver, provider: EmbeddingProvider, signature: str, property_ids: List[str] | None = None) -> int:
+    with driver.session() as session:
+        if property_ids is None:
+            rows = session.run(GET_PROPERTIES_NO_ROOM_EMBED, signature=signature).data()
+        else:
+            rows = session.run(GET_CHANGED_PROPERTIES_NO_ROOM_EMBED, property_ids=property_ids,
+                               signature=signature).data()
+
+    if not rows:
+        print("✅ No properties need room embeddings.")
+        return 0
+
+    # Flatten (property, room text) pairs so API batches are full regardless of room counts.
+    pairs = [(r["property_id"], t.strip() or "(empty)") for r in rows for t in r["texts"]]
+    print(f"Found {len(rows)} properties ({len(pairs)} rooms) without {signature} room embeddings.")
+
+    room_vectors: dict[str, list[float]] = {}
+    counts: dict[str, int] = {}
+    for batch in tqdm(list(chunk_list(pairs, BATCH_SIZE))):
+        embeddings = get_embeddings(provider, [t for _, t in batch])
+        for (pid, _), emb in zip(batch, embeddings):
+            room_vectors.setdefault(pid, []).extend(emb)
+            counts[pid] = counts.get(pid, 0) + 1
+
+    with driver.session() as session:
+        for pid, flat in room_vectors.items():
+            session.run(SET_ROOM_EMBEDDINGS, property_id=pid, embeddings=flat, count=counts[pid],
+                        signature=signature).consume()
+
+    return len(room_vectors)
+
+
+def main(delta: bool = False):
+    feed = changes = property_ids = None
+    if delta:
+        # import_properties.py clears the vectors of changed text, so only imported listings can need new ones.
+        feed = ChangeFeed()
+        changes = feed.delta("embed", upstream="import")
+        print(f"Change feed: {changes.summary()}")
+        property_ids = [c.property_id for c in changes.upserts if c.property_id]
+
+    provider = get_embedding_provider()
+    signature = embedding_signature()
+    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+
+    try:
+        updated = embed_listings(driver, provider, signature, property_ids)
+        room_updated = embed_rooms(driver, provider, signature, property_ids)
+        if changes:
+            feed.commit(changes)
 
-            # write back to neo4j
+        if updated or room_updated:
             with driver.session() as session:
-                for pid, emb in zip(pids, embeddings):
-                    session.run(SET_EMBEDDING, property_id=pid, embedding=emb).consume()
-                    updated += 1
+                version = bump_catalog_version(session)
+            print(f"Catalog version bumped to {version}")
 
         print("===================================")
         print(f"✅ Embedded & updated: {updated}")
+        print(f"✅ Room vectors updated: {room_updated}")
         print("===================================")
         print("Done.")
 
@@ -97,4 +194,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--delta", action="store_true",
+                        help="Only embed the listings the change feed reports since the last --delta run")
+    main(delta=parser.parse_args().delta)
@@ -1,61 +1,54 @@
+import argparse
+import asyncio
 import json
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import random
+import zlib
+from glob import glob
 
 from google import genai
 from google.genai import types
 
-from config import GEMINI_AI_STUDIO_API_KEY, GEMINI_LLM_MODEL
+from config import GEMINI_AI_STUDIO_API_KEY, GEMINI_BASE_URL, GEMINI_LLM_MODEL, GEMINI_RPM, GEMINI_TPM
+from infrastructures.concurrency.limiter import is_rate_limited, is_retryable
+from infrastructures.concurrency.token_bucket import QuotaLimiter
 
+TARGET_FOLDER_PATH = "../../data/twhg_with_latlng_and_places/"
+SAVE_RESPONSE_FOLDER_PATH = "../../data/testing_dataset_twhg_with_latlng_and_places/"
 
-def generate_testing_dataset(house_info: str) -> str:
-    client = genai.Client(
-        api_key=GEMINI_AI_STUDIO_API_KEY,
-    )
+CONCURRENCY = 16
+MAX_ATTEMPTS = 6
+BACKOFF_BASE_SECONDS = 2.0
+BACKOFF_MAX_SECONDS = 120.0
+# Token budget reserved per request before the real usage is known: the prompt (CJK is ~1 token per char,
+# so characters over-estimate) plus thinking and 10 questions of output. Settled against usage_metadata.
+EXPECTED_OUTPUT_TOKENS = 6000
 
-    contents = [
-        types.Content(
-            role="user",
-            parts=[
-                types.Part.from_text(text=f"""\
-Here is the property metadata dataset:
-<house_info>
-{house_info}
-<house_info/>"""),
-            ],
-        ),
-    ]
-    generate_content_config = types.GenerateContentConfig(
-        temperature=0,
-        thinking_config=types.ThinkingConfig(
-            thinking_budget=-1,
-        ),
-        response_mime_type="application/json",
-        response_schema=genai.types.Schema(
-            type=genai.types.Type.OBJECT,
-            properties={
-                "question_list": genai.types.Schema(
-                    type=genai.types.Type.ARRAY,
-                    items=genai.types.Schema(
-                        type=genai.types.Type.OBJECT,
-                        properties={
-                            "question": genai.types.Schema(
-                                type=genai.types.Type.STRING,
-                            ),
-                            "reason": genai.types.Schema(
-                                type=genai.types.Type.STRING,
-                            ),
-                            "type": genai.types.Schema(
-                                type=genai.types.Type.STRING,
-                                enum=["simple", "abstract"],
-                            ),
-                        },
-                    ),
-                ),
-            },
-        ),
-        system_instruction=[
-            types.Part.from_text(text="""\
+FIELD_MAPPING = [
+    ("property_id", "property_id"),
+    ("title", "title"),
+    ("description", "description"),
+    ("total_price", "total_price"),
+    ("degree_of_decoration", "degree_of_decoration"),
+    ("city", "city"),
+    ("district", "district"),
+    ("street", "street"),
+    ("floor", "floor"),
+    ("total_floors", "total_floors"),
+    ("property_type", "property_type"),
+    ("property_usage", "property_usage"),
+    ("property_age", "property_age"),
+    ("gross_area", "gross_area"),
+    ("interior_area", "interior_area"),
+    ("exclusive_use_area", "exclusive_use_area"),
+    ("common_area", "parking_area"),
+    ("num_bedroom", "num_bedroom"),
+    ("num_bathroom", "num_bathroom"),
+    ("num_living_room", "num_living_room"),
+    ("orientation", "orientation"),
+]
+
+SYSTEM_PROMPT = """\
 # SYSTEM PROMPT
 
 ## Context
@@ -90,19 +83,114 @@ Construct the queries using the following logic:
 -   **Reasoning/Analysis:** Technical, objective, and analytical (in the `reason` field).
 
 ## Audience
-The output is for the RAG Engineering Team. They use this data to verify if the embedding model successfully captures the semantic relationship between the long-tail keywords in the query and the metadata in the documents."""),
-        ],
-    )
+The output is for the RAG Engineering Team. They use this data to verify if the embedding model successfully captures the semantic relationship between the long-tail keywords in the query and the metadata in the documents."""
 
-    response = client.models.generate_content(
-        model=GEMINI_LLM_MODEL,
-        contents=contents,
-        config=generate_content_config,
-    )
-    return response.text
+GENERATE_CONTENT_CONFIG = types.GenerateContentConfig(
+    temperature=0,
+    thinking_config=types.ThinkingConfig(
+        thinking_budget=-1,
+    ),
+    response_mime_type="application/json",
+    response_schema=genai.types.Schema(
+        type=genai.types.Type.OBJECT,
+        properties={
+            "question_list": genai.types.Schema(
+                type=genai.types.Type.ARRAY,
+                items=genai.types.Schema(
+                    type=genai.types.Type.OBJECT,
+                    properties={
+                        "question": genai.types.Schema(
+                            type=genai.types.Type.STRING,
+                        ),
+                        "reason": genai.types.Schema(
+                            type=genai.types.Type.STRING,
+                        ),
+                        "type": genai.types.Schema(
+                            type=genai.types.Type.STRING,
+                            enum=["simple", "abstract"],
+                        ),
+                    },
+                ),
+            ),
+        },
+    ),
+    system_instruction=[types.Part.from_text(text=SYSTEM_PROMPT)],
+)
+
+quota = QuotaLimiter(rpm=GEMINI_RPM, tpm=GEMINI_TPM)
+
+
+def build_house_info(data: dict) -> str:
+    return "\n".join(f"{label}: {data.get(key, 'N/A')}" for label, key in FIELD_MAPPING)
+
+
+async def generate_testing_dataset(client: genai.Client, house_info: str) -> str:
+    contents = [
+        types.Content(
+            role="user",
+            parts=[
+                types.Part.from_text(text=f"""\
+Here is the property metadata dataset:
+<house_info>
+{house_info}
+<house_info/>"""),
+            ],
+        ),
+    ]
+    estimated_tokens = len(SYSTEM_PROMPT) + len(house_info) + EXPECTED_OUTPUT_TOKENS
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        await quota.acquire(estimated_tokens)
+        try:
+            response = await client.aio.models.generate_content(
+                model=GEMINI_LLM_MODEL,
+                contents=contents,
+                config=GENERATE_CONTENT_CONFIG,
+            )
+        except Exception as e:
+            # A rejected request still used its request slot, but not the tokens we reserved for it.
+            quota.settle(estimated_tokens, 0)
+            if not is_retryable(e) or attempt == MAX_ATTEMPTS:
+                raise
+            # Full jitter keeps many workers that hit the same 429 from retrying in lockstep.
+            delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+            kind = "rate limited" if is_rate_limited(e) else "server error"
+            print(f"[Retry] {kind} (attempt {attempt}/{MAX_ATTEMPTS}), sleeping {delay:.1f}s: {e}")
+            await asyncio.sleep(delay)
+            continue
+
+        usage = response.usage_metadata
+        quota.settle(estimated_tokens, usage.total_token_count if usage else None)
+        return response.text
 
 
-def process_single_file(file_path: str):
+def output_path(file_path: str) -> str:
+    return os.path.join(SAVE_RESPONSE_FOLDER_PATH, os.path.basename(file_path))
+
+
+def is_done(file_path: str) -> bool:
+    """An output counts as done if it parses and has a question list; raw-text fallbacks are regenerated."""
+    try:
+        with open(output_path(file_path), "r", encoding="utf-8") as f:
+            return "question_list" in json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return False
+
+
+def in_shard(file_path: str, shard: tuple[int, int]) -> bool:
+    """Stable assignment by file name, so every machine computes the same split."""
+    index, count = shard
+    return zlib.crc32(os.path.basename(file_path).encode("utf-8")) % count == index
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    index, count = (int(v) for v in value.split("/"))
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard must be i/n with 0 <= i < n, got {value}")
+    return index, count
+
+
+async def process_single_file(client: genai.Client, file_path: str) -> str:
     try:
         filename = os.path.basename(file_path)
 
@@ -111,31 +199,25 @@ def process_single_file(file_path: str):
             source_data = json.load(f)
             # 兼容有些 json 結構可能是直接物件，或是包在 listing 裡
             data = source_data.get("listing", source_data)
-
-        house_info_parts: list[str] = []
-        for label, key in field_mapping:
-            val = data.get(key, "N/A")
-            house_info_parts.append(f"{label}: {val}")
         property_id: str = data["property_id"]
-        house_info = "\n".join(house_info_parts)
 
-        # 3. 呼叫生成函數 (這裡假設 generate_testing_dataset 已經被 import 或定義)
-        # 這裡會回傳 str 格式的 JSON
-        response_str = generate_testing_dataset(house_info=house_info)
+        # 2. 呼叫生成函數，回傳 str 格式的 JSON
+        response_str = await generate_testing_dataset(client, house_info=build_house_info(data))
 
-        # 4. 解析並儲存結果
-        # 嘗試將 string 轉回 json object 以確保格式正確 (並能排版美觀)
+        # 3. 解析並儲存結果
         try:
             response_json = json.loads(response_str)
             response_json["property_id"] = property_id
-        except json.JSONDecodeError:
+        except (json.JSONDecodeError, TypeError):
             print(f"[Warning] Response for {filename} is not valid JSON. Saving as raw text.")
             response_json = {"property_id": property_id, "raw_content": response_str}
 
-        output_file_path = os.path.join(save_response_folder_path, filename)
-
-        with open(output_file_path, "w", encoding="utf-8") as f:
+        # Write-then-rename: an interrupted run never leaves a half-written file that resume would trust.
+        output_file_path = output_path(file_path)
+        tmp_path = output_file_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
             json.dump(response_json, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, output_file_path)
 
         return f"[Success] {filename}"
 
@@ -143,48 +225,56 @@ def process_single_file(file_path: str):
         return f"[Error] {file_path}: {str(e)}"
 
 
-if __name__ == "__main__":
-    target_folder_path = "../../data/twhg_with_latlng_and_places/"
-    save_response_folder_path = "../../data/testing_dataset_twhg_with_latlng_and_places/"
-
-    field_mapping = [
-        ("property_id", "property_id"),
-        ("title", "title"),
-        ("description", "description"),
-        ("total_price", "total_price"),
-        ("degree_of_decoration", "degree_of_decoration"),
-        ("city", "city"),
-        ("district", "district"),
-        ("street", "street"),
-        ("floor", "floor"),
-        ("total_floors", "total_floors"),
-        ("property_type", "property_type"),
-        ("property_usage", "property_usage"),
-        ("property_age", "property_age"),
-        ("gross_area", "gross_area"),
-        ("interior_area", "interior_area"),
-        ("exclusive_use_area", "exclusive_use_area"),
-        ("common_area", "parking_area"),
-        ("num_bedroom", "num_bedroom"),
-        ("num_bathroom", "num_bathroom"),
-        ("num_living_room", "num_living_room"),
-        ("orientation", "orientation"),
-    ]
+async def worker(client: genai.Client, queue: asyncio.Queue, progress: dict):
+    while True:
+        file_path = await queue.get()
+        try:
+            result = await process_single_file(client, file_path)
+            progress["completed"] += 1
+            print(f"[{progress['completed']}/{progress['total']}] {result}")
+        finally:
+            queue.task_done()
 
-    # get all json file
-    json_files = [
-        os.path.join(target_folder_path, f)
-        for f in os.listdir(target_folder_path)
-        if f.endswith('.json')
-    ]
 
-    total_files = len(json_files)
-    BATCH_SIZE = 10
-    print(f"Found {total_files} files. Starting batch processing with size {BATCH_SIZE}...")
-    with ThreadPoolExecutor(max_workers=BATCH_SIZE) as executor:
-        futures = {executor.submit(process_single_file, file_path): file_path for file_path in json_files}
-        completed_count = 0
-        for future in as_completed(futures):
-            result = future.result()
-            completed_count += 1
-            print(f"[{completed_count}/{total_files}] {result}")
+async def main(args):
+    os.makedirs(SAVE_RESPONSE_FOLDER_PATH, exist_ok=True)
+    json_files = sorted(glob(os.path.join(TARGET_FOLDER_PATH, "*.json")))
+    if args.shard:
+        json_files = [f for f in json_files if in_shard(f, args.shard)]
+    pending = json_files if args.overwrite else [f for f in json_files if not is_done(f)]
+    done = len(json_files) - len(pending)
+    if args.limit is not None:
+        pending = pending[:args.limit]
+
+    print(f"Found {len(json_files)} files"
+          + (f" in shard {args.shard[0]}/{args.shard[1]}" if args.shard else "")
+          + f", {done} already generated, generating {len(pending)} "
+          + f"with {args.concurrency} workers ({GEMINI_RPM} RPM, {GEMINI_TPM} TPM)...")
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for file_path in pending:
+        queue.put_nowait(file_path)
+    progress = {"completed": 0, "total": len(pending)}
+    # One client (and connection pool) for the whole run.
+    client = genai.Client(
+        api_key=GEMINI_AI_STUDIO_API_KEY,
+        http_options=types.HttpOptions(base_url=GEMINI_BASE_URL) if GEMINI_BASE_URL else None,
+    )
+    workers = [asyncio.create_task(worker(client, queue, progress)) for _ in range(args.concurrency)]
+    try:
+        await queue.join()
+    finally:
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        await client.aio.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limit", type=int, default=None, help="Generate at most N properties this run")
+    parser.add_argument("--shard", type=parse_shard, default=None,
+                        help="Only handle shard i of n (e.g. 0/4), split by file name hash")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--overwrite", action="store_true", help="Regenerate properties that already have output")
+    asyncio.run(main(parser.parse_args()))
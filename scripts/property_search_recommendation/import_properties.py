@@ -1,10 +1,17 @@
+import argparse
 import os
-import json
 import glob
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Tuple
 from neo4j import GraphDatabase
 from tqdm import tqdm
 
+from infrastructures.dataset_store.store import DatasetStore
+from infrastructures.listing.records import Listing
+from infrastructures.listing.room_taxonomy import room_taxonomy
+from infrastructures.neo4j.catalog_version import bump_catalog_version
+from infrastructures.pipeline.change_feed import ChangeFeed
+from infrastructures.serialization import json_codec
+
 
 NEO4J_URI = "bolt://localhost:7687"
 NEO4J_USER = "neo4j"
@@ -46,11 +53,16 @@ CONSTRAINTS_AND_INDEXES = [
     CREATE CONSTRAINT image_url_unique IF NOT EXISTS
     FOR (img:Image) REQUIRE img.url IS UNIQUE
     """,
+    """
+    CREATE CONSTRAINT catalog_version_name_unique IF NOT EXISTS
+    FOR (v:CatalogVersion) REQUIRE v.name IS UNIQUE
+    """,
     # Useful indexes for filtering
     "CREATE INDEX property_price IF NOT EXISTS FOR (p:Property) ON (p.total_price)",
     "CREATE INDEX property_city IF NOT EXISTS FOR (p:Property) ON (p.city)",
     "CREATE INDEX property_district IF NOT EXISTS FOR (p:Property) ON (p.district)",
     "CREATE INDEX property_type IF NOT EXISTS FOR (p:Property) ON (p.property_type)",
+    "CREATE INDEX room_category IF NOT EXISTS FOR (r:Room) ON (r.category)",
 ]
 
 # Cypher: check exists
@@ -60,11 +72,34 @@ RETURN p.property_id AS property_id
 LIMIT 1
 """
 
+# Cypher: a listing that left the raw directory (shared City/Tag/Room/... nodes stay)
+DELETE_ONE = """
+MATCH (p:Property {property_id: $property_id})
+OPTIONAL MATCH (p)-[:HAS_IMAGE]->(img:Image)
+WHERE NOT EXISTS { MATCH (img)<-[:HAS_IMAGE]-(other:Property) WHERE other <> p }
+DETACH DELETE img, p
+"""
+
 # Cypher: import one property (MERGE)
 IMPORT_ONE = """
 // --- Property ---
 MERGE (p:Property {property_id: $property_id})
+// A re-import replaces the listing's own edges, so streets, rooms, tags and images it no longer has do not linger;
+// the shared nodes themselves stay.
+CALL {
+  WITH p
+  OPTIONAL MATCH (p)-[old:LOCATED_ON|HAS_TYPE|HAS_ROOM|HAS_TAG|HAS_IMAGE]->()
+  DELETE old
+}
 SET
+  // SET items apply in order: compare against the stored text first, so a re-import with changed text drops
+  // the stale vectors and embed_properties_openai.py embeds the property again.
+  p.text_embedding = CASE WHEN coalesce(p.title, '') = coalesce($title, '')
+                                AND coalesce(p.description, '') = coalesce($description, '')
+                                AND coalesce(p.raw_description, '') = coalesce($raw_description, '')
+                           THEN p.text_embedding END,
+  p.room_embeddings = CASE WHEN p.room_feature_texts = $room_feature_texts THEN p.room_embeddings END,
+  p.room_embedding_count = CASE WHEN p.room_feature_texts = $room_feature_texts THEN p.room_embedding_count END,
   p.title = $title,
   p.total_price = $total_price,
   p.property_type = $property_type,
@@ -83,6 +118,7 @@ SET
   p.original_url = $original_url,
   p.description = $description,
   p.raw_description = $raw_description,
+  p.room_feature_texts = $room_feature_texts,
   p.city = $city,
   p.district = $district,
   p.street = $street
@@ -106,6 +142,7 @@ MERGE (p)-[:HAS_TYPE]->(pt)
 WITH p
 UNWIND $extracted_feature_list AS rf
   MERGE (r:Room {name: rf.room})
+  SET r.category = rf.category
   MERGE (p)-[:HAS_ROOM]->(r)
   WITH p, r, rf
   UNWIND rf.tag_list AS tagName
@@ -124,53 +161,26 @@ RETURN p.property_id AS property_id
 
 
 # Helpers
-def safe_float(x: Any) -> Optional[float]:
-    if x is None:
-        return None
-    try:
-        return float(x)
-    except Exception:
-        return None
-
-
-def safe_int(x: Any) -> Optional[int]:
-    if x is None:
-        return None
-    try:
-        return int(x)
-    except Exception:
-        return None
+def room_params(listing: Listing) -> List[Dict[str, Any]]:
+    """
+    [{"room": "...", "category": "...", "tag_list": ["...", ...]}, ...]
+    """
+    return [
+        {"room": f.room, "category": room_taxonomy.classify(f.room), "tag_list": f.tag_list}
+        for f in listing.extracted_feature_list
+        if f.room
+    ]
 
 
-def normalize_extracted_feature_list(raw: Any) -> List[Dict[str, Any]]:
+def build_room_feature_texts(extracted_feature_list: List[Dict[str, Any]]) -> List[str]:
     """
-    Ensure extracted_feature_list is always:
-    [{"room": "...", "tag_list": ["...", ...]}, ...]
+    One short text per room entry (e.g. "主臥: 更衣室, 採光佳"), embedded separately for max-sim scoring.
     """
-    if not raw:
-        return []
-    if isinstance(raw, list):
-        out = []
-        for item in raw:
-            room = item.get("room") if isinstance(item, dict) else None
-            tags = item.get("tag_list") if isinstance(item, dict) else None
-            if not room:
-                continue
-            if not tags:
-                tags = []
-            # ensure list[str]
-            tags = [str(t).strip() for t in tags if str(t).strip()]
-            out.append({"room": str(room).strip(), "tag_list": tags})
-        return out
-    return []
-
-
-def normalize_picture_list(raw: Any) -> List[str]:
-    if not raw:
-        return []
-    if isinstance(raw, list):
-        return [str(u).strip() for u in raw if str(u).strip()]
-    return []
+    return [
+        f"{rf['room']}: {', '.join(rf['tag_list'])}"
+        for rf in extracted_feature_list
+        if rf["tag_list"]
+    ]
 
 
 def make_location_keys(city: str, district: str, street: str) -> Tuple[str, str]:
@@ -182,48 +192,45 @@ def make_location_keys(city: str, district: str, street: str) -> Tuple[str, str]
     return district_key, street_key
 
 
-def load_json(path: str) -> Dict[str, Any]:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def build_params(doc: Dict[str, Any]) -> Dict[str, Any]:
-    property_id = str(doc.get("property_id", "")).strip()
-    if not property_id:
+def build_params(listing: Listing) -> Dict[str, Any]:
+    """Cypher parameters for IMPORT_ONE; the cleaner already validated and typed every field."""
+    if not listing.property_id:
         raise ValueError("Missing property_id")
 
-    city = str(doc.get("city", "")).strip()
-    district = str(doc.get("district", "")).strip()
-    street = str(doc.get("street", "")).strip()
+    city = (listing.city or "").strip()
+    district = (listing.district or "").strip()
+    street = (listing.street or "").strip()
     district_key, street_key = make_location_keys(city, district, street)
+    extracted_feature_list = room_params(listing)
 
     params = {
-        "property_id": property_id,
-        "title": doc.get("title"),
-        "total_price": safe_float(doc.get("total_price")),
-        "property_type": doc.get("property_type"),
-        "property_age": safe_int(doc.get("property_age")),
-        "gross_area": safe_float(doc.get("gross_area")),
-        "interior_area": safe_float(doc.get("interior_area")),
-        "public_area_ratio": safe_float(doc.get("public_area_ratio")),
-        "num_bedroom": safe_int(doc.get("num_bedroom")),
-        "num_bathroom": safe_int(doc.get("num_bathroom")),
-        "num_living_room": safe_int(doc.get("num_living_room")),
-        "floor": safe_int(doc.get("floor")),
-        "total_floors": safe_int(doc.get("total_floors")),
-        "land_ownership_area": safe_float(doc.get("land_ownership_area")),
-        "property_usage": doc.get("property_usage"),
-        "orientation": doc.get("orientation"),
-        "original_url": doc.get("original_url"),
-        "description": doc.get("description"),
-        "raw_description": doc.get("raw_description"),
+        "property_id": listing.property_id,
+        "title": listing.title,
+        "total_price": listing.total_price,
+        "property_type": listing.property_type,
+        "property_age": listing.property_age,
+        "gross_area": listing.gross_area,
+        "interior_area": listing.interior_area,
+        "public_area_ratio": listing.public_area_ratio,
+        "num_bedroom": listing.num_bedroom,
+        "num_bathroom": None if listing.num_bathroom is None else int(listing.num_bathroom),
+        "num_living_room": listing.num_living_room,
+        "floor": listing.floor,
+        "total_floors": listing.total_floors,
+        "land_ownership_area": listing.land_ownership_area,
+        "property_usage": listing.property_usage,
+        "orientation": listing.orientation,
+        "original_url": listing.original_url,
+        "description": listing.description,
+        "raw_description": listing.raw_description,
         "city": city,
         "district": district,
         "street": street,
         "district_key": district_key,
         "street_key": street_key,
-        "extracted_feature_list": normalize_extracted_feature_list(doc.get("extracted_feature_list")),
-        "picture_list": normalize_picture_list(doc.get("picture_list")),
+        "extracted_feature_list": extracted_feature_list,
+        "room_feature_texts": build_room_feature_texts(extracted_feature_list),
+        "picture_list": listing.picture_list,
     }
     return params
 
@@ -244,11 +251,27 @@ def import_one(session, params: Dict[str, Any]):
     session.run(IMPORT_ONE, **params).consume()
 
 
-def main():
-    json_files = sorted(glob.glob(os.path.join(DATA_DIR, "*.json")))
-    if not json_files:
-        print(f"[ERROR] No .json files found in: {DATA_DIR}")
-        return
+def delete_one(session, property_id: str):
+    session.run(DELETE_ONE, property_id=property_id).consume()
+
+
+def main(overwrite: bool = False, delta: bool = False):
+    feed = changes = None
+    if delta:
+        # Changed listings are re-imported (as with --overwrite) and removed ones deleted; nothing else is read.
+        feed = ChangeFeed()
+        changes = feed.delta("import", upstream="clean")
+        print(f"Change feed: {changes.summary()}")
+        json_files = [os.path.join(DATA_DIR, c.file_name) for c in changes.upserts]
+        overwrite = True
+    else:
+        json_files = sorted(glob.glob(os.path.join(DATA_DIR, "*.json")))
+        if not json_files:
+            print(f"[ERROR] No .json files found in: {DATA_DIR}")
+            return
+
+    # The dataset store's room_categories table warms the classifier, as long as the taxonomy rules are unchanged.
+    room_taxonomy.seed(DatasetStore().room_category_dictionary(room_taxonomy.signature))
 
     driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
 
@@ -259,18 +282,19 @@ def main():
         total = 0
         imported = 0
         skipped = 0
-        failed = 0
+        deleted = 0
+        failed = []
 
         print("[2/3] Importing JSON files...")
         with driver.session() as session:
             for path in tqdm(json_files):
                 total += 1
                 try:
-                    doc = load_json(path)
-                    params = build_params(doc)
+                    params = build_params(Listing.from_dict(json_codec.load_file(path)))
                     pid = params["property_id"]
 
-                    if property_exists(session, pid):
+                    # IMPORT_ONE replaces the edges and MERGEs the rest, so re-importing updates a property in place.
+                    if not overwrite and property_exists(session, pid):
                         skipped += 1
                         continue
 
@@ -278,15 +302,30 @@ def main():
                     imported += 1
 
                 except Exception as e:
-                    failed += 1
+                    failed.append(os.path.basename(path))
                     tqdm.write(f"[FAILED] {os.path.basename(path)} -> {e}")
 
+            # A listing re-crawled under another file name keeps its property_id; only delete ids that are gone.
+            upserted = {c.property_id for c in changes.upserts} if changes else set()
+            for change in changes.removals if changes else []:
+                if change.property_id and change.property_id not in upserted:
+                    delete_one(session, change.property_id)
+                    deleted += 1
+
+            if imported or deleted:
+                version = bump_catalog_version(session)
+                print(f"Catalog version bumped to {version}")
+
+        if changes:
+            feed.commit(changes, failed)
+
         print("[3/3] Done.")
         print("===================================")
         print(f"Total scanned : {total}")
         print(f"Imported      : {imported}")
         print(f"Skipped       : {skipped}")
-        print(f"Failed        : {failed}")
+        print(f"Deleted       : {deleted}")
+        print(f"Failed        : {len(failed)}")
         print("===================================")
 
     finally:
@@ -294,4 +333,9 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--overwrite", action="store_true", help="Re-import properties that already exist")
+    parser.add_argument("--delta", action="store_true",
+                        help="Only import/delete the listings the change feed reports since the last --delta run")
+    args = parser.parse_args()
+    main(overwrite=args.overwrite, delta=args.delta)
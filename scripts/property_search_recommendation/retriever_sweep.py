@@ -0,0 +1,256 @@
+"""
+Grid search over retriever settings against a local catalog snapshot.
+
+1. Prepare (once): intent extraction and query embeddings for every question and query template.
+   They go through the record/replay cassettes; with --record (or CASSETTE_MODE=record) the next sweep makes no API calls.
+2. Evaluate: every grid point is scored in a process pool against CatalogSnapshot (a numpy copy
+   of the Property nodes). The snapshot mirrors FILTER_CYPHER and max-sim scoring, so no Neo4j round trips are needed.
+3. Leaderboard: recall / MRR / nDCG and local ranking latency per grid point, best first.
+
+Usage:
+  python retriever_sweep.py                      # default grid
+  python retriever_sweep.py --grid grid.json     # {"graph_limit": [100, 200], "diversify": [false, true], ...}
+  python retriever_sweep.py --refresh-snapshot   # re-export the catalog from Neo4j
+  python retriever_sweep.py --record             # keep intents/embeddings in the cassettes when CASSETTE_MODE=off
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from glob import glob
+
+import numpy as np
+
+from config import CASSETTE_DIR, CASSETTE_MODE
+from infrastructures.cassette.store import get_cassette
+from infrastructures.neo4j.catalog_snapshot import CatalogSnapshot
+from infrastructures.neo4j.catalog_version import get_catalog_version
+from infrastructures.neo4j.client import neo4j_client
+from infrastructures.neo4j.retriever import build_query_text, embed, mmr_select
+from services.property_search_recommendation import extract_user_question_intent
+from services.property_search_recommendation.evaluation import (
+    RECALL_AT,
+    aggregate_latencies,
+    aggregate_metrics,
+    find_rank,
+    ranking_metrics,
+)
+
+DATASET_DIR = "../../data/testing_dataset_twhg_with_latlng_and_places"
+SNAPSHOT_FILE = "../../data/catalog_snapshot.npz"
+REPORT_FILE = "../../reports/task_1/retriever_sweep.md"
+RESULTS_JSON_FILE = "../../reports/task_1/retriever_sweep.json"
+EVAL_TOPK = max(RECALL_AT)
+LEADERBOARD_SIZE = 20
+
+
+def numbered_query_text(abstract_requirements: list[str]) -> str:
+    items = [x.strip() for x in abstract_requirements if x.strip()]
+    return "房屋需求：" + " ".join(f"{i}. {x}" for i, x in enumerate(items, start=1))
+
+
+def plain_query_text(abstract_requirements: list[str]) -> str:
+    return "，".join(x.strip() for x in abstract_requirements if x.strip())
+
+
+QUERY_TEMPLATES = {
+    "default": build_query_text,
+    "numbered": numbered_query_text,
+    "plain": plain_query_text,
+}
+
+DEFAULT_GRID = {
+    "graph_limit": [50, 100, 200, 400],
+    "template": list(QUERY_TEMPLATES),
+    "multi_vector": [False, True],
+    "diversify": [False, True],
+    "mmr_lambda": [0.6, 0.8],
+    "street_cap": [0, 2],
+}
+
+
+def expand_grid(grid: dict) -> list[dict]:
+    """Cartesian product of the grid, with MMR-only knobs collapsed when diversify is off."""
+    keys = list(grid)
+    configs, seen = [], set()
+    for values in itertools.product(*(grid[k] for k in keys)):
+        config = dict(zip(keys, values))
+        if not config.get("diversify"):
+            config["mmr_lambda"] = None
+            config["street_cap"] = None
+        key = json.dumps(config, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+    return configs
+
+
+def load_questions() -> list[dict]:
+    questions = []
+    for file_path in sorted(glob(os.path.join(DATASET_DIR, "*.json"))):
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for q in data.get("question_list", []):
+            questions.append({"property_id": data.get("property_id"), "question": q["question"], "type": q.get("type")})
+    return questions
+
+
+async def prepare_question(question: dict, templates: list[str]) -> dict | None:
+    try:
+        intent = await extract_user_question_intent(user_query=question["question"])
+        texts = {name: QUERY_TEMPLATES[name](intent.abstract_requirements) for name in templates}
+        vectors = await asyncio.gather(*(embed(text) for text in texts.values()))
+    except Exception as e:
+        print(f"Error preparing question: {question['question']}. Error: {e}")
+        return None
+
+    return {
+        **question,
+        "cypher_variables": intent.cypher_variables.model_dump(mode="json"),
+        "q_emb": dict(zip(texts, (np.asarray(v, dtype=np.float32) for v in vectors))),
+    }
+
+
+async def prepare(questions: list[dict], templates: list[str], refresh_snapshot: bool, record: bool) -> list[dict]:
+    if CASSETTE_MODE == "off":
+        if record:
+            for name in ("intent", "embedding"):
+                get_cassette(name).mode = "record"
+            print(f"[Info] --record: writing intents and query embeddings to the cassettes in {CASSETTE_DIR}")
+        else:
+            print("[Info] CASSETTE_MODE is off: intents and query embeddings are not kept; "
+                  "pass --record to reuse them in the next sweep")
+
+    try:
+        if refresh_snapshot or not os.path.exists(SNAPSHOT_FILE):
+            snapshot = await CatalogSnapshot.from_neo4j()
+            snapshot.save(SNAPSHOT_FILE)
+            print(f"Exported {len(snapshot)} properties (catalog version {snapshot.catalog_version}) to {SNAPSHOT_FILE}")
+        else:
+            snapshot = CatalogSnapshot.load(SNAPSHOT_FILE)
+            try:
+                version = await get_catalog_version(max_age=0)
+                if version != snapshot.catalog_version:
+                    print(f"[Warn] Snapshot is at catalog version {snapshot.catalog_version}, Neo4j is at {version}; "
+                          f"re-run with --refresh-snapshot")
+            except Exception as e:
+                print(f"[Info] Could not reach Neo4j to check the snapshot version ({e})")
+
+        prepared = await asyncio.gather(*(prepare_question(q, templates) for q in questions))
+    finally:
+        await neo4j_client.close()
+
+    print(get_cassette("intent"), get_cassette("embedding"))
+    return [p for p in prepared if p is not None]
+
+
+_snapshot: CatalogSnapshot | None = None
+_questions: list[dict] = []
+
+
+def init_worker(snapshot_path: str, questions: list[dict]):
+    global _snapshot, _questions
+    _snapshot = CatalogSnapshot.load(snapshot_path)
+    _questions = questions
+
+
+def evaluate_config(config: dict) -> dict:
+    snapshot = _snapshot
+    property_ids = snapshot.columns["property_id"]
+    street_keys = snapshot.columns["street_key"]
+
+    records = []
+    for q in _questions:
+        idx = snapshot.filter(q["cypher_variables"], config["graph_limit"])
+
+        start = time.perf_counter()
+        scores = snapshot.scores(q["q_emb"][config["template"]], idx, config["multi_vector"])
+        if config["diversify"]:
+            groups = [street_keys[i] or property_ids[i] for i in idx]
+            order = mmr_select(scores, snapshot.listing[idx], EVAL_TOPK, mmr_lambda=config["mmr_lambda"],
+                               groups=groups, group_cap=config["street_cap"])
+        else:
+            order = np.argsort(-scores, kind="stable")[:EVAL_TOPK]
+        elapsed = time.perf_counter() - start
+
+        results = [{"property_id": property_ids[idx[i]]} for i in order]
+        records.append({"metrics": ranking_metrics(find_rank(results, q["property_id"])), "timings": {"ranking": elapsed}})
+
+    return {"config": config, "metrics": aggregate_metrics(records), "latency_ms": aggregate_latencies(records)}
+
+
+def sort_key(result: dict):
+    m = result["metrics"]
+    return -m.get("recall@10", 0.0), -m.get("mrr", 0.0), result["latency_ms"].get("ranking", {}).get("p95", 0.0)
+
+
+def write_report(results: list[dict], n_questions: int, elapsed: float):
+    metric_keys = [k for k in results[0]["metrics"] if k != "questions"]
+    config_keys = list(results[0]["config"])
+    lines = [
+        "# Retriever Parameter Sweep",
+        "",
+        f"{len(results)} grid points x {n_questions} questions in {elapsed:.1f}s. "
+        f"Latency is local ranking time (score + sort/MMR) on the snapshot.",
+        "",
+        "| # | " + " | ".join(config_keys) + " | " + " | ".join(metric_keys) + " | ranking p50 ms | ranking p95 ms |",
+        "|---|" + "---|" * (len(config_keys) + len(metric_keys) + 2),
+    ]
+    for i, r in enumerate(results, start=1):
+        lat = r["latency_ms"].get("ranking", {})
+        lines.append(
+            f"| {i} | " + " | ".join(str(r["config"][k]) for k in config_keys) + " | "
+            + " | ".join(f"{r['metrics'][k]:.3f}" for k in metric_keys)
+            + f" | {lat.get('p50', 0.0):.3f} | {lat.get('p95', 0.0):.3f} |"
+        )
+
+    os.makedirs(os.path.dirname(REPORT_FILE), exist_ok=True)
+    with open(REPORT_FILE, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+    with open(RESULTS_JSON_FILE, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--grid", help="JSON file mapping parameter -> list of values (defaults to DEFAULT_GRID)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--limit", type=int, help="Only use the first N questions")
+    parser.add_argument("--refresh-snapshot", action="store_true")
+    parser.add_argument("--record", action="store_true",
+                        help="Record intents and query embeddings to the cassettes when CASSETTE_MODE is off")
+    args = parser.parse_args()
+
+    grid = dict(DEFAULT_GRID)
+    if args.grid:
+        with open(args.grid, "r", encoding="utf-8") as f:
+            grid.update(json.load(f))
+    configs = expand_grid(grid)
+
+    questions = load_questions()[:args.limit]
+    print(f"Preparing {len(questions)} questions x {len(grid['template'])} templates")
+    prepared = asyncio.run(prepare(questions, list(grid["template"]), args.refresh_snapshot, args.record))
+
+    print(f"Evaluating {len(configs)} grid points on {args.workers} workers")
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                             initargs=(SNAPSHOT_FILE, prepared)) as pool:
+        chunksize = max(1, len(configs) // (args.workers * 4))
+        results = list(pool.map(evaluate_config, configs, chunksize=chunksize))
+    elapsed = time.perf_counter() - start
+
+    results.sort(key=sort_key)
+    write_report(results, len(prepared), elapsed)
+
+    print(f"Sweep finished in {elapsed:.1f}s; top {min(LEADERBOARD_SIZE, len(results))}:")
+    for r in results[:LEADERBOARD_SIZE]:
+        m = r["metrics"]
+        print(f"  recall@10={m['recall@10']:.3f} mrr={m['mrr']:.3f} {r['config']}")
+    print(f"Report saved to {REPORT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
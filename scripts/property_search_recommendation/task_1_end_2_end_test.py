@@ -1,117 +1,342 @@
+import argparse
 import asyncio
+import hashlib
+import html
 import json
 import os
+import time
+from dataclasses import asdict, dataclass, field
 from glob import glob
-from typing import Dict
+from typing import Dict, List
 
+from config import (
+    CASSETTE_MODE,
+    CROSS_ENCODER_MODEL,
+    MULTI_VECTOR_SCORING,
+    OPENAI_LLM_MODEL,
+    RERANK_SHORTLIST_SIZE,
+    RERANKER_BACKEND,
+)
+from infrastructures.cassette.store import get_cassette
+from infrastructures.concurrency.limiter import get_limiter, is_rate_limited
+from infrastructures.embedding.provider import embedding_signature
+from infrastructures.llm.chain_registry import chain_registry
 from infrastructures.neo4j.client import neo4j_client
 from infrastructures.neo4j.retriever import hybrid_search
+from infrastructures.results.jsonl_sink import JsonlSink, iter_jsonl
+from services.property_search_recommendation.evaluation import (
+    RECALL_AT,
+    find_rank,
+    ranking_metrics,
+    summarize_by_type,
+)
 from services.property_search_recommendation.models import RealEstateQuery
 from services.property_search_recommendation import extract_user_question_intent
+from services.property_search_recommendation.reranker import get_reranker
 
 DATASET_DIR = "../../data/testing_dataset_twhg_with_latlng_and_places"
 REPORT_FILE = "../../reports/task_1/evaluation_report.md"
+HTML_REPORT_FILE = "../../reports/task_1/evaluation_report.html"
+# Append-only per-question results; written as questions finish and used to resume interrupted runs.
+RESULTS_JSONL_FILE = "../../reports/task_1/evaluation_results.jsonl"
+# Machine-readable results (per-question records + aggregates) next to the Markdown report.
+RESULTS_JSON_FILE = "../../reports/task_1/evaluation_report.json"
+RESULTS_PARQUET_FILE = "../../reports/task_1/evaluation_report.parquet"
 
+# Workers only pull (property, question) pairs off the queue; the per-downstream
+# limiters (llm / embedding / neo4j) decide how many calls are actually in flight.
+NUM_WORKERS = 64
+MAX_ATTEMPTS = 5
+# Retrieve deep enough for recall@50; the headline "found" stays top-10.
+EVAL_TOPK = max(RECALL_AT)
+FOUND_AT = 10
+GRAPH_LIMIT = 200
 
-async def process_question(question_data: Dict, target_property_id: str) -> bool:
-    question = question_data["question"]
-    try:
-        user_intent: RealEstateQuery = await extract_user_question_intent(user_query=question)
-        results = await hybrid_search(query=user_intent, graph_limit=200, topk=10)
 
-        found = False
-        for r in results:
-            if r['property_id'] == target_property_id:
-                found = True
-                break
-        return found
-    except Exception as e:
-        print(f"Error processing question: {question}. Error: {e}")
-        return False
+@dataclass
+class QuestionJob:
+    property_id: str
+    file_name: str
+    question: str
+    type: str | None = None
+    attempts: int = 0
+    rank: int | None = None
+    metrics: Dict[str, float] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    error: str | None = None
+    config_id: str | None = None
 
+    @property
+    def found(self) -> bool:
+        return self.rank is not None and self.rank <= FOUND_AT
+
+    @property
+    def key(self) -> tuple[str, str]:
+        return self.property_id, self.question
+
+    def to_record(self) -> Dict:
+        return {**asdict(self), "found": self.found}
+
+
+async def process_question(job: QuestionJob):
+    timings = {}
+
+    start = time.perf_counter()
+    user_intent: RealEstateQuery = await extract_user_question_intent(user_query=job.question)
+    timings["intent_extraction"] = time.perf_counter() - start
+
+    # Bypass the response cache so every question pays (and reports) the real stage latencies.
+    results = await hybrid_search(query=user_intent, graph_limit=GRAPH_LIMIT, topk=EVAL_TOPK, reranker=get_reranker(),
+                                  use_cache=False, timings=timings)
+
+    job.rank = find_rank(results, job.property_id)
+    job.metrics = ranking_metrics(job.rank)
+    job.timings = timings
+
+
+async def worker(queue: asyncio.Queue, sink: JsonlSink):
+    while True:
+        job: QuestionJob = await queue.get()
+        try:
+            job.attempts += 1
+            await process_question(job)
+            sink.append(job.to_record())
+        except Exception as e:
+            if is_rate_limited(e) and job.attempts < MAX_ATTEMPTS:
+                # The limiter already halved its window; back off and let another worker retry later.
+                await asyncio.sleep(2 ** job.attempts)
+                queue.put_nowait(job)
+            else:
+                print(f"Error processing question: {job.question}. Error: {e}")
+                job.rank = None
+                job.metrics = ranking_metrics(None)
+                job.error = str(e)
+                sink.append(job.to_record())
+        finally:
+            queue.task_done()
+
+
+def load_jobs(files: List[str]) -> List[QuestionJob]:
+    jobs = []
+    for file_path in files:
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            jobs.extend(
+                QuestionJob(
+                    property_id=data.get("property_id"),
+                    file_name=os.path.basename(file_path),
+                    question=q["question"],
+                    type=q.get("type"),
+                )
+                for q in data.get("question_list", [])
+            )
+        except Exception as e:
+            print(f"Error processing file {file_path}: {e}")
+    return jobs
+
+
+def load_jobs_from_store(dataset: str) -> List[QuestionJob]:
+    """Questions of one dataset from the columnar store (scripts/dataset_store/build_dataset_store.py)."""
+    from infrastructures.dataset_store.store import DatasetStore
+
+    store = DatasetStore()
+    questions = store.read("questions", columns=["property_id", "question", "type"], filter={"dataset": dataset})
+    files = store.read("properties", columns=["property_id", "file_name"])
+    return [
+        QuestionJob(property_id=row["property_id"], file_name=row["file_name"] or "", question=row["question"],
+                    type=row["type"])
+        for row in questions.join(files, "property_id", join_type="left outer").to_pylist()
+    ]
 
-async def process_property(file_path: str) -> Dict:
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
 
-        property_id = data.get("property_id")
-        question_list = data.get("question_list", [])
+def run_config(store_dataset: str | None = None) -> Dict:
+    """Everything that changes a question's result; records of another configuration are never reused."""
+    return {
+        "dataset": f"store:{store_dataset}" if store_dataset else DATASET_DIR,
+        "intent_model": OPENAI_LLM_MODEL,
+        "embedding": embedding_signature(),
+        "multi_vector": MULTI_VECTOR_SCORING,
+        "reranker": f"cross_encoder:{CROSS_ENCODER_MODEL}" if RERANKER_BACKEND == "cross_encoder" else RERANKER_BACKEND,
+        "rerank_shortlist": RERANK_SHORTLIST_SIZE,
+        "graph_limit": GRAPH_LIMIT,
+        "topk": EVAL_TOPK,
+    }
 
-        print(f"Processing property: {property_id} from {os.path.basename(file_path)}")
 
-        success_count = 0
-        results = []
+def config_fingerprint(config: Dict) -> str:
+    canonical = json.dumps(config, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
 
-        question_tasks = [process_question(q, property_id) for q in question_list]
-        question_outcomes = await asyncio.gather(*question_tasks)
 
-        for q, is_found in zip(question_list, question_outcomes):
-            if is_found:
-                success_count += 1
-            results.append({
-                "question": q["question"],
-                "found": is_found
-            })
+def load_records(path: str, config_id: str) -> List[Dict]:
+    """
+    Latest record per (property, question) of the `config_id` configuration; a question retried in a later run
+    replaces its earlier record. Records of other configurations (or from before fingerprints) are skipped.
+    """
+    latest, other = {}, 0
+    for record in iter_jsonl(path):
+        if record.get("config_id") != config_id:
+            other += 1
+            continue
+        latest[(record["property_id"], record["question"])] = record
+    if other:
+        print(f"[Info] Ignoring {other} records of other configurations in {path}")
+    return list(latest.values())
 
-        return {
+
+def summarize(records: List[Dict]) -> List[Dict]:
+    by_file: Dict[tuple, List[Dict]] = {}
+    for r in records:
+        by_file.setdefault((r["file_name"], r["property_id"]), []).append(r)
+
+    summaries = []
+    for (file_name, property_id), group in sorted(by_file.items()):
+        total = len(group)
+        success_count = sum(r["found"] for r in group)
+        summaries.append({
             "property_id": property_id,
-            "file_name": os.path.basename(file_path),
-            "total_questions": len(question_list),
+            "file_name": file_name,
+            "total_questions": total,
             "success_count": success_count,
-            "recall_rate": success_count / len(question_list) if question_list else 0,
-            "details": results
-        }
-    except Exception as e:
-        print(f"Error processing file {file_path}: {e}")
-        return {
-            "property_id": "ERROR",
-            "file_name": os.path.basename(file_path),
-            "total_questions": 0,
-            "success_count": 0,
-            "recall_rate": 0,
-            "details": []
-        }
-
-
-async def main():
-    files = sorted(glob(os.path.join(DATASET_DIR, "*.json")))
-    print(f"Found {len(files)} files in {DATASET_DIR}")
-
-    report_lines = [
-        "# End-to-End Retrieval Evaluation Report",
-        "",
-        "| Property ID | File Name | Recall Rate | Success/Total |",
-        "|---|---|---|---|"
+            "recall_rate": success_count / total if total else 0,
+            "mrr": sum(r["metrics"].get("mrr", 0.0) for r in group) / total if total else 0,
+        })
+    return summaries
+
+
+def build_report(records: List[Dict], by_type: Dict) -> List[tuple[str, List[str], List[List[str]]]]:
+    """Report as (section title, header, rows) tables, rendered to both Markdown and HTML."""
+    metric_keys = [k for k in by_type.get("all", {}).get("metrics", {}) if k != "questions"]
+    metrics_rows = [
+        [name, str(group["metrics"].get("questions", 0))] + [f"{group['metrics'][k]:.3f}" for k in metric_keys]
+        for name, group in by_type.items()
+    ]
+    latency_rows = [
+        [name, stage, f"{pct['p50']:.1f}", f"{pct['p95']:.1f}", f"{pct['p99']:.1f}"]
+        for name, group in by_type.items()
+        for stage, pct in group["latency_ms"].items()
+    ]
+    property_rows = [
+        [res["property_id"], res["file_name"], f"{res['recall_rate']:.2f}", f"{res['mrr']:.2f}",
+         f"{res['success_count']}/{res['total_questions']}"]
+        for res in summarize(records)
+    ]
+    return [
+        ("Ranking Metrics", ["Type", "Questions"] + metric_keys, metrics_rows),
+        ("Stage Latency (ms)", ["Type", "Stage", "p50", "p95", "p99"], latency_rows),
+        ("Per Property", ["Property ID", "File Name", f"Recall Rate (@{FOUND_AT})", "MRR", "Success/Total"],
+         property_rows),
+    ]
+
+
+def render_markdown(sections) -> str:
+    lines = ["# End-to-End Retrieval Evaluation Report"]
+    for title, header, rows in sections:
+        lines += ["", f"## {title}", "", "| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+        lines += ["| " + " | ".join(row) + " |" for row in rows]
+    return "\n".join(lines)
+
+
+def render_html(sections) -> str:
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>End-to-End Retrieval Evaluation Report</title>",
+        "<style>body{font-family:sans-serif}table{border-collapse:collapse;margin-bottom:2em}"
+        "td,th{border:1px solid #ccc;padding:4px 8px;text-align:right}th{background:#f3f3f3}</style></head><body>",
+        "<h1>End-to-End Retrieval Evaluation Report</h1>",
     ]
+    for title, header, rows in sections:
+        parts.append(f"<h2>{html.escape(title)}</h2><table><tr>"
+                     + "".join(f"<th>{html.escape(h)}</th>" for h in header) + "</tr>")
+        parts += ["<tr>" + "".join(f"<td>{html.escape(c)}</td>" for c in row) + "</tr>" for row in rows]
+        parts.append("</table>")
+    parts.append("</body></html>")
+    return "\n".join(parts)
 
-    # Batch processing: 2 files at a time
-    batch_size = 2
-    all_results = []
 
+def write_reports(records: List[Dict], config: Dict):
+    by_type = summarize_by_type(records)
+    sections = build_report(records, by_type)
+    with open(REPORT_FILE, "w", encoding="utf-8") as f:
+        f.write(render_markdown(sections))
+    with open(HTML_REPORT_FILE, "w", encoding="utf-8") as f:
+        f.write(render_html(sections))
+
+    with open(RESULTS_JSON_FILE, "w", encoding="utf-8") as f:
+        json.dump({"config": config, "summary": by_type, "questions": records}, f, ensure_ascii=False, indent=2)
     try:
-        for i in range(0, len(files), batch_size):
-            batch_files = files[i:i + batch_size]
-            print(
-                f"Processing batch {i // batch_size + 1}/{(len(files) + batch_size - 1) // batch_size}: {[os.path.basename(f) for f in batch_files]}")
+        import pandas as pd
+        pd.json_normalize(records).to_parquet(RESULTS_PARQUET_FILE, index=False)
+    except ImportError as e:
+        print(f"[Info] Skipping Parquet output ({e})")
+
 
-            tasks = [process_property(f) for f in batch_files]
-            batch_results = await asyncio.gather(*tasks)
-            all_results.extend(batch_results)
+async def main(fresh: bool = False, store_dataset: str | None = None):
+    if store_dataset:
+        jobs = load_jobs_from_store(store_dataset)
+        print(f"Loaded {len(jobs)} questions of dataset {store_dataset!r} from the dataset store")
+    else:
+        files = sorted(glob(os.path.join(DATASET_DIR, "*.json")))
+        print(f"Found {len(files)} files in {DATASET_DIR}")
+        jobs = load_jobs(files)
 
-            for res in batch_results:
-                line = f"| {res['property_id']} | {res['file_name']} | {res['recall_rate']:.2f} | {res['success_count']}/{res['total_questions']} |"
-                report_lines.append(line)
+    config = run_config(store_dataset)
+    config_id = config_fingerprint(config)
+    print(f"Configuration {config_id}: {config}")
+    for job in jobs:
+        job.config_id = config_id
 
-            # Write report incrementally
-            with open(REPORT_FILE, "w", encoding="utf-8") as f:
-                f.write("\n".join(report_lines))
+    if fresh and os.path.exists(RESULTS_JSONL_FILE):
+        os.remove(RESULTS_JSONL_FILE)
+    # Resume: questions that already have a successful record under this configuration are not asked again.
+    recorded = load_records(RESULTS_JSONL_FILE, config_id)
+    done = {(r["property_id"], r["question"]) for r in recorded if not r.get("error")}
 
+    chain_registry.warm_up()
+    queue: asyncio.Queue = asyncio.Queue()
+    for job in jobs:
+        if job.key not in done:
+            queue.put_nowait(job)
+    print(f"Queued {queue.qsize()} questions ({len(jobs) - queue.qsize()} already recorded), "
+          f"{NUM_WORKERS} workers, cassette mode: {CASSETTE_MODE}")
+
+    sink = JsonlSink(RESULTS_JSONL_FILE)
+    workers = [asyncio.create_task(worker(queue, sink)) for _ in range(min(NUM_WORKERS, max(queue.qsize(), 1)))]
+    try:
+        await queue.join()
     finally:
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        sink.close()
         await neo4j_client.close()
 
-    print(f"Report saved to {REPORT_FILE}")
+        # Report on the questions of this dataset only, however many runs it took to record them.
+        keys = {job.key for job in jobs}
+        records = load_records(RESULTS_JSONL_FILE, config_id)
+        write_reports([r for r in records if (r["property_id"], r["question"]) in keys], config)
+        for name in ("llm", "embedding", "neo4j"):
+            print(get_limiter(name))
+        if CASSETTE_MODE != "off":
+            print(get_cassette("intent"), get_cassette("embedding"))
+
+    print(f"Report saved to {REPORT_FILE} and {HTML_REPORT_FILE}")
+    print(f"Results saved to {RESULTS_JSONL_FILE} and {RESULTS_JSON_FILE}")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fresh", action="store_true", help=f"Discard {RESULTS_JSONL_FILE} instead of resuming")
+    parser.add_argument("--render-only", action="store_true", help="Rebuild the reports from recorded results")
+    parser.add_argument("--from-store", metavar="DATASET", default=None,
+                        help="Read questions of DATASET (e.g. v2) from the dataset store instead of DATASET_DIR")
+    args = parser.parse_args()
+
+    if args.render_only:
+        # Renders the records of the configuration the current environment (and --from-store) describes.
+        config = run_config(args.from_store)
+        write_reports(load_records(RESULTS_JSONL_FILE, config_fingerprint(config)), config)
+        print(f"Report saved to {REPORT_FILE} and {HTML_REPORT_FILE}")
+    else:
+        asyncio.run(main(fresh=args.fresh, store_dataset=args.from_store))
@@ -1,36 +1,37 @@
+import argparse
 import asyncio
-import json
 from pathlib import Path
 
+from infrastructures.listing.records import JudgeResult, load_image_matches
+from infrastructures.llm.chain_registry import chain_registry
+from infrastructures.pipeline.change_feed import ChangeFeed
+from infrastructures.serialization import json_codec
 from services.vlm_tag_quality_service import using_vlm_as_a_judge
 
 
-async def process_single_file(input_file_path: Path, output_dir: Path):
+async def process_single_file(input_file_path: Path, output_dir: Path) -> bool:
     """
     處理單一 JSON 檔案的邏輯
     """
     print(f"  [開始] 處理檔案: {input_file_path.name}")
 
     try:
-        # 1. 讀取檔案
-        with open(input_file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
+        # 1. 讀取檔案 (ImageMatch records)
         tasks = []
-        items_to_process = data.get("matching_result_list", [])
+        items_to_process = load_image_matches(str(input_file_path))
 
         if not items_to_process:
             print(f"  [跳過] {input_file_path.name} (無資料)")
-            return
+            return True
 
         # 2. 建立該檔案內所有圖片的任務
         for image_object in items_to_process:
-            feature = image_object["extracted_feature"]
+            feature = image_object.extracted_feature
             task = using_vlm_as_a_judge(
-                room_name=feature["room"],
-                tag_info=" ".join(feature["tag_list"]),
-                raw_description=feature["raw_description"],
-                image_url=image_object["matched_image"]
+                room_name=feature.room,
+                tag_info=" ".join(feature.tag_list),
+                raw_description=feature.raw_description,
+                image_url=image_object.matched_image
             )
             tasks.append(task)
 
@@ -39,7 +40,7 @@ async def process_single_file(input_file_path: Path, output_dir: Path):
 
         # 4. 整理結果 (這裡是用來修復 JSON serializable error 的關鍵)
         output_data = []
-        for original_obj, result in zip(items_to_process, results):
+        for index, (original_obj, result) in enumerate(zip(items_to_process, results)):
 
             # --- 錯誤處理 ---
             if isinstance(result, Exception):
@@ -53,39 +54,50 @@ async def process_single_file(input_file_path: Path, output_dir: Path):
                 judge_result = result.model_dump()
 
             # --- 組合資料以確保 Traceability ---
-            output_entry = {
-                # 這裡保留原始的所有資訊 (包含 Image URL, Tags, Room Name)
-                # 讓你日後可以 Trace 回去
-                "original_input": original_obj,
-
-                # 這裡是 VLM 的評分結果
-                "evaluation": judge_result
-            }
-            output_data.append(output_entry)
+            # 只存指回 rematch 檔 (同檔名) matching_result_list[index] 的參照，不再整份複製原始輸入
+            output_data.append(JudgeResult(original_obj.ref(index), judge_result))
 
         # 5. 寫入檔案
         output_file_path = output_dir / input_file_path.name
-        with open(output_file_path, 'w', encoding='utf-8') as f:
-            # ensure_ascii=False 讓中文可以正常顯示，不會變成 \uXXXX
-            json.dump(output_data, f, ensure_ascii=False, indent=4)
+        json_codec.dump_file(output_data, str(output_file_path), indent=True)
+
+        # 有任何圖片失敗就回報整個檔案失敗，--delta 下一輪才會重新評估 (已成功的結果仍先存檔)
+        failed_items = sum(isinstance(r, Exception) for r in results)
+        if failed_items:
+            print(f"  [部分失敗] {input_file_path.name}: {failed_items}/{len(results)} 張圖片失敗，已存檔，待重試")
+            return False
 
         print(f"  [完成] {input_file_path.name} -> 已存檔")
+        return True
 
     except Exception as e:
         print(f"  [錯誤] 檔案 {input_file_path.name} 發生異常: {e}")
+        return False
 
 
-async def main():
+async def main(delta: bool = False):
     # 設定路徑
     input_dir = Path("../../data/vlm_rematch_add_info_twhg_with_latlng_and_places/")
     output_dir = Path("../../data/vlm_tag_quality_service/vlm_as_a_judge/")
 
+    chain_registry.warm_up()
+
     # 建立目錄 (包含 parents)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    # 取得所有 .json 檔案並排序
-    json_files = sorted(list(input_dir.glob("*.json")))
+    feed = changes = None
+    if delta:
+        # 只評估 change feed 回報的新增/變更物件，已下架物件的結果直接刪除
+        feed = ChangeFeed()
+        changes = feed.delta("judge", upstream="add_raw_description")
+        print(f"Change feed: {changes.summary()}")
+        json_files = [input_dir / c.file_name for c in changes.upserts]
+        changes.remove_outputs(str(output_dir))
+    else:
+        # 取得所有 .json 檔案並排序
+        json_files = sorted(list(input_dir.glob("*.json")))
     total_files = len(json_files)
+    failed = []
 
     # 設定 Batch Size (一次處理幾個 JSON 檔)
     BATCH_SIZE = 20
@@ -104,10 +116,17 @@ async def main():
         file_tasks = [process_single_file(f, output_dir) for f in current_batch_files]
 
         # 等待這個 Batch 的所有檔案都處理完，才進入下一個 Batch
-        await asyncio.gather(*file_tasks)
+        results = await asyncio.gather(*file_tasks)
+        failed += [f.name for f, ok in zip(current_batch_files, results) if not ok]
+
+    if changes:
+        feed.commit(changes, failed)
 
     print("\n所有 Batch 處理完成！")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--delta", action="store_true",
+                        help="Only judge the listings the change feed reports since the last --delta run")
+    asyncio.run(main(delta=parser.parse_args().delta))
@@ -1,3 +1,4 @@
+import argparse
 import json
 import os
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -6,7 +7,8 @@ import requests
 from google import genai
 from google.genai import types
 
-from config import GEMINI_AI_STUDIO_API_KEY
+from config import GEMINI_AI_STUDIO_API_KEY, GEMINI_BASE_URL
+from infrastructures.pipeline.change_feed import ChangeFeed
 
 INPUT_DIR = "../../data/cleaned_twhg_with_latlng_and_places/"
 OUTPUT_DIR = "../../data/vlm_rematch_twhg_with_latlng_and_places/"
@@ -15,6 +17,7 @@ OUTPUT_DIR = "../../data/vlm_rematch_twhg_with_latlng_and_places/"
 def image_description_rematching(image_bytes_data_list: list[bytes], object_description: str):
     client = genai.Client(
         api_key=GEMINI_AI_STUDIO_API_KEY,
+        http_options=types.HttpOptions(base_url=GEMINI_BASE_URL) if GEMINI_BASE_URL else None,
     )
 
     model = "gemini-flash-latest"
@@ -217,14 +220,28 @@ def process_single_file(file_path: str):
 
 
 if __name__ == "__main__":
-    json_files = [
-        os.path.join(INPUT_DIR, f)
-        for f in os.listdir(INPUT_DIR)
-        if f.endswith('.json')
-    ]
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--delta", action="store_true",
+                        help="Only rematch the listings the change feed reports since the last --delta run")
+    args = parser.parse_args()
+
+    feed = delta = None
+    if args.delta:
+        feed = ChangeFeed()
+        delta = feed.delta("rematch", upstream="clean")
+        print(f"Change feed: {delta.summary()}")
+        json_files = [os.path.join(INPUT_DIR, c.file_name) for c in delta.upserts]
+        print(f"Removed {delta.remove_outputs(OUTPUT_DIR)} outputs of removed listings")
+    else:
+        json_files = [
+            os.path.join(INPUT_DIR, f)
+            for f in os.listdir(INPUT_DIR)
+            if f.endswith('.json')
+        ]
 
     total_files = len(json_files)
     BATCH_SIZE = 10
+    failed = []
     print(f"Found {total_files} files. Starting batch processing with size {BATCH_SIZE}...")
     with ThreadPoolExecutor(max_workers=BATCH_SIZE) as executor:
         futures = {executor.submit(process_single_file, file_path): file_path for file_path in json_files}
@@ -232,4 +249,9 @@ if __name__ == "__main__":
         for future in as_completed(futures):
             result = future.result()
             completed_count += 1
+            if result.startswith("[Error]"):
+                failed.append(os.path.basename(futures[future]))
             print(f"[{completed_count}/{total_files}] {result}")
+
+    if delta:
+        feed.commit(delta, failed)
@@ -1,104 +1,131 @@
+import argparse
 import asyncio
-import json
 from pathlib import Path
 
+from infrastructures.listing.records import JudgeResult, load_image_matches
+from infrastructures.llm.chain_registry import chain_registry
+from infrastructures.pipeline.change_feed import ChangeFeed
+from infrastructures.serialization import json_codec
 from services.vlm_tag_quality_service import using_vlm_with_spatial_signals_info_as_a_judge
+from services.vlm_tag_quality_service.depth import depth_model, depth_worker
 
 
-async def process_single_file_sequential(input_file_path: Path, output_dir: Path):
+async def judge_item(index: int, item) -> JudgeResult:
+    extracted_feature = item.extracted_feature
+
+    try:
+        # 深度推論交給 depth worker (micro-batch)，這裡只是等待結果，不會卡住其他 Item
+        response = await using_vlm_with_spatial_signals_info_as_a_judge(
+            room_name=extracted_feature.room,
+            tag_info=" ".join(extracted_feature.tag_list),
+            raw_description=extracted_feature.raw_description,
+            image_url=item.matched_image
+        )
+
+        # 處理 Pydantic output (如果 response 是 Pydantic model)
+        if hasattr(response, 'model_dump'):
+            judge_result = response.model_dump()
+        else:
+            judge_result = response
+
+    except Exception as e:
+        # 捕捉單一圖片處理失敗，不影響整個檔案
+        print(f"   ❌ Item {index + 1} 失敗: {e}")
+        judge_result = {"error": str(e), "status": "failed"}
+
+    # 組合結果 (與 Script 2 格式保持一致: 以參照指回 rematch 檔中的原始輸入)
+    return JudgeResult(item.ref(index), judge_result)
+
+
+async def process_single_file(input_file_path: Path, output_dir: Path) -> bool:
     """
-    循序處理單一檔案內的每一個 Item，避免顯存爆掉。
+    並發處理單一檔案內的所有 Item；顯存由 depth worker 的 batch 大小 (DEPTH_BATCH_SIZE) 控制。
     """
     print(f"📂 [開始檔案] {input_file_path.name}")
 
     try:
-        # 1. 讀取檔案
-        with open(input_file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        items_to_process = data.get("matching_result_list", [])
+        # 1. 讀取檔案 (ImageMatch records)
+        items_to_process = load_image_matches(str(input_file_path))
 
         if not items_to_process:
             print(f"   ⚠️ [跳過] {input_file_path.name} (無資料)")
-            return
-
-        output_data = []
-        total_items = len(items_to_process)
-
-        # 2. 【關鍵修改】使用 for loop 配合 await 進行循序處理
-        # 不使用 asyncio.gather，確保一次只對 Model 發送一個請求
-        for index, item in enumerate(items_to_process):
-            extracted_feature = item.get('extracted_feature', {})
-
-            # 提取參數
-            room_name = extracted_feature.get('room')
-            tag_info = extracted_feature.get('tag_list', [])
-            raw_description = extracted_feature.get('raw_description')
-            image_url = item.get('matched_image')
-
-            print(f"   > 正在處理 Item {index + 1}/{total_items} ...", end="\r")
-
-            try:
-                # 這裡直接 await，程式會暫停直到這張圖跑完，才跑下一張
-                response = await using_vlm_with_spatial_signals_info_as_a_judge(
-                    room_name=room_name,
-                    tag_info=" ".join(tag_info) if isinstance(tag_info, list) else str(tag_info),
-                    raw_description=raw_description,
-                    image_url=image_url
-                )
-
-                # 處理 Pydantic output (如果 response 是 Pydantic model)
-                if hasattr(response, 'model_dump'):
-                    judge_result = response.model_dump()
-                else:
-                    judge_result = response
-
-            except Exception as e:
-                # 捕捉單一圖片處理失敗，不影響整個檔案
-                print(f"\n   ❌ Item {index + 1} 失敗: {e}")
-                judge_result = {"error": str(e), "status": "failed"}
-
-            # 3. 組合結果 (與 Script 2 格式保持一致)
-            output_entry = {
-                "original_input": item,  # 保留原始輸入以利 Trace
-                "evaluation": judge_result
-            }
-            output_data.append(output_entry)
-
-        # 4. 該檔案全部跑完後，寫入結果
+            return True
+
+        # 2. 所有圖片同時送出
+        output_data = await asyncio.gather(*(judge_item(i, item) for i, item in enumerate(items_to_process)))
+
+        # 3. 該檔案全部跑完後，寫入結果
         output_file_path = output_dir / input_file_path.name
-        with open(output_file_path, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, ensure_ascii=False, indent=4)
+        json_codec.dump_file(output_data, str(output_file_path), indent=True)
 
-        print(f"\n✅ [完成檔案] {input_file_path.name} -> 已存檔")
+        # 有任何 Item 失敗就回報整個檔案失敗，--delta 下一輪才會重新評估 (已成功的結果仍先存檔)
+        failed_items = sum(r.evaluation.get("status") == "failed" for r in output_data)
+        if failed_items:
+            print(f"⚠️ [部分失敗] {input_file_path.name}: {failed_items}/{len(output_data)} 個 Item 失敗，已存檔，待重試")
+            return False
+
+        print(f"✅ [完成檔案] {input_file_path.name} -> 已存檔")
+        return True
 
     except Exception as e:
-        print(f"\n⛔ [檔案錯誤] {input_file_path.name} 發生異常: {e}")
+        print(f"⛔ [檔案錯誤] {input_file_path.name} 發生異常: {e}")
+        return False
 
 
-async def main():
+async def main(delta: bool = False):
     # 設定路徑
     input_dir = Path("../../data/vlm_rematch_add_info_twhg_with_latlng_and_places/")
     # 輸出路徑設定為你指定的 vlm_as_a_judge
     output_dir = Path("../../data/vlm_tag_quality_service/vlm_with_spatial_signals_info_as_a_judge/")
 
+    chain_registry.warm_up()
+
     # 建立目錄
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    # 取得所有 .json 檔案並排序
-    json_files = sorted(list(input_dir.glob("*.json")))
+    feed = changes = None
+    if delta:
+        # 只評估 change feed 回報的新增/變更物件，已下架物件的結果直接刪除
+        feed = ChangeFeed()
+        changes = feed.delta("spatial_judge", upstream="add_raw_description")
+        print(f"Change feed: {changes.summary()}")
+        json_files = [input_dir / c.file_name for c in changes.upserts]
+        changes.remove_outputs(str(output_dir))
+    else:
+        # 取得所有 .json 檔案並排序
+        json_files = sorted(list(input_dir.glob("*.json")))
     total_files = len(json_files)
+    failed = []
+
+    if json_files:
+        # 深度模型在這裡才載入 (DEPTH_MODEL_SIZE / DEPTH_DEVICE / DEPTH_BACKEND)，沒有 GPU 時自動改用 CPU
+        print(f"🧭 Depth model: {depth_model.describe()}")
+        print(f"🧭 Warm-up: {depth_model.warm_up():.1f}s")
+
+    # 設定 Batch Size (一次處理幾個 JSON 檔)
+    BATCH_SIZE = 10
+
+    print(f"🚀 總共發現 {total_files} 個檔案，每次處理 {BATCH_SIZE} 個...")
+
+    for i in range(0, total_files, BATCH_SIZE):
+        current_batch_files = json_files[i: i + BATCH_SIZE]
+        print(f"\n--- 進度: Batch {i // BATCH_SIZE + 1} / {(total_files + BATCH_SIZE - 1) // BATCH_SIZE} ---")
 
-    print(f"🚀 總共發現 {total_files} 個檔案，將採循序模式處理 (Save VRAM Mode)...")
+        results = await asyncio.gather(*(process_single_file(f, output_dir) for f in current_batch_files))
+        failed += [f.name for f, ok in zip(current_batch_files, results) if not ok]
 
-    # 逐一處理每個檔案
-    for i, file_path in enumerate(json_files):
-        print(f"\n--- 進度: 檔案 {i + 1} / {total_files} ---")
-        # 直接 await，確保一個檔案處理完才換下一個
-        await process_single_file_sequential(file_path, output_dir)
+    depth_worker.close()
+    if depth_worker.batches:
+        print(f"🧭 Depth worker: {depth_worker.images} images in {depth_worker.batches} batches")
+    depth_model.unload()
+    if changes:
+        feed.commit(changes, failed)
 
     print("\n🎉 所有檔案處理完成！")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--delta", action="store_true",
+                        help="Only judge the listings the change feed reports since the last --delta run")
+    asyncio.run(main(delta=parser.parse_args().delta))
\ No newline at end of file
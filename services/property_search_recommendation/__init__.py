@@ -1,12 +1,40 @@
+from functools import cache
+
+from config import OPENAI_LLM_MODEL
+from infrastructures.cassette.store import get_cassette, request_key
+from infrastructures.concurrency.limiter import get_limiter
 from services.property_search_recommendation.chains import get_extract_user_question_intent_chain
 from services.property_search_recommendation.models import RealEstateQuery
+from services.property_search_recommendation.prompts import (
+    EXTRACT_USER_QUESTION_INTENT_SYSTEM_PROMPT,
+    EXTRACT_USER_QUESTION_INTENT_USER_PROMPT,
+)
+
+
+@cache
+def _intent_prompt_hash() -> str:
+    # Editing the prompt or the output schema must not replay stale recordings.
+    return request_key({
+        "system": EXTRACT_USER_QUESTION_INTENT_SYSTEM_PROMPT,
+        "user": EXTRACT_USER_QUESTION_INTENT_USER_PROMPT,
+        "schema": RealEstateQuery.model_json_schema(),
+    })
 
 
 async def extract_user_question_intent(user_query: str) -> RealEstateQuery:
-    chain = get_extract_user_question_intent_chain()
-    response: RealEstateQuery = await chain.ainvoke(
-        {
-            "user_query": user_query
-        }
+    async def call() -> RealEstateQuery:
+        chain = get_extract_user_question_intent_chain()
+        async with get_limiter("llm").slot():
+            return await chain.ainvoke(
+                {
+                    "user_query": user_query
+                }
+            )
+
+    request = {"model": OPENAI_LLM_MODEL, "prompt": _intent_prompt_hash(), "user_query": user_query}
+    return await get_cassette("intent").call(
+        request,
+        call,
+        encode=lambda response: response.model_dump(mode="json"),
+        decode=RealEstateQuery.model_validate,
     )
-    return response
@@ -0,0 +1,57 @@
+import math
+
+import numpy as np
+
+RECALL_AT = (1, 5, 10, 50)
+NDCG_AT = 10
+LATENCY_PERCENTILES = (50, 95, 99)
+
+
+def find_rank(results: list[dict], target_property_id: str) -> int | None:
+    """1-based rank of the target property in `results`, None when it was not retrieved."""
+    for i, r in enumerate(results, start=1):
+        if r["property_id"] == target_property_id:
+            return i
+    return None
+
+
+def ranking_metrics(rank: int | None) -> dict:
+    """Per-question metrics for a single relevant property (binary relevance, so IDCG = 1)."""
+    metrics = {"mrr": 1 / rank if rank else 0.0}
+    metrics[f"ndcg@{NDCG_AT}"] = 1 / math.log2(rank + 1) if rank and rank <= NDCG_AT else 0.0
+    for k in RECALL_AT:
+        metrics[f"recall@{k}"] = 1.0 if rank and rank <= k else 0.0
+    return metrics
+
+
+def aggregate_metrics(records: list[dict]) -> dict:
+    """Mean ranking metrics over question records (each carrying `metrics`)."""
+    if not records:
+        return {}
+    keys = records[0]["metrics"].keys()
+    return {k: float(np.mean([r["metrics"][k] for r in records])) for k in keys} | {"questions": len(records)}
+
+
+def aggregate_latencies(records: list[dict]) -> dict:
+    """p50/p95/p99 in milliseconds per stage over question records (each carrying `timings` in seconds)."""
+    stages: dict[str, list[float]] = {}
+    for r in records:
+        for stage, seconds in r["timings"].items():
+            stages.setdefault(stage, []).append(seconds * 1000)
+
+    return {
+        stage: {f"p{p}": float(np.percentile(values, p)) for p in LATENCY_PERCENTILES}
+        for stage, values in stages.items()
+    }
+
+
+def summarize_by_type(records: list[dict]) -> dict:
+    """Aggregate metrics and latencies overall and split by question `type` (simple / abstract)."""
+    groups = {"all": records}
+    for r in records:
+        groups.setdefault(r.get("type") or "unknown", []).append(r)
+
+    return {
+        name: {"metrics": aggregate_metrics(group), "latency_ms": aggregate_latencies(group)}
+        for name, group in groups.items()
+    }
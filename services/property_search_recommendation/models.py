@@ -65,3 +65,21 @@ class RealEstateQuery(BaseModel):
         default_factory=list,
         description="A list of abstract requirements, stylistic preferences, or facility needs (Soft Filters) in Traditional Chinese (e.g., ['開放式廚房', '採光好'])."
     )
+
+
+class CandidateRelevance(BaseModel):
+    candidate_id: int = Field(
+        description="The numeric id of the candidate as given in the candidate list (e.g., 3 for [3])."
+    )
+    relevance_score: float = Field(
+        ge=0,
+        le=10,
+        description="How well the candidate satisfies the user's requirements. 0: irrelevant, 10: perfect match."
+    )
+
+
+class RerankResult(BaseModel):
+    scores: List[CandidateRelevance] = Field(
+        default_factory=list,
+        description="One relevance score per candidate in the input list."
+    )
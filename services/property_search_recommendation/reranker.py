@@ -0,0 +1,138 @@
+import asyncio
+from abc import ABC, abstractmethod
+from functools import cache
+
+from config import CROSS_ENCODER_MODEL, RERANK_CACHE_SIZE, RERANKER_BACKEND
+from infrastructures.cache.lru_cache import LRUCache
+from infrastructures.concurrency.limiter import get_limiter
+from services.property_search_recommendation.chains import get_rerank_candidates_chain
+from services.property_search_recommendation.models import RerankResult
+
+# Cross-encoders truncate at ~512 tokens anyway; keep LLM prompts bounded as well.
+RERANK_DOCUMENT_MAX_CHARS = 1500
+
+
+class Reranker(ABC):
+    """
+    Second-stage scorer over a small shortlist of `hybrid_search` candidates.
+    Scores are cached per (backend, query text, property_id), so only unseen pairs hit the model.
+    """
+    name = "base"
+
+    def __init__(self, cache_size: int = RERANK_CACHE_SIZE):
+        self.cache = LRUCache(maxsize=cache_size)
+
+    @abstractmethod
+    async def _score(self, query_text: str, documents: list[str]) -> list[float | None]:
+        """One score per document (None when the backend has no score for it)."""
+
+    async def score(self, query_text: str, candidates: list[dict]) -> list[float | None]:
+        keys = [(self.name, query_text, c["property_id"]) for c in candidates]
+        scores = [self.cache.get(k) for k in keys]
+
+        missing = [i for i, s in enumerate(scores) if s is None]
+        if missing:
+            new_scores = await self._score(query_text, [candidates[i]["document"] for i in missing])
+            for i, s in zip(missing, new_scores):
+                scores[i] = s
+                if s is not None:
+                    self.cache.set(keys[i], s)
+
+        return scores
+
+
+class CrossEncoderReranker(Reranker):
+    name = "cross_encoder"
+
+    def __init__(self, model_name: str = CROSS_ENCODER_MODEL, batch_size: int = 32, **kwargs):
+        super().__init__(**kwargs)
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            from sentence_transformers import CrossEncoder
+            self._model = CrossEncoder(self.model_name)
+        return self._model
+
+    def _predict(self, query_text: str, documents: list[str]) -> list[float]:
+        pairs = [(query_text, d) for d in documents]
+        scores = self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+        return [float(s) for s in scores]
+
+    async def _score(self, query_text: str, documents: list[str]) -> list[float | None]:
+        # CPU/GPU bound; keep the event loop free.
+        return await asyncio.to_thread(self._predict, query_text, documents)
+
+
+class LLMReranker(Reranker):
+    """Scores the whole shortlist in a single structured-output prompt."""
+    name = "llm"
+
+    async def _score(self, query_text: str, documents: list[str]) -> list[float | None]:
+        candidates = "\n\n".join(f"[{i}] {doc}" for i, doc in enumerate(documents))
+
+        chain = get_rerank_candidates_chain()
+        async with get_limiter("llm").slot():
+            response: RerankResult = await chain.ainvoke(
+                {
+                    "query_text": query_text,
+                    "candidates": candidates,
+                }
+            )
+
+        by_id = {s.candidate_id: s.relevance_score for s in response.scores}
+        return [by_id.get(i) for i in range(len(documents))]
+
+
+@cache
+def get_reranker(backend: str = RERANKER_BACKEND) -> Reranker | None:
+    """Process-wide reranker for the configured backend (shared so the score cache is shared)."""
+    if backend == "cross_encoder":
+        return CrossEncoderReranker()
+    if backend == "llm":
+        return LLMReranker()
+    if backend in ("", "none"):
+        return None
+    raise ValueError(f"Unknown reranker backend: {backend}")
+
+
+def build_document(row: dict) -> str:
+    text = "\n".join(x for x in (row.get("title"), row.get("text")) if x)
+    return text[:RERANK_DOCUMENT_MAX_CHARS]
+
+
+def _consume_exception(task: asyncio.Task):
+    if not task.cancelled():
+        task.exception()
+
+
+async def rerank(reranker: Reranker, query_text: str, candidates: list[dict], budget_ms: int) -> list[dict]:
+    """
+    Re-order `candidates` (already sorted by cosine score) with `reranker`.
+    Falls back to the incoming order when scoring exceeds `budget_ms` or fails; a timed-out
+    scoring call keeps running in the background so its scores still land in the cache.
+    """
+    if not candidates:
+        return candidates
+
+    task = asyncio.ensure_future(reranker.score(query_text, candidates))
+    task.add_done_callback(_consume_exception)
+    try:
+        scores = await asyncio.wait_for(asyncio.shield(task), timeout=budget_ms / 1000)
+    except TimeoutError:
+        print(f"[Warning] Rerank exceeded {budget_ms}ms budget, falling back to cosine order.")
+        return candidates
+    except Exception as e:
+        print(f"[Warning] Rerank failed, falling back to cosine order. Error: {e}")
+        return candidates
+
+    reranked = []
+    for c, s in zip(candidates, scores):
+        reranked.append({**c, "rerank_score": s})
+
+    # Stable sort: unscored candidates keep their cosine order after the scored ones.
+    reranked.sort(key=lambda x: (x["rerank_score"] is None, -(x["rerank_score"] or 0.0)))
+    return reranked
@@ -1,23 +1,14 @@
+import asyncio
 import base64
 from io import BytesIO
 
 import requests
-import torch
 from PIL import Image
-from transformers import pipeline
 
 from services.vlm_tag_quality_service.chains import get_vlm_as_a_judge_chain
+from services.vlm_tag_quality_service.depth import depth_worker
 from services.vlm_tag_quality_service.models import RealEstateTagEvaluation
 
-model_id = "depth-anything/Depth-Anything-V2-Large-hf"
-
-pipe = pipeline(
-    task="depth-estimation",
-    model=model_id,
-    device=0,  # GPU
-    torch_dtype=torch.float16
-)
-
 
 async def using_vlm_as_a_judge(room_name: str, tag_info: str, raw_description: str, image_url: str) -> RealEstateTagEvaluation:
     chain = get_vlm_as_a_judge_chain()
@@ -32,17 +23,18 @@ async def using_vlm_as_a_judge(room_name: str, tag_info: str, raw_description: s
     return response
 
 
-def _depth_anything_v2_pipeline(image_url: str):
+def _load_image(image_url: str) -> Image.Image:
     # 下載圖片
     response = requests.get(image_url, timeout=10)
     response.raise_for_status()
 
-    image = Image.open(BytesIO(response.content)).convert("RGB")
+    return Image.open(BytesIO(response.content)).convert("RGB")
 
-    # 推論
-    out = pipe(image)
 
-    return out["depth"]  # PIL.Image
+async def _depth_anything_v2_pipeline(image_url: str) -> Image.Image:
+    # 下載與編碼在 thread 執行，推論交給 depth worker 併成 micro-batch，都不會卡住 event loop
+    image = await asyncio.to_thread(_load_image, image_url)
+    return await depth_worker.estimate(image)  # PIL.Image
 
 
 def _pil_to_base64_url(img: Image.Image, format="PNG") -> str:
@@ -58,7 +50,8 @@ def _pil_to_base64_url(img: Image.Image, format="PNG") -> str:
 async def using_vlm_with_spatial_signals_info_as_a_judge(room_name: str, tag_info: str, raw_description: str,
                                                          image_url: str, ) -> RealEstateTagEvaluation:
     chain = get_vlm_as_a_judge_chain()
-    depth_map = _depth_anything_v2_pipeline(image_url)
+    depth_map = await _depth_anything_v2_pipeline(image_url)
+    spatial_signal_image_url = await asyncio.to_thread(_pil_to_base64_url, depth_map)
 
     response: RealEstateTagEvaluation = await chain.ainvoke(
         {
@@ -66,7 +59,7 @@ async def using_vlm_with_spatial_signals_info_as_a_judge(room_name: str, tag_inf
             "tag_info": tag_info,
             "raw_description": raw_description,
             "image_url": image_url,
-            "spatial_signal_image_url": _pil_to_base64_url(depth_map)
+            "spatial_signal_image_url": spatial_signal_image_url
         }
     )
     return response
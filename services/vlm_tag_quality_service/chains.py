@@ -1,7 +1,4 @@
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
-
-from config import OPENAI_API_KEY, OPENAI_LLM_MODEL
+from infrastructures.llm.chain_registry import chain_registry
 from services.vlm_tag_quality_service.models import RealEstateTagEvaluation, SpatialEvaluation
 from services.vlm_tag_quality_service.prompts import (
     VLM_AS_A_JUDGE_SYSTEM_PROMPT,
@@ -10,15 +7,10 @@ from services.vlm_tag_quality_service.prompts import (
     VLM_WITH_SPATIAL_SIGNALS_USER_PROMPT,
 )
 
-llm = ChatOpenAI(
-    api_key=OPENAI_API_KEY,
-    model=OPENAI_LLM_MODEL,
-    temperature=0
-)
-
 
+@chain_registry.register(RealEstateTagEvaluation)
 def get_vlm_as_a_judge_chain():
-    structured_llm = llm.with_structured_output(RealEstateTagEvaluation)
+    from langchain_core.prompts import ChatPromptTemplate
 
     prompt = ChatPromptTemplate.from_messages([
         ("system", VLM_AS_A_JUDGE_SYSTEM_PROMPT),
@@ -27,13 +19,12 @@ def get_vlm_as_a_judge_chain():
             {"type": "image_url", "image_url": {"url": "{image_url}"}},
         ])
     ])
-
-    chain = prompt | structured_llm
-    return chain
+    return prompt
 
 
+@chain_registry.register(SpatialEvaluation)
 def get_vlm_with_spatial_signals_chain():
-    structured_llm = llm.with_structured_output(SpatialEvaluation)
+    from langchain_core.prompts import ChatPromptTemplate
 
     prompt = ChatPromptTemplate.from_messages([
         ("system", VLM_WITH_SPATIAL_SIGNALS_SYSTEM_PROMPT),
@@ -43,6 +34,4 @@ def get_vlm_with_spatial_signals_chain():
             {"type": "image_url", "image_url": {"url": "{spatial_signal_image_url}"}},
         ])
     ])
-
-    chain = prompt | structured_llm
-    return chain
+    return prompt
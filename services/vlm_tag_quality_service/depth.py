@@ -0,0 +1,281 @@
+import asyncio
+import gc
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+from PIL import Image
+
+from config import (
+    DEPTH_BACKEND,
+    DEPTH_BATCH_SIZE,
+    DEPTH_BATCH_WAIT_MS,
+    DEPTH_CPU_DTYPE,
+    DEPTH_DEVICE,
+    DEPTH_MODEL_SIZE,
+    DEPTH_ONNX_FILE,
+)
+
+DEPTH_MODELS = {
+    "small": "depth-anything/Depth-Anything-V2-Small-hf",
+    "base": "depth-anything/Depth-Anything-V2-Base-hf",
+    "large": "depth-anything/Depth-Anything-V2-Large-hf",
+}
+# ONNX exports of the same checkpoints (onnx/model.onnx, plus quantized variants such as onnx/model_int8.onnx).
+ONNX_DEPTH_MODELS = {
+    "small": "onnx-community/depth-anything-v2-small",
+    "base": "onnx-community/depth-anything-v2-base",
+    "large": "onnx-community/depth-anything-v2-large",
+}
+
+
+def to_depth_image(predicted_depth: np.ndarray, size: tuple[int, int]) -> Image.Image:
+    """Model output (H', W') -> 8-bit depth map at the input image `size`, min-max scaled like the HF pipeline."""
+    depth = Image.fromarray(predicted_depth.astype(np.float32, copy=False), mode="F").resize(size, Image.BICUBIC)
+    depth = np.asarray(depth)
+    low, high = float(depth.min()), float(depth.max())
+    scaled = (depth - low) / (high - low) if high > low else np.zeros_like(depth)
+    return Image.fromarray((scaled * 255).astype(np.uint8))
+
+
+class DepthModelManager:
+    """
+    Depth-Anything V2, loaded on first use instead of at import time.
+
+    size     "small" / "base" / "large" (25M / 97M / 335M parameters)
+    backend  "torch", or "onnx" for ONNX Runtime on CPU; `onnx_file` selects the export, e.g. onnx/model_int8.onnx
+             for int8 inference
+    device   "auto" (CUDA when available), "cuda[:n]" or "cpu"; CUDA runs in float16, CPU in `cpu_dtype` ("float32"
+             or "bfloat16"). An unavailable CUDA device falls back to CPU.
+
+    `warm_up` loads the model and runs one small image so the first real request does not pay for it; `unload` frees
+    it (and the CUDA cache) so the next use loads it again.
+    """
+
+    def __init__(self, size: str = DEPTH_MODEL_SIZE, backend: str = DEPTH_BACKEND, device: str = DEPTH_DEVICE,
+                 cpu_dtype: str = DEPTH_CPU_DTYPE, onnx_file: str = DEPTH_ONNX_FILE):
+        if size not in DEPTH_MODELS:
+            raise ValueError(f"Unknown depth model size {size!r}; expected one of {', '.join(DEPTH_MODELS)}")
+        if backend not in ("torch", "onnx"):
+            raise ValueError(f"Unknown depth backend {backend!r}; expected 'torch' or 'onnx'")
+        if cpu_dtype not in ("float32", "bfloat16"):
+            raise ValueError(f"Unsupported CPU dtype {cpu_dtype!r}; expected 'float32' or 'bfloat16'")
+        self.size = size
+        self.backend = backend
+        self.device = device
+        self.cpu_dtype = cpu_dtype
+        self.onnx_file = onnx_file
+        self._model = None
+        self._processor = None
+        self._lock = threading.Lock()
+
+    @property
+    def model_id(self) -> str:
+        return (ONNX_DEPTH_MODELS if self.backend == "onnx" else DEPTH_MODELS)[self.size]
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def describe(self) -> str:
+        if self.backend == "onnx":
+            return f"{self.model_id}/{self.onnx_file} (onnxruntime, cpu)"
+        device, dtype = self._torch_device()
+        return f"{self.model_id} (torch, {device}, {str(dtype).removeprefix('torch.')})"
+
+    def _torch_device(self):
+        import torch
+
+        device = self.device
+        if device == "auto":
+            device = "cuda:0" if torch.cuda.is_available() else "cpu"
+        elif device.startswith("cuda") and not torch.cuda.is_available():
+            print(f"[depth] {device} is not available, falling back to cpu")
+            device = "cpu"
+        dtype = torch.float16 if device.startswith("cuda") else getattr(torch, self.cpu_dtype)
+        return device, dtype
+
+    def load(self):
+        with self._lock:
+            if self._model is not None:
+                return
+            from transformers import AutoImageProcessor
+
+            processor = AutoImageProcessor.from_pretrained(DEPTH_MODELS[self.size])
+            if self.backend == "onnx":
+                import onnxruntime
+                from huggingface_hub import hf_hub_download
+
+                path = hf_hub_download(self.model_id, self.onnx_file)
+                model = onnxruntime.InferenceSession(path, providers=["CPUExecutionProvider"])
+            else:
+                from transformers import AutoModelForDepthEstimation
+
+                device, dtype = self._torch_device()
+                model = AutoModelForDepthEstimation.from_pretrained(self.model_id, torch_dtype=dtype).to(device).eval()
+            self._processor, self._model = processor, model
+
+    def _preprocess(self, image: Image.Image) -> np.ndarray:
+        return self._processor(images=image, return_tensors="np")["pixel_values"].astype(np.float32, copy=False)
+
+    def _forward(self, pixel_values: np.ndarray) -> np.ndarray:
+        """(N, 3, H, W) pixels -> (N, H', W') predicted depth as float32."""
+        if self.backend == "onnx":
+            (predicted,) = self._model.run(["predicted_depth"], {"pixel_values": pixel_values})
+            return predicted
+
+        import torch
+
+        inputs = torch.from_numpy(pixel_values).to(self._model.device, self._model.dtype)
+        with torch.inference_mode():
+            predicted = self._model(pixel_values=inputs).predicted_depth
+        # numpy has no bfloat16
+        return predicted.float().cpu().numpy()
+
+    def estimate_batch(self, images: list[Image.Image], return_exceptions: bool = False) -> list:
+        """
+        Depth maps of RGB images (PIL, same sizes; brighter = closer). The processor keeps the aspect ratio, so
+        images are grouped by preprocessed shape and each group is one forward pass. A group whose pass fails is
+        retried one image at a time, so one bad image does not fail the others. With `return_exceptions`, a failed
+        image's entry is its exception (as in asyncio.gather); otherwise the first failure is raised.
+        """
+        if self._model is None:
+            self.load()
+        results: list = [None] * len(images)
+        groups: dict[tuple, list[int]] = {}
+        pixels: dict[int, np.ndarray] = {}
+        for i, image in enumerate(images):
+            try:
+                pixels[i] = self._preprocess(image)
+            except Exception as e:
+                results[i] = e
+                continue
+            groups.setdefault(pixels[i].shape, []).append(i)
+        for indices in groups.values():
+            try:
+                predicted = self._forward(np.concatenate([pixels[i] for i in indices]))
+            except Exception as e:
+                if len(indices) == 1:
+                    results[indices[0]] = e
+                    continue
+                for i in indices:
+                    try:
+                        results[i] = to_depth_image(self._forward(pixels[i])[0], images[i].size)
+                    except Exception as e:
+                        results[i] = e
+                continue
+            for i, depth in zip(indices, predicted):
+                try:
+                    results[i] = to_depth_image(depth, images[i].size)
+                except Exception as e:
+                    results[i] = e
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+        return results
+
+    def estimate(self, image: Image.Image) -> Image.Image:
+        return self.estimate_batch([image])[0]
+
+    def warm_up(self) -> float:
+        """Load the model and run one inference now. Returns seconds."""
+        start = time.perf_counter()
+        self.estimate(Image.new("RGB", (64, 64)))
+        return time.perf_counter() - start
+
+    def unload(self):
+        with self._lock:
+            self._model = self._processor = None
+        gc.collect()
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+
+class DepthBatchWorker:
+    """
+    Runs depth inference on one dedicated thread, so async callers never block the event loop. Requests are
+    collected into micro-batches: a batch is run when it holds `max_batch_size` images or when its first request
+    has waited `max_wait_ms`, whichever comes first. `max_batch_size` also bounds (V)RAM, however many callers are
+    waiting. torch and ONNX Runtime release the GIL during the forward pass.
+    """
+
+    def __init__(self, model: DepthModelManager, max_batch_size: int = DEPTH_BATCH_SIZE,
+                 max_wait_ms: float = DEPTH_BATCH_WAIT_MS):
+        self.model = model
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.images = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, image: Image.Image) -> Future:
+        """Queue one image; the future resolves to its depth map."""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="depth-worker", daemon=True)
+                    self._thread.start()
+        future = Future()
+        self._queue.put((image, future))
+        return future
+
+    async def estimate(self, image: Image.Image) -> Image.Image:
+        return await asyncio.wrap_future(self.submit(image))
+
+    def _collect(self, first) -> tuple[list, bool]:
+        batch, deadline = [first], time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, stop = self._collect(first)
+            batch = [(image, future) for image, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                depths = self.model.estimate_batch([image for image, _ in batch], return_exceptions=True)
+            except Exception as e:  # the model failed to load
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), depth in zip(batch, depths):
+                if isinstance(depth, Exception):
+                    future.set_exception(depth)
+                else:
+                    future.set_result(depth)
+            self.batches += 1
+            self.images += len(batch)
+
+    def close(self):
+        """Finish the queued requests and stop the thread (the next `submit` starts a new one)."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+
+depth_model = DepthModelManager()
+depth_worker = DepthBatchWorker(depth_model)